@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Attachment Store
+Inhaltsadressierter Speicher für Mail-Anhänge: jeder Inhalt liegt genau einmal unter
+.attachment-store/objects/<sha256[:2]>/<sha256>, gestreamt direkt aus der .eml-Datei.
+Logische Namen (z.B. images/logos/wdi-schwerte.png) stehen im manifest.json und werden
+nur geschrieben, wenn sich ihr Inhalt tatsächlich ändert; unveränderte Anhänge werden
+weder dekodiert noch geschrieben.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from mail_index import CHUNK_SIZE, error_record, iter_attachment, parallel_map
+
+ATTACHMENT_STORE_DIR = ".attachment-store"
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def object_path(objects: Path, sha256: str) -> Path:
+    return objects / sha256[:2] / sha256
+
+def store_object(objects: Path, attachment: Dict) -> Path:
+    """Streamt einen Anhang in den Speicher; prüft den Hash, bevor die Datei sichtbar wird"""
+    target = object_path(objects, attachment["sha256"])
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    digest = hashlib.sha256()
+    try:
+        with open(temp, "wb") as f:
+            for chunk in iter_attachment(attachment):
+                digest.update(chunk)
+                f.write(chunk)
+        if digest.hexdigest() != attachment["sha256"]:
+            raise ValueError(f"Hash stimmt nicht: {digest.hexdigest()} statt {attachment['sha256']}")
+        os.replace(temp, target)
+    finally:
+        if temp.exists():
+            temp.unlink()
+    return target
+
+def _store_or_error(job: Tuple[str, Dict]) -> Dict:
+    objects, attachment = job
+    try:
+        store_object(Path(objects), attachment)
+        return {"type": "stored", "sha256": attachment["sha256"]}
+    except Exception as e:
+        return error_record(attachment["path"], "extract", e)
+
+class AttachmentStore:
+    """Anhänge nach Inhalt (sha256) plus Manifest der logischen Namen"""
+
+    VERSION = 1
+
+    def __init__(self, root: str = ATTACHMENT_STORE_DIR):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.manifest_path = self.root / "manifest.json"
+        self.names: Dict[str, Dict] = {}
+        self.stats = {"stored": 0, "deduplicated": 0, "published": 0, "unchanged": 0}
+        self.dirty = False
+        if self.manifest_path.exists():
+            try:
+                data = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+                if data.get("version") == self.VERSION:
+                    self.names = data.get("names", {})
+            except (OSError, ValueError):
+                self.names = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.save()
+
+    def path(self, sha256: str) -> Path:
+        return object_path(self.objects, sha256)
+
+    def has(self, sha256: str) -> bool:
+        return self.path(sha256).is_file()
+
+    def extract(self, attachments: Iterable, workers: int = 1) -> Iterator[Dict]:
+        """Legt fehlende Anhänge ab (parallel bei workers > 1), Ergebnisse in Eingabereihenfolge
+
+        Liefert {"type": "attachment", "attachment": ..., "path": Path, "stored": bool} oder
+        einen Fehler-Datensatz. Bereits vorhandene Inhalte werden nicht dekodiert.
+        """
+        attachments = [dict(attachment) for attachment in attachments]
+        missing = {}
+        for attachment in attachments:
+            if attachment["sha256"] not in missing and not self.has(attachment["sha256"]):
+                missing[attachment["sha256"]] = attachment
+
+        results = {}
+        jobs = [(str(self.objects), attachment) for attachment in missing.values()]
+        for sha256, result in zip(missing, parallel_map(_store_or_error, jobs, workers)):
+            results[sha256] = result
+            if result["type"] == "stored":
+                self.stats["stored"] += 1
+
+        reported = set()
+        for attachment in attachments:
+            sha256 = attachment["sha256"]
+            result = results.get(sha256)
+            if result and result["type"] == "error":
+                yield result
+                continue
+            stored = result is not None and sha256 not in reported
+            reported.add(sha256)
+            if not stored:
+                self.stats["deduplicated"] += 1
+            yield {"type": "attachment", "attachment": attachment, "path": self.path(sha256), "stored": stored}
+
+    def publish(self, name, sha256: str, source: Optional[Dict] = None) -> bool:
+        """Stellt einen Inhalt unter seinem logischen Namen bereit; True nur, wenn geschrieben wurde
+
+        Die Zieldatei bleibt eine normale Datei (die Website wird aus dem Repository
+        ausgeliefert); geschrieben wird sie nur, wenn ihr Inhalt vom gespeicherten abweicht.
+        """
+        target = Path(name)
+        key = target.as_posix()
+        entry = self.names.get(key)
+        try:
+            stat = target.stat()
+        except OSError:
+            stat = None
+
+        if stat and entry and entry["sha256"] == sha256 and \
+                entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            self.stats["unchanged"] += 1
+            return False
+
+        written = False
+        if not stat or file_sha256(target) != sha256:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            temp = target.with_name(f".{target.name}.tmp")
+            shutil.copyfile(self.path(sha256), temp)
+            os.replace(temp, target)
+            stat = target.stat()
+            written = True
+        self.stats["published" if written else "unchanged"] += 1
+
+        self.names[key] = {"sha256": sha256, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                           "source": source or (entry or {}).get("source")}
+        self.dirty = True
+        return written
+
+    def save(self):
+        if not self.dirty:
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        temp = self.manifest_path.with_suffix(".tmp")
+        temp.write_text(json.dumps({"version": self.VERSION, "names": self.names}, indent=2, ensure_ascii=False),
+                        encoding="utf-8")
+        temp.replace(self.manifest_path)
+        self.dirty = False
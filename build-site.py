@@ -0,0 +1,523 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Site Build
+Baut die Website für Cloudflare Pages nach dist/: kopiert alle Seiten und statischen
+Dateien, legt Kopien aller Assets (css/, images/) mit Inhalts-Hash im Namen unter
+assets/ an, schreibt die Referenzen in den Seiten darauf um und erzeugt eine _headers-
+Datei, die diese Dateien ein Jahr lang als immutable cachen lässt.
+
+Pro Seite (parallel) wird das CSS für den ersten Bildschirm inline gesetzt und das
+Stylesheet nachgeladen; HTML und CSS werden minifiziert, optional mit .br/.gz daneben.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from html_checks import CSS_URL, Document, resolve_reference, site_pages, srcset_urls
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+DEFAULT_OUTPUT = "dist"
+# Verzeichnisse, deren Dateien einen Hash im Namen bekommen
+ASSET_DIRS = ("css", "images")
+# Einzeldateien im Root, die mit festem Namen ausgeliefert werden
+STATIC_FILES = (
+    "favicon.ico", "favicon-16x16.png", "favicon-32x32.png", "apple-touch-icon.png",
+    "android-chrome-192x192.png", "android-chrome-512x512.png", "site.webmanifest",
+    "robots.txt", "sitemap.xml", "_redirects",
+)
+FINGERPRINT_DIR = "assets"
+FINGERPRINT_MANIFEST = "assets/manifest.json"
+HASH_LENGTH = 10
+IGNORED_FILES = ("desktop.ini", "Thumbs.db", ".DS_Store")
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, max-age=0, must-revalidate"
+
+# Dateitypen, für die --precompress .br und .gz erzeugt
+COMPRESSIBLE = (".html", ".css", ".js", ".svg", ".json", ".xml", ".txt", ".webmanifest")
+
+# Ein Stylesheet wird aufgeteilt, wenn das seinen blockierenden Request aus dem ersten Rendern
+# entfernt – außer das kritische CSS ist fast das ganze Stylesheet, das dann doppelt geladen würde
+CRITICAL_MAX_SHARE = 0.75
+# <style>-Blöcke im <head> werden nur ausgelagert, wenn dadurch mindestens so viel HTML wegfällt
+CRITICAL_MIN_DEFERRED_KB = 2
+# Ausgelagerte <style>-Blöcke liegen als assets/inline/<seite>.<hash>.css
+INLINE_CSS_DIR = "inline"
+
+# Attribute mit URLs; srcset enthält mehrere
+URL_ATTRIBUTES = ("src", "href", "srcset", "poster")
+ATTRIBUTE_VALUE = re.compile(r"""(\s(?P<name>[\w:-]+)\s*=\s*)(?P<quote>["'])(?P<value>.*?)(?P=quote)""", re.S)
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+def fingerprinted_name(path: Path, digest: str) -> Path:
+    """css/theme.css -> assets/css/theme.3f2a1b9c0d.css"""
+    return Path(FINGERPRINT_DIR) / path.parent / f"{path.stem}.{digest}{path.suffix}"
+
+def copy_if_changed(source: Path, target: Path) -> bool:
+    """Kopiert nur, wenn Größe oder mtime abweichen"""
+    if target.exists():
+        source_stat, target_stat = source.stat(), target.stat()
+        if source_stat.st_size == target_stat.st_size and int(source_stat.st_mtime) == int(target_stat.st_mtime):
+            return False
+    target.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copy2(source, target)
+    return True
+
+def write_if_changed(target: Path, data: bytes) -> bool:
+    if target.exists() and target.read_bytes() == data:
+        return False
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_bytes(data)
+    return True
+
+def relative_url(target: Path, source: Path) -> str:
+    return Path(os.path.relpath(target, source.parent)).as_posix()
+
+CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+CSS_STRING = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')""")
+# At-Rules, die immer ins kritische CSS gehören (Variablen, Fonts, Animationen)
+ALWAYS_CRITICAL = ("@font-face", "@keyframes", "@-webkit-keyframes", "@charset", "@import", "@property")
+PSEUDO = re.compile(r"::?[\w-]+(?:\([^)]*\))?")
+
+def minify_css(css: str) -> str:
+    """Entfernt Kommentare und überflüssige Leerzeichen; Strings bleiben unverändert"""
+    parts = CSS_STRING.split(CSS_COMMENT.sub("", css))
+    for i in range(0, len(parts), 2):
+        part = re.sub(r"\s+", " ", parts[i])
+        part = re.sub(r"\s*([{};,>~])\s*", r"\1", part)
+        # Leerzeichen nach ":" nur in Deklarationen entfernen, nicht in Selektoren wie "a :hover"
+        part = re.sub(r":\s+", ":", part)
+        parts[i] = part.replace(";}", "}")
+    return "".join(parts).strip()
+
+def split_rules(css: str) -> List[Tuple[str, str]]:
+    """Oberste Ebene eines Stylesheets als (Prelude, Block-Inhalt); At-Rules ohne Block mit Inhalt None"""
+    css = CSS_COMMENT.sub("", css)
+    rules = []
+    position = 0
+    while position < len(css):
+        brace = css.find("{", position)
+        semicolon = css.find(";", position)
+        if brace == -1:
+            break
+        if css[position:].lstrip().startswith("@") and semicolon != -1 and semicolon < brace:
+            rules.append((css[position:semicolon].strip(), None))
+            position = semicolon + 1
+            continue
+        depth = 0
+        for end in range(brace, len(css)):
+            if css[end] == "{":
+                depth += 1
+            elif css[end] == "}":
+                depth -= 1
+                if depth == 0:
+                    break
+        rules.append((css[position:brace].strip(), css[brace + 1:end]))
+        position = end + 1
+    return rules
+
+def fold_end(document: Document) -> int:
+    """Elemente bis zum Ende der ersten <section> (bzw. <main>) gelten als erster Bildschirm"""
+    for tag in ("section", "main"):
+        if document.by_tag.get(tag):
+            return document.by_tag[tag][0].end
+    return len(document.elements)
+
+def selector_above_fold(selector: str, document: Document, limit: int) -> bool:
+    """Trifft der Selektor ein Element im ersten Bildschirm? Im Zweifel ja."""
+    # :hover, ::before usw. entfernen, >, + und ~ wie Nachfahren behandeln
+    simplified = PSEUDO.sub(lambda m: m.group(0) if m.group(0).startswith(":not(") else "", selector)
+    simplified = re.sub(r"\s*[>+~]\s*", " ", simplified).strip()
+    if not simplified or simplified in ("*", "html", "body", ":root"):
+        return True
+    try:
+        return any(element.index < limit for element in document.select(simplified))
+    except ValueError:
+        return True
+
+def critical_css(css: str, document: Document, limit: int) -> str:
+    """Regeln, deren Selektoren Elemente im ersten Bildschirm treffen"""
+    critical = []
+    for prelude, body in split_rules(css):
+        if body is None:
+            if prelude.startswith(ALWAYS_CRITICAL):
+                critical.append(prelude + ";")
+        elif prelude.startswith(ALWAYS_CRITICAL):
+            critical.append(f"{prelude}{{{body}}}")
+        elif prelude.startswith("@"):
+            inner = critical_css(body, document, limit)
+            if inner:
+                critical.append(f"{prelude}{{{inner}}}")
+        elif any(selector_above_fold(selector, document, limit) for selector in prelude.split(",")):
+            critical.append(f"{prelude}{{{body}}}")
+    return "\n".join(critical)
+
+PROTECTED = re.compile(r"(<(pre|textarea|script|style)\b.*?</\2\s*>)", re.S | re.I)
+HTML_COMMENT = re.compile(r"<!--(?!\[if).*?-->", re.S)
+
+def minify_html(html: str) -> str:
+    """Entfernt Kommentare und fasst Leerraum zusammen; <pre>, <textarea> und <script> bleiben
+    unverändert, <style> wird als CSS minifiziert"""
+    parts = PROTECTED.split(html)
+    result = []
+    # split liefert Text, Treffer, Tag-Name im Wechsel
+    for i in range(0, len(parts), 3):
+        text = HTML_COMMENT.sub("", parts[i])
+        # Leerraum mit Zeilenumbruch -> Zeilenumbruch, sonst ein Leerzeichen (Darstellung bleibt gleich)
+        result.append(re.sub(r"\s+", lambda m: "\n" if "\n" in m.group(0) else " ", text))
+        if i + 1 < len(parts):
+            block, tag = parts[i + 1], parts[i + 2].lower()
+            if tag == "style":
+                start = block.index(">") + 1
+                end = block.lower().rindex("</style")
+                block = block[:start] + minify_css(block[start:end]) + block[end:]
+            result.append(block)
+    return "".join(result).strip() + "\n"
+
+def compress(data: bytes) -> Dict[str, bytes]:
+    """gzip und (falls brotli installiert ist) brotli mit höchster Stufe"""
+    compressed = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        compressed[".br"] = brotli.compress(data, quality=11)
+    return compressed
+
+def write_compressed(path: Path, data: bytes) -> Dict[str, int]:
+    """Schreibt .gz/.br neben die Datei und liefert deren Größen"""
+    sizes = {}
+    for suffix, compressed in compress(data).items():
+        write_if_changed(path.with_name(path.name + suffix), compressed)
+        sizes[suffix] = len(compressed)
+    return sizes
+
+class Fingerprinter:
+    """Ordnet jedem Asset seine Kopie mit Hash zu; Stylesheets werden vorher umgeschrieben"""
+
+    def __init__(self, output: Path, minify: bool = False):
+        self.output = output
+        self.minify = minify
+        self.mapping: Dict[Path, Path] = {}
+        self.written = 0
+
+    def collect(self):
+        assets = sorted(
+            path for directory in ASSET_DIRS for path in Path(directory).rglob("*")
+            if path.is_file() and path.name not in IGNORED_FILES
+        )
+        # Bilder zuerst, damit Stylesheets auf deren Hash verweisen können
+        for path in [path for path in assets if path.suffix.lower() != ".css"]:
+            data = path.read_bytes()
+            self._store(path, data)
+        for path in [path for path in assets if path.suffix.lower() == ".css"]:
+            self.stylesheet(path)
+
+    def stylesheet(self, path: Path, active=()) -> Optional[Path]:
+        path = Path(os.path.normpath(path))
+        if path in self.mapping:
+            return self.mapping[path]
+        if path in active or not path.exists():
+            # Zyklische oder fehlende @imports bleiben unverändert
+            return None
+        css = path.read_text(encoding="utf-8")
+        target = fingerprinted_name(path, "0" * HASH_LENGTH)
+
+        def replace(match):
+            url = match.group("url") or match.group("import")
+            resolved = resolve_reference(url.strip(), path)
+            if resolved is None:
+                return match.group(0)
+            hashed = self.stylesheet(resolved, active + (path,)) if resolved.suffix == ".css" \
+                else self.mapping.get(resolved)
+            if hashed is None:
+                return match.group(0)
+            # Die Kopie liegt unter assets/ mit gleicher Struktur, relative Pfade bleiben gültig
+            return match.group(0).replace(url, relative_url(hashed, target))
+
+        css = CSS_URL.sub(replace, css)
+        return self._store(path, (minify_css(css) if self.minify else css).encode("utf-8"))
+
+    def _store(self, path: Path, data: bytes) -> Path:
+        hashed = fingerprinted_name(path, content_hash(data))
+        if write_if_changed(self.output / hashed, data):
+            self.written += 1
+        self.mapping[path] = hashed
+        return hashed
+
+    def rewrite_url(self, url: str, page: Path, source: Optional[Path] = None) -> str:
+        """URL einer Seite auf die Kopie mit Hash, Query und Anker bleiben erhalten
+
+        source: Datei, relativ zu der die URL steht, falls nicht die Seite selbst
+        (z.B. ein Stylesheet, dessen Regeln in die Seite eingebettet werden).
+        """
+        resolved = resolve_reference(url.strip(), source or page)
+        if resolved is None:
+            return url
+        hashed = self.mapping.get(resolved)
+        if hashed is None:
+            return url if source is None else relative_url(resolved, page)
+        suffix = url[len(url.split("#")[0].split("?")[0]):]
+        return relative_url(hashed, page) + suffix
+
+    def rewrite_page(self, page: Path, html: str) -> str:
+        document = Document(html, page)
+        replacements = []
+        for element in document.elements:
+            if not any(name in element.attrs for name in URL_ATTRIBUTES + ("style",)):
+                continue
+
+            def replace(match):
+                name, value = match.group("name").lower(), match.group("value")
+                if name == "srcset":
+                    for url in srcset_urls(value):
+                        value = value.replace(url, self.rewrite_url(url, page), 1)
+                elif name in URL_ATTRIBUTES:
+                    value = self.rewrite_url(value, page)
+                elif name == "style":
+                    value = self.rewrite_css(value, page)
+                return match.group(1) + match.group("quote") + value + match.group("quote")
+
+            tag = ATTRIBUTE_VALUE.sub(replace, element.start_tag)
+            if tag != element.start_tag:
+                replacements.append((element.offset, element.offset + len(element.start_tag), tag))
+
+        for start, end, tag in sorted(replacements, reverse=True):
+            html = html[:start] + tag + html[end:]
+        # url() in <style>-Blöcken
+        return self.rewrite_css(html, page)
+
+    def rewrite_css(self, css: str, page: Path, source: Optional[Path] = None) -> str:
+        def replace(match):
+            url = match.group("url") or match.group("import")
+            return match.group(0).replace(url, self.rewrite_url(url, page, source))
+        return CSS_URL.sub(replace, css)
+
+    def prune(self) -> int:
+        """Löscht Kopien mit veraltetem Hash"""
+        current = {self.output / hashed for hashed in self.mapping.values()}
+        current.add(self.output / FINGERPRINT_MANIFEST)
+        removed = 0
+        for path in (self.output / FINGERPRINT_DIR).rglob("*"):
+            if path.is_file() and path not in current:
+                path.unlink()
+                removed += 1
+        return removed
+
+    def manifest(self) -> Dict[str, str]:
+        return {path.as_posix(): hashed.as_posix() for path, hashed in sorted(self.mapping.items())}
+
+def headers_file(pages: List[str]) -> str:
+    """_headers für Cloudflare Pages; eine vorhandene _headers im Repo wird vorangestellt"""
+    lines = []
+    if Path("_headers").exists():
+        lines.append(Path("_headers").read_text(encoding="utf-8").rstrip() + "\n")
+    lines.append("# Generiert von build-site.py – Dateien mit Hash im Namen ändern sich nie")
+    lines.append(f"/{FINGERPRINT_DIR}/*")
+    lines.append(f"  Cache-Control: {IMMUTABLE}")
+    lines.append("")
+    lines.append("# Seiten immer revalidieren, damit neue Asset-Hashes sofort ankommen")
+    routes = ["/"] + (["/pages/*"] if any(page.startswith("pages/") for page in pages) else [])
+    for route in routes:
+        lines.append(route)
+        lines.append(f"  Cache-Control: {REVALIDATE}")
+    return "\n".join(lines) + "\n"
+
+def deferred_stylesheet(href: str) -> str:
+    """Stylesheet ohne Render-Blocking laden, ohne JavaScript wie bisher"""
+    return (f'<link rel="preload" href="{href}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">'
+            f'<noscript><link rel="stylesheet" href="{href}"></noscript>')
+
+def inline_critical_css(page: Path, html: str, fingerprinter: Fingerprinter, max_share: float = CRITICAL_MAX_SHARE,
+                        min_deferred_kb: float = CRITICAL_MIN_DEFERRED_KB) -> Dict:
+    """Setzt das kritische CSS einer Seite inline und lädt den Rest nach
+
+    Lokale, blockierende Stylesheets werden durch ihr kritisches CSS plus nachgeladenes
+    Stylesheet ersetzt ("blocking" zählt die so entfernten Requests). <style>-Blöcke im <head>
+    behalten nur ihr kritisches CSS; der vollständige Inhalt wird als Asset nachgeladen
+    ("deferred": virtueller Pfad und Inhalt, den der Aufrufer ablegt).
+    """
+    document = Document(html, page)
+    limit = fold_end(document)
+    replacements = []
+    result = {"html": html, "critical": 0, "blocking": 0, "deferred": None}
+    for link in document.select("link[rel=stylesheet][href]"):
+        stylesheet = resolve_reference(link.get("href"), page)
+        if stylesheet is None or not stylesheet.exists() or link.get("media") not in ("", "all", "screen"):
+            continue
+        source = stylesheet.read_text(encoding="utf-8")
+        css = minify_css(fingerprinter.rewrite_css(critical_css(source, document, limit), page, stylesheet))
+        full = minify_css(fingerprinter.rewrite_css(source, page, stylesheet))
+        if not css or len(css) > max_share * len(full):
+            continue
+        markup = f"<style>{css}</style>" + deferred_stylesheet(link.get("href"))
+        replacements.append((link.offset, link.offset + len(link.start_tag), markup))
+        result["critical"] += len(css)
+        result["blocking"] += 1
+
+    body = document.by_tag.get("body")
+    head_end = body[0].index if body else len(document.elements)
+    styles = [style for style in document.by_tag.get("style", [])
+              if style.index < head_end and style.get("media") in ("", "all", "screen")]
+    sources = [document.text(style) for style in styles]
+    parts = [minify_css(critical_css(source, document, limit)) for source in sources]
+    full = minify_css("\n".join(sources))
+    critical = sum(len(part) for part in parts)
+    if styles and len(full) - critical >= min_deferred_kb * 1024 and critical <= max_share * len(full):
+        virtual = Path(INLINE_CSS_DIR) / page.with_suffix(".css")
+        # url() stehen relativ zur Seite und müssen auf den Ort der Kopie umgeschrieben werden
+        css = fingerprinter.rewrite_css("\n".join(sources), fingerprinted_name(virtual, "0" * HASH_LENGTH), page)
+        data = (minify_css(css) if fingerprinter.minify else css).encode("utf-8")
+        href = relative_url(fingerprinted_name(virtual, content_hash(data)), page)
+        lowered = html.lower()
+        for style, part in zip(styles, parts):
+            end = html.index(">", lowered.index("</style", style.offset)) + 1
+            markup = f"<style>{part}</style>" if part else ""
+            if style is styles[-1]:
+                markup += deferred_stylesheet(href)
+            replacements.append((style.offset, end, markup))
+        result["critical"] += critical
+        result["deferred"] = (virtual, data)
+
+    for start, end, markup in sorted(replacements, reverse=True):
+        html = html[:start] + markup + html[end:]
+    result["html"] = html
+    return result
+
+def render_page(page: str, fingerprinter: Fingerprinter, critical: bool, minify: bool,
+                max_share: float = CRITICAL_MAX_SHARE, min_deferred_kb: float = CRITICAL_MIN_DEFERRED_KB) -> Dict:
+    """Baut eine Seite (läuft im Worker-Prozess)"""
+    html = Path(page).read_text(encoding="utf-8")
+    result = {"page": page, "source": len(html.encode("utf-8")), "critical": 0, "blocking": 0, "deferred": None}
+    if critical:
+        split = inline_critical_css(Path(page), html, fingerprinter, max_share, min_deferred_kb)
+        html = split.pop("html")
+        result.update(split)
+    html = fingerprinter.rewrite_page(Path(page), html)
+    result["data"] = (minify_html(html) if minify else html).encode("utf-8")
+    result["compressed"] = {suffix: len(data) for suffix, data in compress(result["data"]).items()}
+    return result
+
+def build(output: Path, critical: bool = True, minify: bool = True, precompress: bool = False,
+          workers: int = 1, max_share: float = CRITICAL_MAX_SHARE,
+          min_deferred_kb: float = CRITICAL_MIN_DEFERRED_KB) -> Dict:
+    """Führt alle Build-Schritte aus und liefert eine Statistik"""
+    stats = {"copied": 0, "fingerprinted": 0, "pruned": 0, "pages": 0, "results": []}
+    pages = site_pages()
+
+    for name in STATIC_FILES:
+        if Path(name).exists() and copy_if_changed(Path(name), output / name):
+            stats["copied"] += 1
+    # Originalnamen bleiben erreichbar (og:image, externe Links, E-Mails)
+    for directory in ASSET_DIRS:
+        for path in Path(directory).rglob("*"):
+            if path.is_file() and path.name not in IGNORED_FILES and copy_if_changed(path, output / path):
+                stats["copied"] += 1
+
+    fingerprinter = Fingerprinter(output, minify)
+    fingerprinter.collect()
+    stats["fingerprinted"] = fingerprinter.written
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(render_page, page, fingerprinter, critical, minify, max_share, min_deferred_kb)
+                   for page in pages]
+        for future in futures:
+            result = future.result()
+            # Ausgelagerte <style>-Blöcke erst hier ablegen, damit prune() und das Manifest sie kennen
+            if result["deferred"]:
+                fingerprinter._store(*result["deferred"])
+            if write_if_changed(output / result["page"], result["data"]):
+                stats["pages"] += 1
+            stats["results"].append(result)
+
+    write_if_changed(output / FINGERPRINT_MANIFEST,
+                     (json.dumps(fingerprinter.manifest(), indent=2) + "\n").encode("utf-8"))
+    write_if_changed(output / "_headers", headers_file(pages).encode("utf-8"))
+    stats["pruned"] = fingerprinter.prune()
+    stats["assets"] = len(fingerprinter.mapping)
+
+    if precompress:
+        for path in output.rglob("*"):
+            if path.is_file() and path.suffix in COMPRESSIBLE:
+                write_compressed(path, path.read_bytes())
+    else:
+        # Alte .br/.gz würden sonst veraltete Inhalte ausliefern
+        for path in output.rglob("*"):
+            if path.suffix in (".br", ".gz") and path.with_suffix("").suffix in COMPRESSIBLE:
+                path.unlink()
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Baut die Website mit Asset-Fingerprints nach dist/")
+    parser.add_argument("--out", default=DEFAULT_OUTPUT, help=f"Ausgabeverzeichnis (Standard: {DEFAULT_OUTPUT})")
+    parser.add_argument("--clean", action="store_true", help="Ausgabeverzeichnis vorher komplett löschen")
+    parser.add_argument("--no-critical", action="store_true",
+                        help="Stylesheets nicht durch kritisches CSS plus Nachladen ersetzen")
+    parser.add_argument("--critical-max-share", type=float, default=CRITICAL_MAX_SHARE, metavar="ANTEIL",
+                        help="Stylesheet nicht aufteilen, wenn das kritische CSS mehr als diesen Anteil ausmacht "
+                             f"(Standard: {CRITICAL_MAX_SHARE})")
+    parser.add_argument("--critical-min-deferred", type=float, default=CRITICAL_MIN_DEFERRED_KB, metavar="KB",
+                        help="<style>-Blöcke im <head> nur auslagern, wenn mindestens so viel HTML wegfällt "
+                             f"(Standard: {CRITICAL_MIN_DEFERRED_KB} KB)")
+    parser.add_argument("--no-minify", action="store_true", help="HTML und CSS nicht minifizieren")
+    parser.add_argument("--precompress", action="store_true",
+                        help="Zusätzlich .br und .gz neben HTML/CSS/JS/SVG schreiben (für Hosts, die sie ausliefern)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Parallele Prozesse für die Seiten (Standard: Anzahl Kerne)")
+    args = parser.parse_args()
+
+    output = Path(args.out)
+    if output.resolve() == Path(".").resolve():
+        parser.error("Das Ausgabeverzeichnis darf nicht das Repo selbst sein")
+    if args.clean and output.exists():
+        shutil.rmtree(output)
+
+    print("=" * 60)
+    print("KOST SITE BUILD")
+    print("=" * 60)
+
+    if brotli is None:
+        print("⚠️ 'brotli' Modul nicht installiert, nur gzip. Installiere mit: pip install brotli")
+
+    start = time.perf_counter()
+    stats = build(output, critical=not args.no_critical, minify=not args.no_minify,
+                  precompress=args.precompress, workers=max(1, args.workers),
+                  max_share=args.critical_max_share, min_deferred_kb=args.critical_min_deferred)
+    elapsed = time.perf_counter() - start
+
+    # "blockierend": aus dem ersten Rendern entfernte Stylesheet-Requests, "ausgelagert": nachgeladene <style>-Blöcke
+    print(f"  {'Seite':<36} {'Quelle':>8} {'Build':>8} {'gzip':>8} {'brotli':>8} {'krit. CSS':>9} "
+          f"{'blockierend':>11} {'ausgelagert':>11}")
+    for result in stats["results"]:
+        sizes = result["compressed"]
+        print(f"  {result['page']:<36} {result['source'] / 1024:7.1f}K {len(result['data']) / 1024:7.1f}K "
+              f"{sizes['.gz'] / 1024:7.1f}K "
+              + (f"{sizes['.br'] / 1024:7.1f}K " if ".br" in sizes else f"{'–':>8} ")
+              + (f"{result['critical'] / 1024:8.1f}K " if result["critical"] else f"{'–':>9} ")
+              + (f"{-result['blocking']:>11} " if result["blocking"] else f"{'–':>11} ")
+              + (f"{len(result['deferred'][1]) / 1024:10.1f}K" if result["deferred"] else f"{'–':>11}"))
+    print()
+    print(f"📄 {stats['pages']} Seiten aktualisiert")
+    print(f"📦 {stats['assets']} Assets mit Hash, davon {stats['fingerprinted']} neu geschrieben")
+    print(f"📋 {stats['copied']} statische Dateien kopiert, {stats['pruned']} veraltete Kopien gelöscht")
+    print(f"✅ Build nach {output}/ in {elapsed:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Asset Check
+Prüft alle referenzierten Bilder, Stylesheets und Skripte aller Seiten und Stylesheets
+(src, srcset, <link>, url() in CSS) und zeigt das Übertragungsgewicht pro Seite.
+Referenzen geparster Dateien werden nach Pfad und mtime in .asset-cache.json gecacht.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from html_checks import Document, asset_references, css_references, resolve_reference, site_pages
+
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+ASSET_CACHE_FILE = ".asset-cache.json"
+DEFAULT_BUDGET_KB = 500
+WEIGHT_KINDS = ("html", "image", "css", "js")
+
+class ReferenceCache:
+    """Referenzen pro Datei, gültig solange sich mtime und Größe nicht ändern"""
+
+    VERSION = 1
+
+    def __init__(self, path: Optional[str] = ASSET_CACHE_FILE):
+        self.path = Path(path) if path else None
+        self.files: Dict[str, Dict] = {}
+        self.parsed = 0
+        self.dirty = False
+        if self.path and self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+                if data.get("version") == self.VERSION:
+                    self.files = data.get("files", {})
+            except (OSError, ValueError):
+                self.files = {}
+
+    def references(self, path: Path, stat: os.stat_result) -> List[Tuple[str, str, bool]]:
+        key = path.as_posix()
+        entry = self.files.get(key)
+        if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            return [tuple(reference) for reference in entry["refs"]]
+
+        if path.suffix.lower() == ".css":
+            references = [(kind, url, True) for kind, url in css_references(path.read_text(encoding="utf-8"))]
+        else:
+            references = asset_references(Document.load(path))
+        self.files[key] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "refs": references}
+        self.parsed += 1
+        self.dirty = True
+        return references
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+        temp = self.path.with_suffix(".tmp")
+        temp.write_text(json.dumps({"version": self.VERSION, "files": self.files}), encoding="utf-8")
+        temp.replace(self.path)
+
+def stat_all(paths, workers: int) -> Dict[Path, Optional[os.stat_result]]:
+    """stat() aller Pfade parallel; None für fehlende Dateien"""
+    def safe_stat(path):
+        try:
+            return path.stat()
+        except OSError:
+            return None
+
+    paths = list(paths)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(paths, pool.map(safe_stat, paths)))
+
+def collect(pages: List[str], cache: ReferenceCache, root: Path, workers: int) -> List[Dict]:
+    """Alle Seiten mit ihren (rekursiv aufgelösten) Ressourcen"""
+    stats = stat_all([Path(page) for page in pages], workers)
+    reports = []
+    stylesheets = {}
+
+    for page in pages:
+        path = Path(page)
+        report = {"page": page, "assets": {}, "missing": [], "external": set(), "variants": 0}
+        reports.append(report)
+        if stats[path] is None:
+            report["missing"].append((page, page))
+            continue
+        report["assets"][path] = ("html", True)
+
+        pending = [(path, reference) for reference in cache.references(path, stats[path])]
+        while pending:
+            source, (kind, url, loaded) = pending.pop(0)
+            target = resolve_reference(url, source, root)
+            if target is None:
+                if not url.startswith(("data:", "#", "mailto:", "tel:")):
+                    report["external"].add(url)
+                continue
+            known_kind, known_loaded = report["assets"].get(target, (kind, False))
+            report["assets"][target] = (known_kind, known_loaded or loaded)
+            if kind == "image" and not loaded:
+                report["variants"] += 1
+            report.setdefault("sources", {}).setdefault(target, (source, url))
+
+            # Bilder und Imports aus Stylesheets gehören zum Gewicht der Seite
+            if kind == "css" and target not in report.setdefault("expanded", set()):
+                report["expanded"].add(target)
+                if target not in stylesheets:
+                    stat = stats.get(target) or stat_all([target], 1)[target]
+                    stats[target] = stat
+                    stylesheets[target] = cache.references(target, stat) if stat else []
+                pending.extend((target, reference) for reference in stylesheets[target])
+
+    # Alle übrigen Dateien in einem Rutsch parallel prüfen
+    unknown = {asset for report in reports for asset in report["assets"] if asset not in stats}
+    stats.update(stat_all(unknown, workers))
+
+    for report in reports:
+        weights = dict.fromkeys(WEIGHT_KINDS, 0)
+        sizes = []
+        for asset, (kind, loaded) in report["assets"].items():
+            stat = stats[asset]
+            if stat is None:
+                source, url = report["sources"][asset]
+                report["missing"].append((source.as_posix(), url))
+                continue
+            if loaded and kind in weights:
+                weights[kind] += stat.st_size
+                sizes.append((stat.st_size, asset.as_posix()))
+        report["weights"] = weights
+        report["total"] = sum(weights.values())
+        report["largest"] = sorted(sizes, reverse=True)
+    return reports
+
+def format_kb(size: int) -> str:
+    return f"{size / 1024:,.0f} KB".replace(",", ".")
+
+def main():
+    parser = argparse.ArgumentParser(description="Prüft alle Asset-Referenzen und zeigt das Gewicht pro Seite")
+    parser.add_argument("pages", nargs="*", help="Seiten (Standard: index.html und pages/*.html)")
+    parser.add_argument("--budget", type=int, default=DEFAULT_BUDGET_KB, metavar="KB",
+                        help=f"Warnung für Seiten über diesem Gewicht (Standard: {DEFAULT_BUDGET_KB} KB)")
+    parser.add_argument("--top", type=int, default=3, metavar="N",
+                        help="Die N größten Dateien pro Seite zeigen (Standard: 3)")
+    parser.add_argument("--workers", type=int, default=16, help="Parallele stat()-Aufrufe (Standard: 16)")
+    parser.add_argument("--no-cache", action="store_true", help=f"{ASSET_CACHE_FILE} ignorieren")
+    args = parser.parse_args()
+
+    pages = args.pages or site_pages()
+    cache = ReferenceCache(None if args.no_cache else ASSET_CACHE_FILE)
+
+    print("=" * 60)
+    print("KOST ASSET-CHECK")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    reports = collect(pages, cache, Path("."), max(1, args.workers))
+    elapsed = time.perf_counter() - start
+    cache.save()
+
+    missing = 0
+    over_budget = 0
+    budget = args.budget * 1024
+    for report in sorted(reports, key=lambda r: r["total"], reverse=True):
+        weights = report["weights"]
+        marker = "⚠️" if report["total"] > budget else "✓"
+        over_budget += report["total"] > budget
+        print(f"\n{marker} {report['page']}: {format_kb(report['total'])} "
+              f"(Bilder {format_kb(weights['image'])}, CSS {format_kb(weights['css'])}, "
+              f"JS {format_kb(weights['js'])}, HTML {format_kb(weights['html'])})")
+        for size, name in report["largest"][:args.top]:
+            print(f"    {format_kb(size):>9}  {name}")
+        if report["variants"]:
+            print(f"    + {report['variants']} alternative Varianten (srcset/picture) geprüft, nicht gezählt")
+        if report["external"]:
+            print(f"    + {len(report['external'])} externe Ressourcen (nicht gezählt)")
+        for source, url in report["missing"]:
+            missing += 1
+            print(f"  ❌ Fehlt: {url} (referenziert in {source})")
+
+    print()
+    print("=" * 60)
+    print(f"{len(reports)} Seiten in {elapsed * 1000:.0f}ms geprüft ({cache.parsed} Dateien neu geparst): "
+          f"{missing} fehlende Dateien, {over_budget} Seiten über {args.budget} KB")
+    print("=" * 60)
+
+    sys.exit(1 if missing else 0)
+
+if __name__ == "__main__":
+    main()
@@ -5,41 +5,18 @@ Cloudflare WAF Rules Checker
 Prüft alle WAF Rules auf mögliche Googlebot-Blockierungen
 """
 
-import requests
+import argparse
 import json
 import sys
 import os
-from pathlib import Path
 
-# Lade Konfiguration aus Datei oder Umgebungsvariablen
-def load_config():
-    """Lädt Cloudflare API Konfiguration"""
-    config = {}
-    
-    # 1. Versuche Config-Datei zu laden
-    config_file = Path(".cloudflare-config.json")
-    if not config_file.exists():
-        config_file = Path("cloudflare-config.json")
-    
-    if config_file.exists():
-        try:
-            with open(config_file, 'r', encoding='utf-8') as f:
-                file_config = json.load(f)
-                config.update(file_config)
-        except Exception as e:
-            print(f"⚠️ Fehler beim Laden der Config-Datei: {e}")
-    
-    # 2. Überschreibe mit Umgebungsvariablen (haben Priorität)
-    if os.getenv("CLOUDFLARE_API_TOKEN"):
-        config["api_token"] = os.getenv("CLOUDFLARE_API_TOKEN")
-    if os.getenv("CLOUDFLARE_ZONE_ID"):
-        config["zone_id"] = os.getenv("CLOUDFLARE_ZONE_ID")
-    if os.getenv("CLOUDFLARE_ACCOUNT_ID"):
-        config["account_id"] = os.getenv("CLOUDFLARE_ACCOUNT_ID")
-    if os.getenv("CLOUDFLARE_DOMAIN"):
-        config["domain"] = os.getenv("CLOUDFLARE_DOMAIN")
-    
-    return config
+from cloudflare_api import (
+    OUTPUT_FORMATS, ZONE_METADATA_FILE, CloudflareAPIError, RecordWriter, get_client, load_config
+)
+from rule_analyzer import (
+    PROBLEM_BLOCKING, PROBLEM_BOTS, PROBLEM_HOMEPAGE,
+    analyze_expression, rate_limit_targets_homepage, rule_expression, rule_problems, rule_summary
+)
 
 # Cloudflare API Konfiguration
 config = load_config()
@@ -48,125 +25,101 @@ ZONE_ID = config.get("zone_id", "")
 DOMAIN = config.get("domain", "kost-sicherheitstechnik.de")
 
 def get_zone_id(api_token, domain):
-    """Holt die Zone ID für eine Domain"""
-    headers = {
-        "Authorization": f"Bearer {api_token}",
-        "Content-Type": "application/json"
-    }
-    
-    response = requests.get(
-        f"https://api.cloudflare.com/client/v4/zones?name={domain}",
-        headers=headers
-    )
-    
-    if response.status_code == 200:
-        data = response.json()
-        if data.get("result") and len(data["result"]) > 0:
-            zone_id = data["result"][0]["id"]
-            # Speichere Zone ID in Config falls nicht vorhanden
-            if not ZONE_ID:
-                try:
-                    config_file = Path(".cloudflare-config.json")
-                    if config_file.exists():
-                        with open(config_file, 'r', encoding='utf-8') as f:
-                            config = json.load(f)
-                        config["zone_id"] = zone_id
-                        with open(config_file, 'w', encoding='utf-8') as f:
-                            json.dump(config, f, indent=2, ensure_ascii=False)
-                except:
-                    pass
-            return zone_id
+    """Holt die Zone ID für eine Domain (gemeinsamer Cache aller Scripts)"""
+    client = get_client(api_token)
     
-    return None
+    try:
+        return client.zone_id(domain)
+    except CloudflareAPIError as e:
+        print(f"Fehler beim Suchen der Zone: {e.status_code}")
+        return None
 
 def get_waf_rules(api_token, zone_id):
-    """Holt alle WAF Custom Rules"""
-    headers = {
-        "Authorization": f"Bearer {api_token}",
-        "Content-Type": "application/json"
-    }
+    """Holt alle WAF Custom Rules (über den zuletzt funktionierenden Endpoint der Zone)"""
+    client = get_client(api_token)
     
-    response = requests.get(
-        f"https://api.cloudflare.com/client/v4/zones/{zone_id}/rulesets/phases/http_request_firewall_custom/entrypoint",
-        headers=headers
-    )
+    try:
+        response = client.custom_ruleset(zone_id)
+    except CloudflareAPIError as e:
+        print(f"Fehler beim Abrufen der WAF Rules: {e.status_code}")
+        print(e.response.text)
+        return None
     
-    if response.status_code == 200:
-        return response.json()
-    else:
-        print(f"Fehler beim Abrufen der WAF Rules: {response.status_code}")
-        print(response.text)
+    if response is None:
+        print("Kein Custom-Rules-Ruleset für diese Zone gefunden")
         return None
+    return response.json()
 
 def get_rate_limiting_rules(api_token, zone_id):
-    """Holt alle Rate Limiting Rules"""
-    headers = {
-        "Authorization": f"Bearer {api_token}",
-        "Content-Type": "application/json"
-    }
-    
-    response = requests.get(
-        f"https://api.cloudflare.com/client/v4/zones/{zone_id}/rate_limits",
-        headers=headers
-    )
-    
-    if response.status_code == 200:
-        return response.json()
-    else:
-        print(f"Fehler beim Abrufen der Rate Limiting Rules: {response.status_code}")
-        return None
+    """Holt alle Rate Limiting Rules (Generator über alle Seiten)"""
+    client = get_client(api_token)
+    return client.paginate(f"zones/{zone_id}/rate_limits", per_page=1000)
 
 def get_firewall_rules(api_token, zone_id):
-    """Holt alle Firewall Rules"""
-    headers = {
-        "Authorization": f"Bearer {api_token}",
-        "Content-Type": "application/json"
-    }
-    
-    response = requests.get(
-        f"https://api.cloudflare.com/client/v4/zones/{zone_id}/firewall/rules",
-        headers=headers
-    )
-    
-    if response.status_code == 200:
-        return response.json()
-    else:
-        print(f"Fehler beim Abrufen der Firewall Rules: {response.status_code}")
-        return None
+    """Holt alle Firewall Rules (Generator über alle Seiten)"""
+    client = get_client(api_token)
+    return client.paginate(f"zones/{zone_id}/firewall/rules", per_page=100)
+
+# Meldungen zu den Problem-Codes aus rule_analyzer
+ISSUE_MESSAGES = {
+    PROBLEM_HOMEPAGE: "⚠️ Regel zielt auf Startseite '/' (nicht nur /api/contact)",
+    PROBLEM_BOTS: "⚠️ Regel blockiert Bots, aber hat keine Googlebot-Ausnahme",
+    PROBLEM_BLOCKING: "⚠️ Regel blockiert/challenged ohne Googlebot-Ausnahme",
+}
+
+# Problem-Code für Expressions, die der Parser nicht versteht
+PROBLEM_PARSE_ERROR = "parse_error"
 
 def analyze_rule(rule, rule_type="WAF"):
-    """Analysiert eine Regel auf mögliche Googlebot-Blockierungen"""
-    issues = []
-    
-    # Prüfe Expression
-    expression = rule.get("expression", "")
-    action = rule.get("action", "")
-    
-    # Prüfe ob Regel auf Startseite zielt
-    if "/" in expression or "eq \"/\"" in expression or "eq \"/\"" in expression:
-        if "/api/contact" not in expression:
-            issues.append(f"⚠️ Regel zielt auf Startseite '/' (nicht nur /api/contact)")
+    """Analysiert eine Regel auf mögliche Googlebot-Blockierungen: [(Code, Meldung)]"""
+    issues = [(problem, ISSUE_MESSAGES[problem]) for problem in rule_problems(rule)]
     
-    # Prüfe ob Regel Bots blockiert
-    if "bot" in expression.lower() or "cf.client.bot" in expression:
-        if "googlebot" not in expression.lower():
-            issues.append(f"⚠️ Regel blockiert Bots, aber hat keine Googlebot-Ausnahme")
-    
-    # Prüfe Action
-    if action.lower() in ["block", "challenge", "js_challenge"]:
-        if "googlebot" not in expression.lower():
-            issues.append(f"⚠️ Regel blockiert/challenged ohne Googlebot-Ausnahme")
+    info = analyze_expression(rule_expression(rule))
+    if info.error:
+        issues.append((PROBLEM_PARSE_ERROR, f"⚠️ Expression konnte nicht vollständig geprüft werden: {info.error}"))
     
     return issues
 
+def emit_rule(writer, zone_id, category, rule, issues):
+    """Ein Datensatz für die Rule und einer pro Problem (nur bei --format json/ndjson)"""
+    summary = rule_summary(rule)
+    writer.emit("rule", zone_id=zone_id, category=category, **summary)
+    for code, message in issues:
+        writer.emit("issue", zone_id=zone_id, category=category, rule_id=summary["rule_id"],
+                    description=summary["description"], problem=code,
+                    message=message.replace("⚠️ ", ""))
+
 def main():
+    parser = argparse.ArgumentParser(description="Cloudflare WAF Rules Checker")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Lokalen Antwort-Cache komplett deaktivieren")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Gecachte Antworten neu laden (Cache wird aktualisiert)")
+    parser.add_argument("--from-snapshot", metavar="DATEI",
+                        help="Offline aus einem Snapshot (manage-cloudflare.py --export-snapshot) prüfen")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="text",
+                        help="json/ndjson: ein Datensatz pro Rule und Problem auf stdout, "
+                             "sofort gestreamt (Text geht nach stderr)")
+    args = parser.parse_args()
+    
+    with RecordWriter(args.format) as writer:
+        check_rules(args, writer)
+
+def check_rules(args, writer):
+    """Prüft WAF, Rate Limiting und Firewall Rules einer Zone"""
+    client = get_client(CLOUDFLARE_API_TOKEN)
+    client.cache.enabled = not args.no_cache
+    client.cache.refresh = args.refresh
+    
+    snapshot = client.use_snapshot(args.from_snapshot) if args.from_snapshot else None
+    
     print("=" * 60)
     print("Cloudflare WAF Rules Checker")
     print("=" * 60)
     print()
     
-    # API Token prüfen
-    if not CLOUDFLARE_API_TOKEN:
+    # API Token prüfen (Snapshots brauchen keinen)
+    if not CLOUDFLARE_API_TOKEN and not snapshot:
         print("❌ FEHLER: CLOUDFLARE_API_TOKEN ist nicht konfiguriert!")
         print()
         print("Zwei Möglichkeiten:")
@@ -183,17 +136,17 @@ def main():
         return
     
     # Zone ID holen falls nicht gesetzt
-    if not ZONE_ID:
+    zone_id = snapshot.zone_id(ZONE_ID, DOMAIN) if snapshot else ZONE_ID
+    if not zone_id:
         print(f"🔍 Suche Zone ID für {DOMAIN}...")
         zone_id = get_zone_id(CLOUDFLARE_API_TOKEN, DOMAIN)
         if zone_id:
             print(f"✅ Zone ID gefunden: {zone_id}")
-            print(f"   (Wird automatisch in Config gespeichert)")
+            print(f"   (Wird in {ZONE_METADATA_FILE} zwischengespeichert)")
         else:
             print("❌ Zone ID nicht gefunden!")
+            writer.emit("error", domain=DOMAIN, message="Zone ID nicht gefunden")
             return
-    else:
-        zone_id = ZONE_ID
     
     print()
     print("=" * 60)
@@ -203,7 +156,8 @@ def main():
     # WAF Rules holen
     waf_data = get_waf_rules(CLOUDFLARE_API_TOKEN, zone_id)
     if waf_data:
-        rules = waf_data.get("result", {}).get("rules", [])
+        result = waf_data.get("result") or {}
+        rules = result.get("rules", []) if isinstance(result, dict) else result
         if rules:
             print(f"📋 {len(rules)} WAF Custom Rules gefunden:\n")
             for i, rule in enumerate(rules, 1):
@@ -212,9 +166,10 @@ def main():
                 print(f"  Action: {rule.get('action', 'N/A')}")
                 
                 issues = analyze_rule(rule, "WAF")
+                emit_rule(writer, zone_id, "waf_rules", rule, issues)
                 if issues:
                     print("  ⚠️ PROBLEME:")
-                    for issue in issues:
+                    for _, issue in issues:
                         print(f"    - {issue}")
                 else:
                     print("  ✅ Keine Probleme gefunden")
@@ -223,6 +178,7 @@ def main():
             print("✅ Keine WAF Custom Rules gefunden")
     else:
         print("❌ Konnte WAF Rules nicht abrufen")
+        writer.emit("error", zone_id=zone_id, category="waf_rules", message="WAF Rules nicht abrufbar")
     
     print()
     print("=" * 60)
@@ -230,29 +186,35 @@ def main():
     print("=" * 60)
     
     # Rate Limiting Rules holen
-    rate_limit_data = get_rate_limiting_rules(CLOUDFLARE_API_TOKEN, zone_id)
-    if rate_limit_data:
-        rules = rate_limit_data.get("result", [])
-        if rules:
-            print(f"📋 {len(rules)} Rate Limiting Rules gefunden:\n")
-            for i, rule in enumerate(rules, 1):
-                match = rule.get("match", {})
-                print(f"Rule #{i}: {rule.get('description', 'Keine Beschreibung')}")
-                print(f"  Match: {json.dumps(match, indent=2)}")
-                print(f"  Threshold: {rule.get('threshold', 'N/A')}")
-                print(f"  Action: {rule.get('action', {}).get('mode', 'N/A')}")
-                
-                # Prüfe ob auf Startseite zielt
-                match_str = json.dumps(match)
-                if "/" in match_str and "/api/contact" not in match_str:
-                    print("  ⚠️ PROBLEM: Regel zielt auf Startseite '/' (sollte nur /api/contact sein)")
-                else:
-                    print("  ✅ Regel zielt nur auf /api/contact")
-                print()
+    count = 0
+    try:
+        # Regeln werden ausgegeben, sobald ihre Seite geladen ist
+        for count, rule in enumerate(get_rate_limiting_rules(CLOUDFLARE_API_TOKEN, zone_id), 1):
+            match = rule.get("match", {})
+            print(f"Rule #{count}: {rule.get('description', 'Keine Beschreibung')}")
+            print(f"  Match: {json.dumps(match, indent=2)}")
+            print(f"  Threshold: {rule.get('threshold', 'N/A')}")
+            print(f"  Action: {rule.get('action', {}).get('mode', 'N/A')}")
+            
+            # Prüfe ob auf Startseite zielt
+            if rate_limit_targets_homepage(match):
+                emit_rule(writer, zone_id, "rate_limiting", rule, [(
+                    PROBLEM_HOMEPAGE, "Regel zielt auf Startseite '/' (sollte nur /api/contact sein)"
+                )])
+                print("  ⚠️ PROBLEM: Regel zielt auf Startseite '/' (sollte nur /api/contact sein)")
+            else:
+                emit_rule(writer, zone_id, "rate_limiting", rule, [])
+                print("  ✅ Regel zielt nur auf /api/contact")
+            print()
+        
+        if count:
+            print(f"📋 {count} Rate Limiting Rules gefunden")
         else:
             print("✅ Keine Rate Limiting Rules gefunden")
-    else:
+    except CloudflareAPIError as e:
+        print(f"Fehler beim Abrufen der Rate Limiting Rules: {e.status_code}")
         print("❌ Konnte Rate Limiting Rules nicht abrufen")
+        writer.emit("error", zone_id=zone_id, category="rate_limiting", message=str(e))
     
     print()
     print("=" * 60)
@@ -260,28 +222,31 @@ def main():
     print("=" * 60)
     
     # Firewall Rules holen
-    firewall_data = get_firewall_rules(CLOUDFLARE_API_TOKEN, zone_id)
-    if firewall_data:
-        rules = firewall_data.get("result", [])
-        if rules:
-            print(f"📋 {len(rules)} Firewall Rules gefunden:\n")
-            for i, rule in enumerate(rules, 1):
-                print(f"Rule #{i}: {rule.get('description', 'Keine Beschreibung')}")
-                print(f"  Filter: {json.dumps(rule.get('filter', {}), indent=2)}")
-                print(f"  Action: {rule.get('action', 'N/A')}")
-                
-                issues = analyze_rule(rule, "Firewall")
-                if issues:
-                    print("  ⚠️ PROBLEME:")
-                    for issue in issues:
-                        print(f"    - {issue}")
-                else:
-                    print("  ✅ Keine Probleme gefunden")
-                print()
+    count = 0
+    try:
+        for count, rule in enumerate(get_firewall_rules(CLOUDFLARE_API_TOKEN, zone_id), 1):
+            print(f"Rule #{count}: {rule.get('description', 'Keine Beschreibung')}")
+            print(f"  Filter: {json.dumps(rule.get('filter', {}), indent=2)}")
+            print(f"  Action: {rule.get('action', 'N/A')}")
+            
+            issues = analyze_rule(rule, "Firewall")
+            emit_rule(writer, zone_id, "firewall", rule, issues)
+            if issues:
+                print("  ⚠️ PROBLEME:")
+                for _, issue in issues:
+                    print(f"    - {issue}")
+            else:
+                print("  ✅ Keine Probleme gefunden")
+            print()
+        
+        if count:
+            print(f"📋 {count} Firewall Rules gefunden")
         else:
             print("✅ Keine Firewall Rules gefunden")
-    else:
+    except CloudflareAPIError as e:
+        print(f"Fehler beim Abrufen der Firewall Rules: {e.status_code}")
         print("❌ Konnte Firewall Rules nicht abrufen")
+        writer.emit("error", zone_id=zone_id, category="firewall", message=str(e))
     
     print()
     print("=" * 60)
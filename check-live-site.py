@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Live-Site Checker
+Ruft alle Seiten (index.html, pages/, sitemap.xml) parallel auf GitHub Pages und
+Produktion ab und meldet Status, Größe, TTFB und Gesamtzeit pro URL
+"""
+
+import argparse
+import sys
+import time
+from urllib.parse import urlsplit
+
+from site_probe import (
+    DEFAULT_WORKERS, GITHUB_PAGES_URL, PRODUCTION_URL, SITEMAP_FILE, create_session, fetch_all,
+    format_result, load_sitemap, local_pages, rebase_url
+)
+
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+HOSTS = {
+    "github": GITHUB_PAGES_URL,
+    "production": PRODUCTION_URL,
+}
+
+def collect_paths(sitemap: str) -> list:
+    """Alle lokalen Seiten plus alle Sitemap-Einträge, ohne Duplikate"""
+    paths = local_pages()
+    try:
+        sitemap_paths = [urlsplit(url).path or "/" for url in load_sitemap(sitemap)]
+    except Exception as e:
+        print(f"⚠️ Sitemap konnte nicht gelesen werden: {e}")
+        sitemap_paths = []
+
+    for path in sitemap_paths:
+        if path not in paths:
+            paths.append(path)
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallele Smoke-Tests aller Seiten auf allen Hosts")
+    parser.add_argument("--hosts", default=",".join(HOSTS),
+                        help=f"Kommagetrennt aus {', '.join(HOSTS)} oder beliebigen Basis-URLs "
+                             f"(Standard: {','.join(HOSTS)})")
+    parser.add_argument("--sitemap", default=SITEMAP_FILE,
+                        help=f"Sitemap-Datei oder -URL (Standard: {SITEMAP_FILE})")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Parallele Requests (Standard: {DEFAULT_WORKERS})")
+    args = parser.parse_args()
+
+    hosts = {}
+    for host in (h.strip() for h in args.hosts.split(",") if h.strip()):
+        hosts[host] = HOSTS.get(host, host)
+
+    paths = collect_paths(args.sitemap)
+    workers = max(1, args.workers)
+    session = create_session(workers)
+
+    print("=" * 60)
+    print("KOST LIVE-SITE CHECK")
+    print("=" * 60)
+    print(f"🔍 {len(paths)} Seiten × {len(hosts)} Hosts, {workers} parallele Requests")
+
+    jobs = [
+        (rebase_url(path, base_url), None, {"host": host, "path": path})
+        for host, base_url in hosts.items() for path in paths
+    ]
+
+    start = time.perf_counter()
+    results = list(fetch_all(session, jobs, workers))
+    wall_time = time.perf_counter() - start
+    session.close()
+
+    failed = 0
+    for host, base_url in hosts.items():
+        print()
+        print(f"[{host}] {base_url}")
+        print(f"  {'':1} {'Sta':>3} {'Größe':>9} {'TTFB':>8} {'Gesamt':>8}  URL")
+        host_results = sorted((r for r in results if r["host"] == host), key=lambda r: paths.index(r["path"]))
+        for result in host_results:
+            print(format_result(result))
+            if result["status"] != 200:
+                failed += 1
+
+    sequential = sum(result["total"] or 0 for result in results)
+    print()
+    print("=" * 60)
+    print(f"{len(results) - failed}/{len(results)} URLs OK in {wall_time:.2f}s "
+          f"(nacheinander wären es {sequential:.2f}s)")
+    print("=" * 60)
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
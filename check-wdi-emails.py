@@ -3,120 +3,121 @@
 """
 Check Kostmails for WDI logo and testimonial
 """
-import email
 from pathlib import Path
+import argparse
+import json
 import sys
 
+from attachment_store import AttachmentStore
+from mail_index import MAIL_DIR, MailIndex
+from mail_search import MailSearch
+from testimonials import message_text
+
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
 
-email_dir = Path("Kostmails")
+parser = argparse.ArgumentParser(description="Durchsucht Kostmails nach WDI Logo und Bewertung")
+parser.add_argument("--workers", type=int, default=1,
+                    help="E-Mails in N Prozessen parsen und dekodieren (Standard: 1)")
+args = parser.parse_args()
 
 print("Durchsuche E-Mails nach WDI Logo und Bewertung...\n")
 
-for eml_file in email_dir.glob("*.eml"):
+index = MailIndex(mail_dir=MAIL_DIR)
+stats = index.update(workers=args.workers)
+errors = stats["errors"]
+search = MailSearch(index)
+search.update()
+
+# Kandidaten über den Volltext-Index statt jede Mail zu durchsuchen
+wdi_mails = {hit.message for hit in search.search("wdi schwerte", any_term=True, limit=None)}
+# Dieselben Wörter markieren unten den relevanten Abschnitt
+TESTIMONIAL_WORDS = ('bewertung', 'referenz', 'testimonial', 'zusammenarbeit')
+testimonial_mails = {hit.message for hit in search.search(" ".join(TESTIMONIAL_WORDS), any_term=True, limit=None)}
+
+def is_wdi_logo(attachment):
+    filename = (attachment['filename'] or '').lower()
+    return ('wdi' in filename or 'schwerte' in filename) and attachment['content_type'].startswith('image/')
+
+# WDI-Logos vorab parallel in den Anhang-Speicher (nur neue Inhalte werden dekodiert)
+store = AttachmentStore()
+logos = [attachment for attachment in index.attachments(disposition='attachment') if is_wdi_logo(attachment)]
+stored = {}
+for attachment, result in zip(logos, store.extract(logos, args.workers)):
+    if result["type"] == "error":
+        errors.append(result)
+    else:
+        stored[attachment['id']] = attachment
+
+for message in index.messages():
     print(f"\n{'='*60}")
-    print(f"Datei: {eml_file.name}")
+    print(f"Datei: {Path(message['path']).name}")
     print('='*60)
     
-    try:
-        with open(eml_file, 'rb') as f:
-            msg = email.message_from_bytes(f.read())
-        
-        # Check subject
-        subject = msg.get('Subject', '')
-        print(f"\nBetreff: {subject}")
-        
-        # Check sender
-        sender = msg.get('From', '')
-        print(f"Von: {sender}")
-        
-        # Check attachments
-        attachments = []
-        for part in msg.walk():
-            if part.get_content_disposition() == 'attachment':
-                filename = part.get_filename()
-                if filename:
-                    # Decode filename if needed
-                    if filename.startswith('=?'):
-                        import email.header
-                        try:
-                            decoded_header = email.header.decode_header(filename)
-                            if decoded_header and decoded_header[0][0]:
-                                filename = decoded_header[0][0]
-                                if isinstance(filename, bytes):
-                                    filename = filename.decode('utf-8', errors='ignore')
-                        except:
-                            pass
-                    
-                    attachments.append(filename)
-                    print(f"\n  Anhang gefunden: {filename}")
-                    
-                    # Check if it's a WDI logo
-                    if 'wdi' in filename.lower() or 'schwerte' in filename.lower():
-                        print(f"  *** WDI LOGO GEFUNDEN: {filename} ***")
-                        if part.get_content_type().startswith('image/'):
-                            image_data = part.get_payload(decode=True)
-                            if image_data:
-                                logo_path = Path("images/logos/wdi-schwerte.png")
-                                with open(logo_path, 'wb') as img_file:
-                                    img_file.write(image_data)
-                                print(f"  ✓ Logo gespeichert: {logo_path} ({len(image_data)} bytes)")
-        
-        # Check email body for WDI content
-        body = ""
-        if msg.is_multipart():
-            for part in msg.walk():
-                content_type = part.get_content_type()
-                if content_type == "text/plain":
-                    try:
-                        body = part.get_payload(decode=True).decode('utf-8', errors='ignore')
-                    except:
-                        pass
-                elif content_type == "text/html":
-                    try:
-                        body = part.get_payload(decode=True).decode('utf-8', errors='ignore')
-                    except:
-                        pass
-        else:
-            try:
-                body = msg.get_payload(decode=True).decode('utf-8', errors='ignore')
-            except:
-                pass
-        
-        # Search for WDI mentions
-        if 'wdi' in body.lower() or 'schwerte' in body.lower():
-            print(f"\n  *** WDI INHALT GEFUNDEN ***")
-            # Extract relevant part
-            lines = body.split('\n')
-            for i, line in enumerate(lines):
-                if 'wdi' in line.lower() or 'schwerte' in line.lower():
-                    print(f"\n  Zeile {i+1}: {line.strip()}")
-                    # Show context
-                    for j in range(max(0, i-2), min(len(lines), i+5)):
-                        if j != i:
-                            print(f"    {lines[j].strip()}")
-                    break
-        
-        # Check for testimonials/reviews
-        if 'bewertung' in body.lower() or 'referenz' in body.lower() or 'testimonial' in body.lower():
-            print(f"\n  *** BEWERTUNG/TESTIMONIAL GEFUNDEN ***")
-            # Extract relevant part
-            lines = body.split('\n')
-            for i, line in enumerate(lines):
-                if any(word in line.lower() for word in ['bewertung', 'referenz', 'testimonial', 'zusammenarbeit']):
-                    print(f"\n  Relevanter Abschnitt:")
-                    for j in range(max(0, i-1), min(len(lines), i+10)):
-                        print(f"    {lines[j].strip()}")
-                    break
-        
-        if not attachments and 'wdi' not in body.lower():
-            print("  Keine WDI-Inhalte gefunden")
+    # Check subject
+    print(f"\nBetreff: {message['subject']}")
+    
+    # Check sender
+    print(f"Von: {message['sender']}")
+    
+    # Check attachments
+    attachments = []
+    for attachment in index.attachments(message['id'], disposition='attachment'):
+        filename = attachment['filename']
+        if filename:
+            attachments.append(filename)
+            print(f"\n  Anhang gefunden: {filename}")
             
-    except Exception as e:
-        print(f"  Fehler beim Verarbeiten: {e}")
+            # Check if it's a WDI logo
+            if 'wdi' in filename.lower() or 'schwerte' in filename.lower():
+                print(f"  *** WDI LOGO GEFUNDEN: {filename} ***")
+                if attachment['content_type'].startswith('image/'):
+                    if attachment['id'] in stored and attachment['size']:
+                        logo_path = Path("images/logos/wdi-schwerte.png")
+                        source = {"mail": Path(message['path']).name, "filename": filename}
+                        if store.publish(logo_path, attachment['sha256'], source):
+                            print(f"  ✓ Logo gespeichert: {logo_path} ({attachment['size']} bytes)")
+                        else:
+                            print(f"  ✓ Logo unverändert: {logo_path}")
+    
+    # Check email body for WDI content (HTML bevorzugt, in einem Durchgang in Text umgewandelt)
+    lines = [line for line in message_text(index, message['id']).splitlines() if line]
+    
+    # Search for WDI mentions
+    if message['id'] in wdi_mails:
+        print(f"\n  *** WDI INHALT GEFUNDEN ***")
+        # Extract relevant part
+        for i, line in enumerate(lines):
+            if 'wdi' in line.lower() or 'schwerte' in line.lower():
+                print(f"\n  Zeile {i+1}: {line}")
+                # Show context
+                for j in range(max(0, i-2), min(len(lines), i+5)):
+                    if j != i:
+                        print(f"    {lines[j]}")
+                break
+    
+    # Check for testimonials/reviews
+    if message['id'] in testimonial_mails:
+        print(f"\n  *** BEWERTUNG/TESTIMONIAL GEFUNDEN ***")
+        # Extract relevant part
+        for i, line in enumerate(lines):
+            if any(word in line.lower() for word in TESTIMONIAL_WORDS):
+                print(f"\n  Relevanter Abschnitt:")
+                for j in range(max(0, i-1), min(len(lines), i+10)):
+                    print(f"    {lines[j]}")
+                break
+    
+    if not attachments and message['id'] not in wdi_mails:
+        print("  Keine WDI-Inhalte gefunden")
+
+index.close()
+store.save()
+
+if errors:
+    print(f"\n⚠️ {len(errors)} Fehler:")
+    for record in errors:
+        print(json.dumps(record, ensure_ascii=False))
 
 print("\n" + "="*60)
 print("Suche abgeschlossen!")
 print("="*60)
-
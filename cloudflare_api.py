@@ -0,0 +1,926 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cloudflare API Client
+Gemeinsame Konfiguration und gepoolte HTTP-Session für alle Cloudflare-Scripts
+"""
+
+import contextlib
+import difflib
+import gzip
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+API_BASE = "https://api.cloudflare.com/client/v4"
+
+CONFIG_FILE = ".cloudflare-config.json"
+CONFIG_FILE_ALT = "cloudflare-config.json"  # Fallback
+
+# (Connect, Read) Timeout in Sekunden
+DEFAULT_TIMEOUT = (5, 30)
+DEFAULT_POOL_SIZE = 32
+DEFAULT_RETRIES = 3
+
+CUSTOM_RULES_PHASE = "http_request_firewall_custom"
+CUSTOM_RULES_ENTRYPOINT = f"rulesets/phases/{CUSTOM_RULES_PHASE}/entrypoint"
+# Reihenfolge, in der die Custom Rules einer unbekannten Zone gesucht werden
+RULESET_ENDPOINTS = (CUSTOM_RULES_ENTRYPOINT, "rulesets")
+
+# Felder einer Rule, die beim PUT eines Rulesets mitgeschickt werden dürfen
+WRITABLE_RULE_FIELDS = (
+    "id", "ref", "expression", "action", "action_parameters",
+    "description", "enabled", "logging", "ratelimit", "exposed_credential_check"
+)
+
+# Lokaler Cache für GET-Antworten (nicht in Git)
+CACHE_DIR = ".cloudflare-cache"
+CACHE_TTL = 300
+
+# Pro Zone gemerkte Endpoints und Ruleset IDs (neben der Config, nicht in Git)
+ZONE_METADATA_FILE = str(Path(CONFIG_FILE).with_name(".cloudflare-zones.json"))
+# Rule-Hashes und Probleme des letzten Audits für inkrementelle Läufe
+AUDIT_INDEX_FILE = str(Path(CONFIG_FILE).with_name(".cloudflare-audit-index.json"))
+# Domain -> Zone ID ändert sich praktisch nie, wird aber täglich neu aufgelöst
+ZONE_ID_TTL = 24 * 3600
+
+# Cloudflare erlaubt 1200 Requests pro 5 Minuten pro User/Token
+RATE_LIMIT_REQUESTS = 1200
+RATE_LIMIT_PERIOD = 300
+# Wiederholungen nach HTTP 429, Backoff höchstens 60 Sekunden
+MAX_THROTTLE_RETRIES = 5
+MAX_BACKOFF = 60
+
+# Ausgabeformate der Audit-Scripts (text: bisherige Ausgabe für Menschen)
+OUTPUT_FORMATS = ("text", "json", "ndjson")
+
+def load_config() -> Dict:
+    """Lädt Cloudflare API Konfiguration"""
+    config = {}
+
+    # 1. Versuche Config-Datei zu laden
+    config_file = Path(CONFIG_FILE)
+    if not config_file.exists():
+        config_file = Path(CONFIG_FILE_ALT)
+
+    if config_file.exists():
+        try:
+            with open(config_file, 'r', encoding='utf-8') as f:
+                file_config = json.load(f)
+                config.update(file_config)
+        except Exception as e:
+            print(f"⚠️ Fehler beim Laden der Config-Datei: {e}")
+
+    # 2. Überschreibe mit Umgebungsvariablen (haben Priorität)
+    if os.getenv("CLOUDFLARE_API_TOKEN"):
+        config["api_token"] = os.getenv("CLOUDFLARE_API_TOKEN")
+    if os.getenv("CLOUDFLARE_ZONE_ID"):
+        config["zone_id"] = os.getenv("CLOUDFLARE_ZONE_ID")
+    if os.getenv("CLOUDFLARE_ACCOUNT_ID"):
+        config["account_id"] = os.getenv("CLOUDFLARE_ACCOUNT_ID")
+    if os.getenv("CLOUDFLARE_DOMAIN"):
+        config["domain"] = os.getenv("CLOUDFLARE_DOMAIN")
+
+    return config
+
+class CloudflareAPIError(Exception):
+    """API hat nicht mit 200 geantwortet"""
+
+    def __init__(self, response: requests.Response):
+        self.status_code = response.status_code
+        self.response = response
+        super().__init__(f"HTTP {response.status_code} für {response.url}")
+
+class RecordWriter:
+    """Strukturierte Ausgabe: jeder Datensatz wird sofort geschrieben, nichts wird gesammelt
+
+    ndjson: eine JSON-Zeile pro Datensatz. json: ein JSON-Array, das Element für Element
+    gestreamt wird. Als Context Manager leitet der Writer in diesen Formaten alle übrigen
+    print()-Ausgaben nach stderr um, sodass stdout nur die Datensätze enthält.
+    """
+
+    def __init__(self, output_format: str = "text", stream=None):
+        self.format = output_format
+        self.stream = stream or sys.stdout
+        self.count = 0
+        self.lock = threading.Lock()
+        self._redirect = None
+
+    @property
+    def structured(self) -> bool:
+        return self.format != "text"
+
+    def emit(self, record_type: str, **fields):
+        if not self.structured:
+            return
+        line = json.dumps(dict(type=record_type, **fields), ensure_ascii=False, default=str)
+        with self.lock:
+            if self.format == "json":
+                self.stream.write(("[\n" if self.count == 0 else ",\n") + line)
+            else:
+                self.stream.write(line + "\n")
+            self.stream.flush()
+            self.count += 1
+
+    def close(self):
+        if self.format == "json":
+            self.stream.write("[]\n" if self.count == 0 else "\n]\n")
+            self.stream.flush()
+
+    def __enter__(self) -> "RecordWriter":
+        if self.structured:
+            self._redirect = contextlib.redirect_stdout(sys.stderr)
+            self._redirect.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._redirect is not None:
+            self._redirect.__exit__(*exc_info)
+            self._redirect = None
+        self.close()
+        return False
+
+class RequestScheduler:
+    """Zentrale Drosselung aller API-Requests: Token Bucket plus Backoff bei HTTP 429"""
+
+    def __init__(self, capacity: int = RATE_LIMIT_REQUESTS, period: float = RATE_LIMIT_PERIOD,
+                 max_retries: int = MAX_THROTTLE_RETRIES, max_backoff: float = MAX_BACKOFF):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        # Nach einem 429 pausieren alle Threads gemeinsam bis zu diesem Zeitpunkt
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+        self.metrics = {
+            "requests": 0,
+            "throttled": 0,
+            "bucket_wait": 0.0,
+            "backoff_wait": 0.0,
+        }
+
+    def acquire(self):
+        """Blockiert, bis ein Request gesendet werden darf"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                    self.metrics["backoff_wait"] += wait
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        self.metrics["requests"] += 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+                    self.metrics["bucket_wait"] += wait
+            time.sleep(wait)
+
+    def retry_delay(self, response: requests.Response, attempt: int) -> float:
+        """Retry-After (Sekunden oder HTTP-Datum) mit Jitter, sonst exponentieller Backoff"""
+        retry_after = response.headers.get("Retry-After")
+        delay = None
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                except (TypeError, ValueError):
+                    delay = None
+
+        if delay is None:
+            return random.uniform(0, min(self.max_backoff, 2 ** attempt))
+        return min(self.max_backoff, max(0.0, delay)) + random.uniform(0, 1)
+
+    def throttle(self, response: requests.Response, attempt: int):
+        """Pausiert alle Requests nach einem 429"""
+        delay = self.retry_delay(response, attempt)
+        with self.lock:
+            self.metrics["throttled"] += 1
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+            # Bucket leeren, damit nach der Pause nicht sofort ein Burst folgt
+            self.tokens = 0.0
+
+    def send(self, send_request) -> requests.Response:
+        """Führt send_request() gedrosselt aus und wiederholt bei 429"""
+        for attempt in range(self.max_retries + 1):
+            self.acquire()
+            response = send_request()
+            if response.status_code != 429 or attempt == self.max_retries:
+                return response
+            self.throttle(response, attempt)
+        return response
+
+    @property
+    def throttled_time(self) -> float:
+        return self.metrics["bucket_wait"] + self.metrics["backoff_wait"]
+
+    def summary(self) -> str:
+        return (f"{self.metrics['requests']} API-Requests, "
+                f"{self.metrics['throttled']}× HTTP 429, "
+                f"{self.throttled_time:.1f}s gedrosselt")
+
+class ResponseCache:
+    """Datei-Cache für GET-Antworten, pro Zone und Endpoint, mit TTL und ETag-Revalidierung"""
+
+    def __init__(self, directory: str = CACHE_DIR, ttl: float = CACHE_TTL):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.enabled = True
+        # refresh: Einträge aus früheren Läufen ignorieren, im aktuellen Lauf aber wiederverwenden
+        self.refresh = False
+        self.started = time.time()
+        self.memory: Dict[Path, Dict] = {}
+        self.lock = threading.Lock()
+
+    def path_for(self, path: str, params: Optional[Dict] = None) -> Path:
+        """zones/<id>/rate_limits -> <cache>/zones/<id>/rate_limits.json"""
+        name = path.strip("/")
+        if params:
+            query = json.dumps(params, sort_keys=True, default=str)
+            name += "@" + hashlib.sha1(query.encode("utf-8")).hexdigest()[:12]
+        return self.directory.joinpath(*name.split("/")).with_suffix(".json")
+
+    def is_fresh(self, entry: Dict) -> bool:
+        if self.refresh:
+            return entry["fetched_at"] >= self.started
+        return time.time() - entry["fetched_at"] < self.ttl
+
+    def load(self, file: Path) -> Optional[Dict]:
+        with self.lock:
+            entry = self.memory.get(file)
+        if entry is not None:
+            return entry
+
+        try:
+            with open(file, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        with self.lock:
+            self.memory[file] = entry
+        return entry
+
+    def store(self, file: Path, entry: Dict):
+        with self.lock:
+            self.memory[file] = entry
+
+        try:
+            file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = file.with_name(f"{file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp, file)
+        except OSError as e:
+            print(f"⚠️ Cache konnte nicht geschrieben werden: {e}")
+
+    def invalidate(self, prefix: str = ""):
+        """Verwirft alle Einträge unterhalb eines Pfads (z.B. nach Schreibzugriffen)"""
+        base = self.directory.joinpath(*prefix.strip("/").split("/")) if prefix else self.directory
+        files = {base.with_suffix(".json")} if prefix else set()
+        if base.is_dir():
+            files.update(base.rglob("*.json"))
+
+        with self.lock:
+            for file in list(self.memory):
+                if file in files or base in file.parents:
+                    del self.memory[file]
+
+        for file in files:
+            try:
+                file.unlink()
+            except OSError:
+                pass
+
+class ZoneMetadata:
+    """Persistente Zonen-Infos: welcher Rulesets-Endpoint funktioniert und welche Ruleset IDs es gibt"""
+
+    def __init__(self, path: Optional[str] = ZONE_METADATA_FILE):
+        # path=None: nur im Speicher (z.B. beim Abspielen eines Snapshots)
+        self.path = Path(path) if path else None
+        self.data: Optional[Dict] = None
+        self.lock = threading.Lock()
+
+    def _load(self) -> Dict:
+        if self.data is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.data = json.load(f)
+            except (OSError, TypeError, ValueError):
+                self.data = {}
+            self.data.setdefault("zones", {})
+            self.data.setdefault("domains", {})
+        return self.data
+
+    def get(self, zone_id: str) -> Dict:
+        with self.lock:
+            return dict(self._load()["zones"].get(zone_id, {}))
+
+    def update(self, zone_id: str, **values):
+        """Übernimmt Werte für eine Zone; geschrieben wird nur bei Änderungen"""
+        with self.lock:
+            zones = self._load()["zones"]
+            current = zones.get(zone_id, {})
+            merged = dict(current, **values)
+            if merged == current:
+                return
+            zones[zone_id] = merged
+            self._save()
+
+    def _save(self):
+        if self.path is None:
+            return
+        try:
+            tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, indent=2, ensure_ascii=False, sort_keys=True)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"⚠️ Zonen-Metadaten konnten nicht geschrieben werden: {e}")
+
+    def zone_id_for(self, domain: str, ttl: float = ZONE_ID_TTL) -> Optional[str]:
+        """Gecachte Zone ID einer Domain, solange sie jünger als ttl ist"""
+        with self.lock:
+            entry = self._load()["domains"].get(domain.lower())
+        if entry and time.time() - entry.get("resolved_at", 0) < ttl:
+            return entry["zone_id"]
+        return None
+
+    def remember_zones(self, zones: List[Dict]):
+        """Übernimmt Domain -> Zone ID aus einem /zones-Listing (ein Schreibvorgang)"""
+        if not zones:
+            return
+        now = time.time()
+        with self.lock:
+            data = self._load()
+            for zone in zones:
+                data["domains"][zone["name"].lower()] = {"zone_id": zone["id"], "resolved_at": now}
+                data["zones"].setdefault(zone["id"], {})["name"] = zone["name"]
+            self._save()
+
+    def zone_name(self, zone_id: str) -> Optional[str]:
+        return self.get(zone_id).get("name")
+
+    def ruleset_endpoints(self, zone_id: str) -> List[str]:
+        """Zuletzt erfolgreicher Endpoint zuerst, danach die übrigen als Fallback"""
+        remembered = self.get(zone_id).get("ruleset_endpoint")
+        endpoints = list(RULESET_ENDPOINTS)
+        if remembered:
+            if remembered in endpoints:
+                endpoints.remove(remembered)
+            endpoints.insert(0, remembered)
+        return endpoints
+
+    def remember_rulesets(self, zone_id: str, endpoint: str, result):
+        """Merkt sich den funktionierenden Endpoint und die IDs der gefundenen Rulesets"""
+        rulesets = result if isinstance(result, list) else [result] if isinstance(result, dict) else []
+        ids = {
+            ruleset.get("phase") or ruleset.get("name") or ruleset["id"]: ruleset["id"]
+            for ruleset in rulesets if ruleset.get("id")
+        }
+        values = {"ruleset_endpoint": endpoint}
+        if ids:
+            values["rulesets"] = dict(self.get(zone_id).get("rulesets", {}), **ids)
+        self.update(zone_id, **values)
+
+class AuditIndex:
+    """Hash-Index der Rules pro Zone und Kategorie aus dem letzten Audit"""
+
+    def __init__(self, path: str = AUDIT_INDEX_FILE):
+        self.path = Path(path)
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.data: Dict[str, Dict] = json.load(f)
+        except (OSError, ValueError):
+            self.data = {}
+        self.lock = threading.Lock()
+
+    def zone(self, zone_id: str) -> Dict[str, Dict]:
+        with self.lock:
+            return self.data.get(zone_id, {})
+
+    def update(self, zone_id: str, category: str, index: Dict[str, Dict]):
+        with self.lock:
+            self.data.setdefault(zone_id, {})[category] = index
+
+    def save(self):
+        try:
+            tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"⚠️ Audit-Index konnte nicht geschrieben werden: {e}")
+
+def _cached_response(url: str, entry: Dict) -> requests.Response:
+    """Baut eine Response aus einem Cache-Eintrag, damit Aufrufer nichts ändern müssen"""
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response.encoding = "utf-8"
+    response._content = entry["body"].encode("utf-8")
+    response.headers["Content-Type"] = "application/json"
+    response.from_cache = True
+    return response
+
+def _json_response(url: str, status_code: int, payload: Dict) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response.url = url
+    response.encoding = "utf-8"
+    response._content = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    response.headers["Content-Type"] = "application/json"
+    return response
+
+class Snapshot:
+    """Offline-Abbild der Rules mehrerer Zonen; beantwortet GETs wie die API, ohne Netzwerk"""
+
+    FORMAT = 1
+
+    def __init__(self, zones: Optional[List[Dict]] = None, created_at: Optional[str] = None):
+        self.zones: List[Dict] = zones or []
+        self.created_at = created_at or datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.by_id = {zone["id"]: zone for zone in self.zones}
+
+    @classmethod
+    def capture(cls, client: "CloudflareClient", zones: List[Dict]) -> "Snapshot":
+        """Lädt Custom Rules, Rate Limits und Firewall Rules der Zonen (ungecacht)"""
+        captured = []
+        for zone in zones:
+            response = client.custom_ruleset(zone["id"], cached=False)
+            captured.append({
+                "id": zone["id"],
+                "name": zone["name"],
+                "ruleset_endpoint": client.zones.get(zone["id"]).get("ruleset_endpoint"),
+                "ruleset": response.json().get("result") if response is not None else None,
+                "rate_limits": list(client.paginate(f"zones/{zone['id']}/rate_limits",
+                                                    per_page=1000, cached=False)),
+                "firewall_rules": list(client.paginate(f"zones/{zone['id']}/firewall/rules",
+                                                       per_page=100, cached=False)),
+            })
+        return cls(captured)
+
+    @classmethod
+    def load(cls, path: str) -> "Snapshot":
+        opener = gzip.open if str(path).endswith(".gz") else open
+        with opener(path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("format") != cls.FORMAT:
+            raise ValueError(f"Unbekanntes Snapshot-Format: {data.get('format')}")
+        return cls(data["zones"], data.get("created_at"))
+
+    def save(self, path: str):
+        """Kompaktes JSON, mit Endung .gz zusätzlich gzip-komprimiert"""
+        opener = gzip.open if str(path).endswith(".gz") else open
+        with opener(path, 'wt', encoding='utf-8') as f:
+            json.dump({"format": self.FORMAT, "created_at": self.created_at, "zones": self.zones},
+                      f, ensure_ascii=False, separators=(",", ":"))
+
+    def respond(self, method: str, url: str, params: Optional[Dict] = None) -> requests.Response:
+        """Antwortet wie die API auf einen GET; alles nicht Enthaltene ist 404"""
+        if method != "GET":
+            return _json_response(url, 405, {"success": False, "errors": [
+                {"message": "Snapshot ist schreibgeschützt"}]})
+
+        path = url[len(API_BASE):] if url.startswith(API_BASE) else url
+        parts = path.strip("/").split("/", 2)
+        params = params or {}
+
+        if parts == ["zones"]:
+            zones = [{"id": zone["id"], "name": zone["name"]} for zone in self.zones]
+            if params.get("name"):
+                zones = [zone for zone in zones if zone["name"] == params["name"]]
+            return self._listing(url, zones)
+
+        zone = self.by_id.get(parts[1]) if len(parts) == 3 and parts[0] == "zones" else None
+        if zone is not None:
+            endpoint = parts[2]
+            if endpoint == "rate_limits":
+                return self._listing(url, zone["rate_limits"])
+            if endpoint == "firewall/rules":
+                return self._listing(url, zone["firewall_rules"])
+            if zone["ruleset"] is not None and endpoint == (zone["ruleset_endpoint"] or CUSTOM_RULES_ENTRYPOINT):
+                return _json_response(url, 200, {"success": True, "result": zone["ruleset"]})
+
+        return _json_response(url, 404, {"success": False, "errors": [{"message": "Nicht im Snapshot"}]})
+
+    def _listing(self, url: str, items: List[Dict]) -> requests.Response:
+        # Alles auf einer Seite, damit paginate() nach einem Aufruf fertig ist
+        return _json_response(url, 200, {"success": True, "result": items, "result_info": {
+            "page": 1, "per_page": len(items), "count": len(items),
+            "total_count": len(items), "total_pages": 1
+        }})
+
+    def zone_id(self, zone_id: str = "", domain: str = "") -> Optional[str]:
+        """Konfigurierte Zone, sonst die Domain, sonst die einzige Zone im Snapshot"""
+        if zone_id in self.by_id:
+            return zone_id
+        for zone in self.zones:
+            if zone["name"].lower() == domain.lower():
+                return zone["id"]
+        return self.zones[0]["id"] if len(self.zones) == 1 else None
+
+class CloudflareClient:
+    """Dünner Wrapper um eine gepoolte requests.Session mit Keep-Alive"""
+
+    def __init__(self, api_token: str, timeout=DEFAULT_TIMEOUT,
+                 pool_size: int = DEFAULT_POOL_SIZE, retries: int = DEFAULT_RETRIES):
+        self.api_token = api_token
+        self.timeout = timeout
+        self.scheduler = RequestScheduler()
+        self.cache = ResponseCache()
+        self.zones = ZoneMetadata()
+        self.snapshot: Optional[Snapshot] = None
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_token}",
+            "Content-Type": "application/json"
+        })
+
+        # Wiederholt nur idempotente Requests bei Verbindungs- und 5xx-Fehlern. HTTP 429
+        # (auch mit Retry-After) muss beim RequestScheduler ankommen, der den Backoff
+        # für alle Threads gemeinsam steuert und begrenzt
+        retry = Retry(
+            total=retries,
+            backoff_factor=0.5,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            respect_retry_after_header=False,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+
+    @property
+    def headers(self) -> Dict:
+        """API Headers (für Code, der die Session nicht direkt nutzt)"""
+        return dict(self.session.headers)
+
+    def url(self, path: str) -> str:
+        """Baut eine vollständige API-URL aus einem Pfad"""
+        if path.startswith("http"):
+            return path
+        return f"{API_BASE}/{path.lstrip('/')}"
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """Führt einen Request über die gemeinsame Session aus"""
+        kwargs.setdefault("timeout", self.timeout)
+        url = self.url(path)
+        if self.snapshot is not None:
+            return self.snapshot.respond(method, url, kwargs.get("params"))
+        return self.scheduler.send(lambda: self.session.request(method, url, **kwargs))
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def cached_get(self, path: str, params: Optional[Dict] = None) -> requests.Response:
+        """GET mit lokalem Cache: frische Einträge ohne Request, sonst bedingte Revalidierung"""
+        cache = self.cache
+        if not cache.enabled:
+            return self.get(path, params=params)
+
+        file = cache.path_for(path, params)
+        entry = cache.load(file)
+        if entry is not None and cache.is_fresh(entry):
+            return _cached_response(self.url(path), entry)
+
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = self.get(path, params=params, headers=headers)
+
+        if response.status_code == 304 and entry is not None:
+            entry = dict(entry, fetched_at=time.time())
+            cache.store(file, entry)
+            return _cached_response(self.url(path), entry)
+
+        if response.status_code == 200:
+            cache.store(file, {
+                "url": response.url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "fetched_at": time.time(),
+                "body": response.text
+            })
+
+        return response
+
+    def custom_ruleset(self, zone_id: str, cached: bool = True) -> Optional[requests.Response]:
+        """Lädt die Custom Rules einer Zone über den zuletzt funktionierenden Endpoint
+
+        Liefert None, wenn kein Endpoint existiert (404), und wirft CloudflareAPIError
+        bei allen anderen Fehlern, damit "nicht geprüft" nie als "keine Rules" erscheint.
+        """
+        fetch = self.cached_get if cached else self.get
+        for endpoint in self.zones.ruleset_endpoints(zone_id):
+            response = fetch(f"zones/{zone_id}/{endpoint}")
+            if response.status_code == 404:
+                continue
+            if response.status_code != 200:
+                raise CloudflareAPIError(response)
+
+            result = response.json().get("result")
+            self.zones.remember_rulesets(zone_id, endpoint, result)
+
+            # Ohne Entrypoint liefert /rulesets nur die Liste; gibt es darin ein
+            # Custom-Rules-Ruleset, wird künftig direkt dieses geladen
+            custom_id = self.zones.get(zone_id).get("rulesets", {}).get(CUSTOM_RULES_PHASE)
+            if endpoint == "rulesets" and custom_id:
+                direct = f"rulesets/{custom_id}"
+                response = fetch(f"zones/{zone_id}/{direct}")
+                if response.status_code != 200:
+                    raise CloudflareAPIError(response)
+                self.zones.update(zone_id, ruleset_endpoint=direct)
+            return response
+
+        return None
+
+    def zone_ids(self, domains: List[str]) -> Dict[str, Optional[str]]:
+        """Domain -> Zone ID; fehlende Domains werden gemeinsam über ein /zones-Listing aufgelöst
+
+        Eine einzelne Domain wird per ?name= gesucht, mehrere mit einem paginierten
+        Listing aller Zonen, das endet, sobald alle gefunden sind. Unbekannte
+        Domains ergeben None; API-Fehler werden als CloudflareAPIError weitergegeben.
+        """
+        result = {domain.lower(): self.zones.zone_id_for(domain) for domain in domains}
+        missing = [domain for domain, zone_id in result.items() if not zone_id]
+        if not missing:
+            return result
+
+        if len(missing) == 1:
+            listing = self.paginate("zones", {"name": missing[0]}, cached=False)
+        else:
+            listing = self.paginate("zones", per_page=50, cached=False)
+
+        found = []
+        for zone in listing:
+            found.append(zone)
+            result.setdefault(zone["name"].lower(), None)
+            if zone["name"].lower() in missing:
+                result[zone["name"].lower()] = zone["id"]
+            if all(result[domain] for domain in missing):
+                break
+
+        self.zones.remember_zones(found)
+        return {domain.lower(): result[domain.lower()] for domain in domains}
+
+    def zone_id(self, domain: str) -> Optional[str]:
+        """Zone ID einer Domain (aus dem gemeinsamen Cache, sonst ein API-Request)"""
+        return self.zone_ids([domain])[domain.lower()]
+
+    def use_snapshot(self, path: str) -> Snapshot:
+        """Beantwortet ab jetzt alle Requests aus einem Snapshot (kein Netzwerk, kein Cache)"""
+        self.snapshot = Snapshot.load(path)
+        self.cache.enabled = False
+        self.zones = ZoneMetadata(None)
+        self.zones.remember_zones(self.snapshot.zones)
+        for zone in self.snapshot.zones:
+            if zone.get("ruleset_endpoint"):
+                self.zones.update(zone["id"], ruleset_endpoint=zone["ruleset_endpoint"])
+        return self.snapshot
+
+    def paginate(self, path: str, params: Optional[Dict] = None, per_page: int = 50,
+                 cached: bool = True) -> Iterator[Dict]:
+        """Folgt der result_info-Pagination und liefert Einträge, sobald ihre Seite geladen ist"""
+        params = dict(params or {}, per_page=per_page)
+        fetch = self.cached_get if cached else self.get
+        page = 1
+
+        while True:
+            params["page"] = page
+            response = fetch(path, params=dict(params))
+            if response.status_code != 200:
+                raise CloudflareAPIError(response)
+
+            data = response.json()
+            result = data.get("result") or []
+            yield from result
+
+            info = data.get("result_info") or {}
+            total_pages = info.get("total_pages")
+            if not result or (total_pages is not None and page >= total_pages):
+                return
+            if total_pages is None and len(result) < per_page:
+                return
+            page += 1
+
+    def put(self, path: str, **kwargs) -> requests.Response:
+        return self.request("PUT", path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+# Ein Client pro API Token, damit alle Aufrufe eines Prozesses die Verbindungen teilen
+_clients: Dict[str, CloudflareClient] = {}
+
+def get_client(api_token: Optional[str] = None) -> CloudflareClient:
+    """Liefert den gemeinsamen Client für einen API Token"""
+    if api_token is None:
+        api_token = load_config().get("api_token", "")
+
+    client = _clients.get(api_token)
+    if client is None:
+        client = CloudflareClient(api_token)
+        _clients[api_token] = client
+    return client
+
+class RulesetConflictError(Exception):
+    """Ruleset wurde seit dem Laden von jemand anderem geändert"""
+
+class RulesetUpdate:
+    """Gesammelte Änderungen am Custom-Rules-Ruleset einer Zone
+
+    endpoint ist der Pfad, über den das Ruleset geladen wurde (Entrypoint oder
+    rulesets/<id>); Versionsprüfung und PUT gehen an denselben Pfad.
+    """
+
+    def __init__(self, zone_id: str, ruleset: Dict, endpoint: str = CUSTOM_RULES_ENTRYPOINT):
+        self.zone_id = zone_id
+        self.ruleset = ruleset
+        self.endpoint = endpoint
+        self.version = ruleset.get("version")
+        self.original_rules: List[Dict] = ruleset.get("rules", [])
+        self.rules: List[Dict] = [dict(rule) for rule in self.original_rules]
+
+    def replace_rule(self, rule_id: str, **changes) -> bool:
+        """Ändert Felder einer Rule im lokalen Stand"""
+        for rule in self.rules:
+            if rule.get("id") == rule_id:
+                rule.update({key: value for key, value in changes.items() if value is not None})
+                return True
+        return False
+
+    def changes(self) -> List[tuple]:
+        """(alt, neu) für alle geänderten Rules"""
+        return [(old, new) for old, new in zip(self.original_rules, self.rules) if old != new]
+
+    def diff(self) -> str:
+        """Unified Diff aller Änderungen (für Dry-Run)"""
+        lines = []
+        for old, new in self.changes():
+            name = old.get("description") or old.get("id", "")
+            lines.extend(difflib.unified_diff(
+                json.dumps(old, indent=2, ensure_ascii=False, sort_keys=True).splitlines(),
+                json.dumps(new, indent=2, ensure_ascii=False, sort_keys=True).splitlines(),
+                fromfile=f"{self.zone_id}/{name} (v{self.version})",
+                tofile=f"{self.zone_id}/{name} (neu)",
+                lineterm=""
+            ))
+        return "\n".join(lines)
+
+    def payload(self, rules: Optional[List[Dict]] = None) -> Dict:
+        rules = self.rules if rules is None else rules
+        return {"rules": [
+            {key: rule[key] for key in WRITABLE_RULE_FIELDS if key in rule}
+            for rule in rules
+        ]}
+
+class RulesetTransaction:
+    """Schreibt alle Änderungen mit einem PUT pro Zone; bei Fehlern werden bereits geschriebene Zonen zurückgesetzt"""
+
+    def __init__(self, client: CloudflareClient):
+        self.client = client
+        self.updates: Dict[str, RulesetUpdate] = {}
+
+    def _fetch(self, zone_id: str, endpoint: str) -> Optional[Dict]:
+        response = self.client.get(f"zones/{zone_id}/{endpoint}")
+        if response.status_code != 200:
+            return None
+        return response.json().get("result")
+
+    def _endpoint(self, zone_id: str) -> str:
+        """Von custom_ruleset gemerkter Endpoint; das /rulesets-Listing selbst ist nicht schreibbar"""
+        metadata = self.client.zones.get(zone_id)
+        endpoint = metadata.get("ruleset_endpoint")
+        if endpoint == "rulesets":
+            custom_id = metadata.get("rulesets", {}).get(CUSTOM_RULES_PHASE)
+            endpoint = f"rulesets/{custom_id}" if custom_id else None
+        return endpoint or CUSTOM_RULES_ENTRYPOINT
+
+    def add(self, zone_id: str, ruleset: Dict, endpoint: Optional[str] = None) -> RulesetUpdate:
+        """Übernimmt ein bereits geladenes Ruleset (spart den erneuten GET)"""
+        if zone_id not in self.updates:
+            self.updates[zone_id] = RulesetUpdate(zone_id, ruleset, endpoint or self._endpoint(zone_id))
+        return self.updates[zone_id]
+
+    def zone(self, zone_id: str) -> Optional[RulesetUpdate]:
+        """Lädt (einmal) das aktuelle Custom-Rules-Ruleset einer Zone, ungecacht"""
+        if zone_id not in self.updates:
+            try:
+                response = self.client.custom_ruleset(zone_id, cached=False)
+            except CloudflareAPIError:
+                return None
+            ruleset = response.json().get("result") if response is not None else None
+            if not isinstance(ruleset, dict):
+                return None
+            self.updates[zone_id] = RulesetUpdate(zone_id, ruleset, self._endpoint(zone_id))
+        return self.updates[zone_id]
+
+    def pending(self) -> List[RulesetUpdate]:
+        return [update for update in self.updates.values() if update.changes()]
+
+    def diff(self) -> str:
+        return "\n".join(update.diff() for update in self.pending())
+
+    def to_plan(self) -> Dict:
+        """Serialisierbarer Plan aller offenen Änderungen (inkl. Ausgangsstand pro Zone)"""
+        zones = {}
+        for update in self.pending():
+            changes = []
+            for old, new in update.changes():
+                changed = [key for key in set(old) | set(new) if old.get(key) != new.get(key)]
+                changes.append({
+                    "id": old.get("id"),
+                    "description": old.get("description", ""),
+                    "before": {key: old.get(key) for key in changed},
+                    "after": {key: new.get(key) for key in changed}
+                })
+            zones[update.zone_id] = {
+                "endpoint": update.endpoint,
+                "version": update.version,
+                "ruleset": update.ruleset,
+                "changes": changes
+            }
+        return {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "zones": zones}
+
+    @classmethod
+    def from_plan(cls, client: CloudflareClient, plan: Dict) -> "RulesetTransaction":
+        """Baut eine Transaktion aus einem gespeicherten Plan, ohne die Rulesets neu zu laden"""
+        transaction = cls(client)
+        for zone_id, entry in plan.get("zones", {}).items():
+            update = transaction.add(zone_id, entry["ruleset"], entry.get("endpoint"))
+            for change in entry.get("changes", []):
+                update.replace_rule(change["id"], **change["after"])
+        return transaction
+
+    def _put(self, update: RulesetUpdate, rules: List[Dict]) -> Dict:
+        response = self.client.put(
+            f"zones/{update.zone_id}/{update.endpoint}",
+            json=update.payload(rules)
+        )
+        data = response.json() if response.content else {}
+        if response.status_code != 200 or not data.get("success", False):
+            raise RuntimeError(f"PUT fehlgeschlagen ({response.status_code}): {data.get('errors', response.text)}")
+        return data.get("result", {})
+
+    def apply(self, dry_run: bool = False) -> bool:
+        """Wendet alle Änderungen an; True wenn alles geschrieben (oder Dry-Run)"""
+        pending = self.pending()
+        if dry_run or not pending:
+            return True
+
+        applied: List[RulesetUpdate] = []
+        try:
+            for update in pending:
+                # Optimistische Sperre: Version muss noch der geladenen entsprechen
+                current = self._fetch(update.zone_id, update.endpoint)
+                if current is None or current.get("version") != update.version:
+                    raise RulesetConflictError(
+                        f"Zone {update.zone_id}: Ruleset wurde geändert "
+                        f"(v{update.version} -> v{current.get('version') if current else '?'})"
+                    )
+                self._put(update, update.rules)
+                applied.append(update)
+                self.client.cache.invalidate(f"zones/{update.zone_id}")
+        except (RulesetConflictError, RuntimeError, requests.RequestException) as e:
+            print(f"❌ {e}")
+            self.rollback(applied)
+            return False
+
+        return True
+
+    def rollback(self, applied: List[RulesetUpdate]):
+        """Setzt bereits geschriebene Zonen auf den ursprünglichen Stand zurück"""
+        for update in reversed(applied):
+            try:
+                self._put(update, update.original_rules)
+                print(f"↩️ Zone {update.zone_id} zurückgesetzt")
+            except (RuntimeError, requests.RequestException) as e:
+                print(f"❌ Rollback für Zone {update.zone_id} fehlgeschlagen: {e}")
+            self.client.cache.invalidate(f"zones/{update.zone_id}")
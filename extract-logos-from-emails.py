@@ -3,27 +3,36 @@
 """
 Extract logo images from .eml email files
 """
-import os
-import email
-import base64
+import argparse
+import json
 import sys
 from pathlib import Path
 
+from attachment_store import AttachmentStore
+from mail_index import MAIL_DIR, MailIndex
+
 # Fix encoding for Windows console
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
 
-# Paths - using absolute path
-base_dir = Path(__file__).parent.parent.parent.parent
-email_dir = base_dir / "Kostmails"
+parser = argparse.ArgumentParser(description="Extract logo images from .eml email files")
+parser.add_argument("--workers", type=int, default=1,
+                    help="Parse and decode in N processes (default: 1)")
+args = parser.parse_args()
+
+# Paths - relative to the repository root
+email_dir = Path(MAIL_DIR)
 logos_dir = Path("images/logos")
 logos_dir.mkdir(parents=True, exist_ok=True)
 
 print(f"Looking for emails in: {email_dir}")
 print(f"Email dir exists: {email_dir.exists()}")
-if email_dir.exists():
-    eml_files = list(email_dir.glob("*.eml"))
-    print(f"Found {len(eml_files)} .eml files")
+
+index = MailIndex(mail_dir=MAIL_DIR)
+stats = index.update(workers=args.workers)
+errors = stats["errors"]
+print(f"Found {len(index.messages())} .eml files "
+      f"({stats['indexed']} indexed, {stats['unchanged']} unchanged, {stats['failed']} failed)")
 
 # Mapping of email attachments to logo filenames
 logo_mapping = {
@@ -34,61 +43,64 @@ logo_mapping = {
 
 print("\nExtracting logos from email attachments...")
 
-for eml_file in email_dir.glob("*.eml"):
-    print(f"\nProcessing: {eml_file.name}")
+jobs = []
+for message in index.messages():
+    print(f"\nProcessing: {Path(message['path']).name}")
     
-    try:
-        with open(eml_file, 'rb') as f:
-            msg = email.message_from_bytes(f.read())
-        
-        # Check all parts
-        for part in msg.walk():
-            if part.get_content_disposition() == 'attachment':
-                filename = part.get_filename()
-                if filename:
-                    print(f"  Found attachment: {filename}")
-                    
-                    # Decode filename if needed
-                    if filename.startswith('=?'):
-                        import email.header
-                        try:
-                            decoded_header = email.header.decode_header(filename)
-                            if decoded_header and decoded_header[0][0]:
-                                filename = decoded_header[0][0]
-                                if isinstance(filename, bytes):
-                                    filename = filename.decode('utf-8', errors='ignore')
-                        except:
-                            pass
-                    
-                    # Check if this is a logo we need
-                    target_name = None
-                    for key, value in logo_mapping.items():
-                        if key.lower() in filename.lower():
-                            target_name = value
-                            break
-                    
-                    # Also check for paratos logos
-                    if 'paratos' in filename.lower() or 'logo.png' == filename.lower():
-                        if not target_name:  # Only if not already matched
-                            target_name = "paratos.png"
-                    
-                    if target_name:
-                        # Extract the image
-                        if part.get_content_type().startswith('image/'):
-                            image_data = part.get_payload(decode=True)
-                            if image_data:
-                                target_path = logos_dir / target_name
-                                with open(target_path, 'wb') as img_file:
-                                    img_file.write(image_data)
-                                print(f"  [OK] Saved as: {target_path}")
-                            else:
-                                print(f"  [ERROR] No image data found")
-                    else:
-                        print(f"  [SKIP] Skipping (not a logo)")
-                        
-    except Exception as e:
-        print(f"  [ERROR] Error processing {eml_file.name}: {e}")
+    # Check all attachments
+    for attachment in index.attachments(message['id'], disposition='attachment'):
+        filename = attachment['filename']
+        if filename:
+            print(f"  Found attachment: {filename}")
+            
+            # Check if this is a logo we need
+            target_name = None
+            for key, value in logo_mapping.items():
+                if key.lower() in filename.lower():
+                    target_name = value
+                    break
+            
+            # Also check for paratos logos
+            if 'paratos' in filename.lower() or 'logo.png' == filename.lower():
+                if not target_name:  # Only if not already matched
+                    target_name = "paratos.png"
+            
+            if target_name and attachment['content_type'].startswith('image/'):
+                jobs.append((attachment, logos_dir / target_name))
+            elif not target_name:
+                print(f"  [SKIP] Skipping (not a logo)")
+
+# Later mails win, as before; each logo is published once per run
+targets = {}
+for attachment, target_path in jobs:
+    targets[target_path] = attachment
+
+# Stream new attachments into the content-addressed store (in the process pool);
+# logos are only rewritten when their bytes actually change
+print()
+store = AttachmentStore()
+for (target_path, attachment), result in zip(targets.items(), store.extract(targets.values(), args.workers)):
+    if result["type"] == "error":
+        errors.append(result)
+        continue
+    if not attachment['size']:
+        print(f"  [ERROR] No image data found in {attachment['filename']}")
+        continue
+    source = {"mail": Path(attachment['path']).name, "filename": attachment['filename']}
+    if store.publish(target_path, attachment['sha256'], source):
+        print(f"  [OK] {attachment['filename']} saved as: {target_path}")
+    else:
+        print(f"  [SKIP] {target_path} unchanged")
+store.save()
+print(f"\nStore: {store.stats['stored']} new, {store.stats['deduplicated']} already stored, "
+      f"{store.stats['published']} logos written, {store.stats['unchanged']} unchanged")
+
+index.close()
+
+if errors:
+    print(f"\n[ERROR] {len(errors)} files failed:")
+    for record in errors:
+        print(json.dumps(record, ensure_ascii=False))
 
 print("\n[OK] Logo extraction complete!")
 print(f"Check {logos_dir} for extracted logos.")
-
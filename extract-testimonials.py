@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Extract Testimonials
+Liest alle Referenz-Mails aus Kostmails/ und gibt pro Kunde Firma, Person und Zitat aus.
+Die Marker für Zitat-Anfang und -Ende lassen sich per Option ergänzen, z.B.
+    python extract-testimonials.py --quote-marker "empfehlenswert" --json
+"""
+
+import argparse
+import json
+import sys
+
+from mail_index import MAIL_DIR, MailIndex
+from testimonials import Markers, extract_all
+
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+def main():
+    defaults = Markers()
+    parser = argparse.ArgumentParser(description="Extrahiert Testimonials (Firma, Person, Zitat) aus den Kostmails")
+    parser.add_argument("--quote-marker", action="append", default=[], metavar="WORT",
+                        help=f"Zusätzliches Wort für den Zitat-Anfang (Standard: {', '.join(defaults.quote)})")
+    parser.add_argument("--stop-marker", action="append", default=[], metavar="TEXT",
+                        help="Zusätzlicher Zeilenanfang, der ein Zitat beendet")
+    parser.add_argument("--own-marker", action="append", default=[], metavar="TEXT",
+                        help="Zusätzlicher Signatur-Text eigener Nachrichten")
+    parser.add_argument("--all", action="store_true", help="Auch Absender ohne Zitat ausgeben")
+    parser.add_argument("--json", action="store_true", help="Datensätze als JSON-Zeilen ausgeben")
+    parser.add_argument("--workers", type=int, default=1, help="E-Mails in N Prozessen parsen (Standard: 1)")
+    args = parser.parse_args()
+
+    markers = defaults._replace(
+        quote=defaults.quote + tuple(args.quote_marker),
+        stop=defaults.stop + tuple(marker.lower() for marker in args.stop_marker),
+        own=defaults.own + tuple(marker.lower() for marker in args.own_marker),
+    )
+
+    with MailIndex(mail_dir=MAIL_DIR) as index:
+        errors = index.update(workers=args.workers)["errors"]
+        records = [record for record in extract_all(index, markers) if args.all or record.quote]
+
+    if args.json:
+        for record in records:
+            print(json.dumps(record._asdict(), ensure_ascii=False))
+    else:
+        for record in records:
+            print(f"\n{'='*60}")
+            print(f"🏢 {record.company or '?'}")
+            print(f"👤 {record.person or '?'} <{record.email or '?'}>")
+            print(f"📧 {record.file}")
+            print('='*60)
+            print(f'"{record.quote}"' if record.quote else "(kein Zitat gefunden)")
+        print(f"\n✓ {len(records)} Testimonials gefunden")
+
+    for record in errors:
+        print(json.dumps(record, ensure_ascii=False), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
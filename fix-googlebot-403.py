@@ -5,41 +5,18 @@ Cloudflare Googlebot 403 Fixer
 Analysiert und behebt automatisch Googlebot-Blockierungen
 """
 
-import requests
+import argparse
 import json
 import sys
 import os
 from pathlib import Path
 
-# Lade Konfiguration
-def load_config():
-    """Lädt Cloudflare API Konfiguration"""
-    config = {}
-    
-    # 1. Versuche Config-Datei zu laden
-    config_file = Path(".cloudflare-config.json")
-    if not config_file.exists():
-        config_file = Path("cloudflare-config.json")
-    
-    if config_file.exists():
-        try:
-            with open(config_file, 'r', encoding='utf-8') as f:
-                file_config = json.load(f)
-                config.update(file_config)
-        except Exception as e:
-            print(f"⚠️ Fehler beim Laden der Config-Datei: {e}")
-    
-    # 2. Überschreibe mit Umgebungsvariablen (haben Priorität)
-    if os.getenv("CLOUDFLARE_API_TOKEN"):
-        config["api_token"] = os.getenv("CLOUDFLARE_API_TOKEN")
-    if os.getenv("CLOUDFLARE_ZONE_ID"):
-        config["zone_id"] = os.getenv("CLOUDFLARE_ZONE_ID")
-    if os.getenv("CLOUDFLARE_ACCOUNT_ID"):
-        config["account_id"] = os.getenv("CLOUDFLARE_ACCOUNT_ID")
-    if os.getenv("CLOUDFLARE_DOMAIN"):
-        config["domain"] = os.getenv("CLOUDFLARE_DOMAIN")
-    
-    return config
+from cloudflare_api import (
+    OUTPUT_FORMATS, CloudflareAPIError, RecordWriter, RulesetTransaction, get_client, load_config
+)
+from rule_analyzer import (
+    PROBLEM_BOTS, PROBLEM_HOMEPAGE, rate_limit_targets_homepage, rule_problems, with_googlebot_exception
+)
 
 config = load_config()
 CLOUDFLARE_API_TOKEN = config.get("api_token", "")
@@ -47,50 +24,35 @@ CLOUDFLARE_ZONE_ID = config.get("zone_id", "")
 CLOUDFLARE_ACCOUNT_ID = config.get("account_id", "")
 DOMAIN = config.get("domain", "kost-sicherheitstechnik.de")
 
-def get_headers():
-    """Erstellt API Headers"""
-    return {
-        "Authorization": f"Bearer {CLOUDFLARE_API_TOKEN}",
-        "Content-Type": "application/json"
-    }
+def get_api():
+    """Gemeinsamer Cloudflare API Client"""
+    return get_client(CLOUDFLARE_API_TOKEN)
 
 def get_zone_id():
     """Holt Zone ID falls nicht gesetzt"""
     if CLOUDFLARE_ZONE_ID:
         return CLOUDFLARE_ZONE_ID
     
-    headers = get_headers()
-    response = requests.get(
-        f"https://api.cloudflare.com/client/v4/zones?name={DOMAIN}",
-        headers=headers
-    )
-    
-    if response.status_code == 200:
-        data = response.json()
-        if data.get("result") and len(data["result"]) > 0:
-            return data["result"][0]["id"]
-    
-    return None
+    try:
+        return get_api().zone_id(DOMAIN)
+    except CloudflareAPIError:
+        return None
 
 def get_waf_ruleset(zone_id):
     """Holt WAF Ruleset"""
-    headers = get_headers()
-    
-    # Versuche verschiedene Endpoints
-    endpoints = [
-        f"https://api.cloudflare.com/client/v4/zones/{zone_id}/rulesets/phases/http_request_firewall_custom/entrypoint",
-        f"https://api.cloudflare.com/client/v4/zones/{zone_id}/rulesets",
-    ]
+    client = get_api()
     
-    for endpoint in endpoints:
-        response = requests.get(endpoint, headers=headers)
-        if response.status_code == 200:
-            return response.json()
-    
-    return None
+    # Ungecacht, da die Version für das spätere PUT aktuell sein muss;
+    # wirft bei 429/403/5xx, damit "nicht geprüft" nie als "keine Rules" erscheint
+    response = client.custom_ruleset(zone_id, cached=False)
+    if response is None:
+        return None
+    return response.json()
 
-def analyze_and_fix_rules(zone_id):
+def analyze_and_fix_rules(zone_id, dry_run=False, assume_yes=False, only_type=None,
+                          max_fixes=None, plan_out=None, writer=None):
     """Analysiert Rules und schlägt Fixes vor"""
+    writer = writer or RecordWriter()
     print("=" * 60)
     print("Googlebot 403 Fixer")
     print("=" * 60)
@@ -98,12 +60,27 @@ def analyze_and_fix_rules(zone_id):
     
     issues_found = []
     fixes_applied = []
+    incomplete = False
+    
+    # Alle bestätigten Fixes werden gesammelt und mit einem PUT geschrieben
+    transaction = RulesetTransaction(get_api())
     
     # WAF Rules prüfen
     print("🔍 Prüfe WAF Custom Rules...")
-    waf_data = get_waf_ruleset(zone_id)
+    try:
+        waf_data = get_waf_ruleset(zone_id)
+    except CloudflareAPIError as e:
+        print(f"  ❌ WAF Rules konnten nicht geladen werden: {e}")
+        print()
+        writer.emit("error", zone_id=zone_id, category="waf_rules", message=str(e))
+        waf_data = None
+        incomplete = True
     
     if waf_data:
+        result = waf_data.get("result", {})
+        if isinstance(result, dict) and "rules" in result:
+            transaction.add(zone_id, result)
+        
         rules = waf_data.get("result", {}).get("rules", [])
         if not rules:
             # Versuche alternative Struktur
@@ -119,21 +96,18 @@ def analyze_and_fix_rules(zone_id):
             rule_id = rule.get("id", "")
             description = rule.get("description", "Unbenannte Regel")
             
-            # Prüfe ob Regel problematisch ist
-            is_problematic = False
+            # Prüfe ob Regel problematisch ist (Bot-Blockierung hat Vorrang vor Startseite)
+            problems = rule_problems(rule)
+            is_problematic = PROBLEM_HOMEPAGE in problems or PROBLEM_BOTS in problems
             problem_reason = ""
+            problem_code = ""
             
-            # Prüfe 1: Zielt auf Startseite ohne Googlebot-Ausnahme?
-            if ("/" in expression or 'eq "/"' in expression) and "/api/contact" not in expression:
-                if "googlebot" not in expression.lower():
-                    is_problematic = True
-                    problem_reason = "Zielt auf Startseite '/' ohne Googlebot-Ausnahme"
-            
-            # Prüfe 2: Blockiert Bots ohne Googlebot-Ausnahme?
-            if ("bot" in expression.lower() or "cf.client.bot" in expression) and "googlebot" not in expression.lower():
-                if action.lower() in ["block", "challenge", "js_challenge"]:
-                    is_problematic = True
-                    problem_reason = "Blockiert Bots ohne Googlebot-Ausnahme"
+            if PROBLEM_HOMEPAGE in problems:
+                problem_code = PROBLEM_HOMEPAGE
+                problem_reason = "Zielt auf Startseite '/' ohne Googlebot-Ausnahme"
+            if PROBLEM_BOTS in problems:
+                problem_code = PROBLEM_BOTS
+                problem_reason = "Blockiert Bots ohne Googlebot-Ausnahme"
             
             if is_problematic:
                 issues_found.append({
@@ -142,8 +116,12 @@ def analyze_and_fix_rules(zone_id):
                     "description": description,
                     "expression": expression,
                     "action": action,
+                    "code": problem_code,
                     "problem": problem_reason
                 })
+                writer.emit("issue", zone_id=zone_id, category="waf_rules", rule_id=rule_id,
+                            description=description, problem=problem_code, message=problem_reason,
+                            action=action, expression=expression)
                 
                 print(f"  ⚠️ PROBLEM gefunden:")
                 print(f"     Regel: {description}")
@@ -153,22 +131,12 @@ def analyze_and_fix_rules(zone_id):
     
     # Rate Limiting Rules prüfen
     print("🔍 Prüfe Rate Limiting Rules...")
-    headers = get_headers()
-    response = requests.get(
-        f"https://api.cloudflare.com/client/v4/zones/{zone_id}/rate_limits",
-        headers=headers
-    )
-    
-    if response.status_code == 200:
-        rate_limit_data = response.json()
-        rules = rate_limit_data.get("result", [])
-        
-        for rule in rules:
+    try:
+        for rule in get_api().paginate(f"zones/{zone_id}/rate_limits", per_page=1000, cached=False):
             match = rule.get("match", {})
-            match_str = json.dumps(match)
             
             # Prüfe ob auf Startseite zielt
-            if "/" in match_str and "/api/contact" not in match_str:
+            if rate_limit_targets_homepage(match):
                 issues_found.append({
                     "type": "Rate Limiting",
                     "id": rule.get("id", ""),
@@ -176,11 +144,20 @@ def analyze_and_fix_rules(zone_id):
                     "match": match,
                     "problem": "Zielt auf Startseite '/' (sollte nur /api/contact sein)"
                 })
+                writer.emit("issue", zone_id=zone_id, category="rate_limiting", rule_id=rule.get("id", ""),
+                            description=rule.get("description", ""), problem=PROBLEM_HOMEPAGE,
+                            message="Zielt auf Startseite '/' (sollte nur /api/contact sein)",
+                            url=match.get("request", {}).get("url", ""))
                 
                 print(f"  ⚠️ PROBLEM gefunden:")
                 print(f"     Regel: {rule.get('description', 'Unbenannt')}")
                 print(f"     Problem: Zielt auf Startseite '/'")
                 print()
+    except CloudflareAPIError as e:
+        print(f"  ❌ Rate Limiting Rules konnten nicht geladen werden: {e}")
+        print()
+        writer.emit("error", zone_id=zone_id, category="rate_limiting", message=str(e))
+        incomplete = True
     
     # Zusammenfassung
     print()
@@ -202,34 +179,143 @@ def analyze_and_fix_rules(zone_id):
         
         for issue in issues_found:
             if issue['type'] == "WAF Rule":
+                if only_type and issue['code'] != only_type:
+                    continue
+                if max_fixes is not None and len(fixes_applied) >= max_fixes:
+                    print(f"ℹ️ Maximale Anzahl Fixes erreicht ({max_fixes})")
+                    print()
+                    break
+                
                 print(f"Fix für: {issue['description']}")
                 print(f"  Aktuelle Expression: {issue['expression']}")
                 
                 # Vorschlag: Googlebot-Ausnahme hinzufügen
-                new_expression = f"({issue['expression']}) and not (http.user_agent contains \"Googlebot\" or http.user_agent contains \"Bingbot\")"
+                new_expression = with_googlebot_exception(issue['expression'])
                 print(f"  Vorgeschlagene Expression: {new_expression}")
                 print()
                 
                 # Frage ob fixen
-                response = input(f"  Soll ich diese Regel automatisch fixen? (j/n): ")
+                # Ohne Schreibzugriff (Plan, Dry-Run, Snapshot) nie nachfragen, sondern alle
+                # Fixes in den Diff übernehmen; ein Plan wird erst beim Anwenden geprüft
+                if assume_yes or plan_out or dry_run:
+                    response = 'j'
+                else:
+                    response = input(f"  Soll ich diese Regel automatisch fixen? (j/n): ")
                 if response.lower() == 'j':
-                    # TODO: Implementiere Fix
-                    print(f"  ✅ Regel würde jetzt gefixt werden (noch nicht implementiert)")
-                    fixes_applied.append(issue)
+                    update = transaction.zone(zone_id)
+                    if update and update.replace_rule(issue['id'], expression=new_expression):
+                        fixes_applied.append(dict(issue, new_expression=new_expression))
+                    else:
+                        print(f"  ❌ Regel nicht im Custom-Rules-Entrypoint gefunden")
                 print()
+        
+        if fixes_applied:
+            print("=" * 60)
+            print("Änderungen")
+            print("=" * 60)
+            print(transaction.diff())
+            print()
+            
+            if plan_out:
+                with open(plan_out, 'w', encoding='utf-8') as f:
+                    json.dump(transaction.to_plan(), f, indent=2, ensure_ascii=False)
+                print(f"📝 Plan mit {len(fixes_applied)} Fixes gespeichert: {plan_out}")
+                print(f"   Anwenden mit: python fix-googlebot-403.py --apply-plan {plan_out}")
+                status = "planned"
+            elif dry_run:
+                print(f"ℹ️ Dry-Run: {len(fixes_applied)} Regeln würden gefixt werden")
+                status = "dry_run"
+            elif transaction.apply():
+                print(f"  ✅ {len(fixes_applied)} Regeln mit einem Request aktualisiert")
+                status = "applied"
+            else:
+                print("  ❌ Fixes konnten nicht angewendet werden (Änderungen zurückgesetzt)")
+                status = "failed"
+            
+            for fix in fixes_applied:
+                writer.emit("fix", zone_id=zone_id, rule_id=fix["id"], description=fix["description"],
+                            problem=fix["code"], status=status, expression=fix["new_expression"])
+            if status != "applied":
+                fixes_applied = []
+    elif incomplete:
+        print("❌ Prüfung unvollständig: nicht alle Rules konnten geladen werden.")
     else:
         print("✅ Keine Probleme gefunden! Alle Rules sind korrekt konfiguriert.")
     
+    if incomplete and issues_found:
+        print("⚠️ Prüfung unvollständig: nicht alle Rules konnten geladen werden.")
+    print(f"📊 {get_api().scheduler.summary()}")
+    writer.emit("summary", zone_id=zone_id, issues=len(issues_found), fixes=len(fixes_applied),
+                complete=not incomplete, api=get_api().scheduler.metrics)
+    
     return issues_found, fixes_applied
 
+def apply_plan(plan_file, dry_run=False):
+    """Wendet einen gespeicherten Plan ohne erneute Analyse oder Rückfragen an"""
+    with open(plan_file, 'r', encoding='utf-8') as f:
+        plan = json.load(f)
+    
+    transaction = RulesetTransaction.from_plan(get_api(), plan)
+    pending = transaction.pending()
+    fixes = sum(len(update.changes()) for update in pending)
+    
+    print(f"📝 Plan vom {plan.get('created', '?')}: {fixes} Fixes in {len(pending)} Zonen")
+    print()
+    print(transaction.diff())
+    print()
+    
+    if dry_run:
+        print("ℹ️ Dry-Run: nichts geschrieben")
+        return 0
+    
+    if transaction.apply():
+        return fixes
+    
+    print("❌ Plan konnte nicht angewendet werden (Änderungen zurückgesetzt)")
+    return 0
+
 def main():
+    parser = argparse.ArgumentParser(description="Cloudflare Googlebot 403 Fixer")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Fixes nur als Diff anzeigen, nichts schreiben")
+    parser.add_argument("--yes", "-y", action="store_true",
+                        help="Alle vorgeschlagenen Fixes ohne Rückfrage übernehmen")
+    parser.add_argument("--only-type", choices=[PROBLEM_BOTS, PROBLEM_HOMEPAGE],
+                        help="Nur Fixes für diesen Problemtyp (bots: Bot-Blockierung, homepage: Startseite)")
+    parser.add_argument("--max-fixes", type=int,
+                        help="Höchstens so viele Regeln fixen")
+    parser.add_argument("--plan-out", metavar="DATEI",
+                        help="Fixes nicht anwenden, sondern als JSON-Plan speichern (ohne Rückfragen)")
+    parser.add_argument("--apply-plan", metavar="DATEI",
+                        help="Gespeicherten Plan ohne erneute Analyse anwenden")
+    parser.add_argument("--from-snapshot", metavar="DATEI",
+                        help="Offline aus einem Snapshot analysieren (nur Dry-Run oder --plan-out)")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="text",
+                        help="json/ndjson: ein Datensatz pro Problem und Fix auf stdout, "
+                             "sofort gestreamt (Text und Rückfragen gehen nach stderr)")
+    args = parser.parse_args()
+    if args.from_snapshot and args.apply_plan:
+        parser.error("--apply-plan kann nicht mit --from-snapshot kombiniert werden")
+    
+    with RecordWriter(args.format) as writer:
+        run(args, writer)
+
+def run(args, writer):
+    """Analysiert und fixt die konfigurierte Zone oder wendet einen Plan an"""
+    snapshot = None
+    if args.from_snapshot:
+        snapshot = get_api().use_snapshot(args.from_snapshot)
+        # Ein Snapshot ist schreibgeschützt: Fixes nur anzeigen oder als Plan speichern
+        if not args.plan_out:
+            args.dry_run = True
+    
     print("=" * 60)
     print("Cloudflare Googlebot 403 Fixer")
     print("=" * 60)
     print()
     
-    # API Token prüfen
-    if not CLOUDFLARE_API_TOKEN:
+    # API Token prüfen (Snapshots brauchen keinen)
+    if not CLOUDFLARE_API_TOKEN and not snapshot:
         print("❌ FEHLER: CLOUDFLARE_API_TOKEN ist nicht konfiguriert!")
         print()
         print("Führe zuerst das Setup-Script aus:")
@@ -238,17 +324,34 @@ def main():
         print("Oder siehe CLOUDFLARE-API-FULL-SETUP.md für Details")
         return
     
+    if args.apply_plan:
+        fixes = apply_plan(args.apply_plan, args.dry_run)
+        if fixes:
+            print(f"✅ {fixes} Fixes angewendet!")
+        else:
+            print("ℹ️ Keine automatischen Fixes durchgeführt")
+        return
+    
     # Zone ID holen
-    zone_id = get_zone_id()
+    zone_id = snapshot.zone_id(CLOUDFLARE_ZONE_ID, DOMAIN) if snapshot else get_zone_id()
     if not zone_id:
         print("❌ Konnte Zone ID nicht finden!")
+        writer.emit("error", domain=DOMAIN, message="Zone ID nicht gefunden")
         return
     
     print(f"✅ Zone ID: {zone_id}")
     print()
     
     # Analysiere und fixe
-    issues, fixes = analyze_and_fix_rules(zone_id)
+    issues, fixes = analyze_and_fix_rules(
+        zone_id,
+        dry_run=args.dry_run,
+        assume_yes=args.yes,
+        only_type=args.only_type,
+        max_fixes=args.max_fixes,
+        plan_out=args.plan_out,
+        writer=writer
+    )
     
     if fixes:
         print(f"✅ {len(fixes)} Fixes angewendet!")
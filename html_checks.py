@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTML Checks
+Prüft alle Seiten der Website mit einer deklarativen Liste von Checks. Jede Seite wird
+genau einmal geparst; dabei entstehen Indizes nach id, class und Tag, gegen die alle
+Checks mit einfachen CSS-Selektoren ausgewertet werden.
+"""
+
+import argparse
+import fnmatch
+import os
+import re
+import sys
+import time
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+# Elemente ohne End-Tag
+VOID_ELEMENTS = frozenset((
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+    "param", "source", "track", "wbr",
+))
+
+ERROR = "error"
+WARNING = "warning"
+
+INDEX = ["index.html"]
+SERVICE_PAGES = [
+    "pages/alarmanlagen.html", "pages/briefkasten.html", "pages/mechanische-sicherung.html",
+    "pages/videoueberwachung.html", "pages/zutrittskontrolle.html", "pages/fussballmuseum.html",
+]
+
+# name: Anzeige; select: CSS-Selektor (Tag, #id, .class, [attr], [attr*=|^=|$=|=wert],
+# Nachfahren mit Leerzeichen, Alternativen mit Komma); optional: count (min, max),
+# text (alle Wörter müssen im Text eines Treffers vorkommen), files (Attribut mit
+# lokalen Pfaden, die existieren müssen), pages (Glob-Muster), severity
+CHECKS = [
+    # Alle Seiten
+    {"name": "Sprache gesetzt", "select": "html[lang]"},
+    {"name": "Titel", "select": "title", "count": (1, 1)},
+    {"name": "Meta Description", "select": "meta[name=description][content]", "count": (1, 1)},
+    {"name": "Viewport", "select": "meta[name=viewport]", "count": (1, 1)},
+    {"name": "Canonical", "select": "link[rel=canonical][href]", "count": (1, 1)},
+    {"name": "Genau eine H1", "select": "h1", "count": (1, 1)},
+    {"name": "Footer", "select": "footer"},
+    {"name": "Bilder ohne alt", "select": "img:not([alt])", "count": (0, 0), "severity": WARNING},
+    {"name": "Lokale Bilder vorhanden", "select": "img[src]", "files": "src", "count": (0, None)},
+    {"name": "Stylesheets vorhanden", "select": "link[rel=stylesheet][href]", "files": "href", "count": (0, None)},
+
+    # Unterseiten mit Navigation
+    {"name": "Navigation", "select": "nav#mainNav", "pages": INDEX + SERVICE_PAGES},
+    {"name": "Mobile Navigation", "select": "div[class*=mobile]", "pages": INDEX + SERVICE_PAGES,
+     "severity": WARNING},
+
+    # Startseite: Sections
+    {"name": "Hero Section", "select": "section.hero-apple", "pages": INDEX},
+    {"name": "Services Section", "select": "section#services", "pages": INDEX},
+    {"name": "Fußballmuseum Section", "select": "section#museum", "pages": INDEX},
+    {"name": "About Section", "select": "section#about", "pages": INDEX},
+    {"name": "Process Section", "select": "section#process", "pages": INDEX},
+    {"name": "Sicherheitscheck Section", "select": "section#sicherheitscheck", "pages": INDEX},
+    {"name": "References Section", "select": "section#references", "pages": INDEX},
+    {"name": "Contact Section", "select": "section#contact", "pages": INDEX},
+    {"name": "Section-Links in der Navigation", "select": "nav#mainNav a[href^='#']", "pages": INDEX},
+
+    # Startseite: Fußballmuseum
+    {"name": "DFM Logo", "select": "section#museum img[src*=DFM], section#museum img[src*=fussballmuseum]",
+     "files": "src", "pages": INDEX},
+    {"name": "Text 'setzt auf Kost Sicherheitstechnik'", "select": "section#museum",
+     "text": ("setzt auf", "kost"), "pages": INDEX},
+    {"name": "Museum Button", "select": "section#museum a[class*=btn]", "pages": INDEX, "severity": WARNING},
+    {"name": "Split-Apple Layout", "select": "section#museum.split-apple", "pages": INDEX, "severity": WARNING},
+
+    # Startseite: Referenzen
+    {"name": "Featured Testimonial", "select": "section#references div.featured-testimonial",
+     "pages": INDEX, "severity": WARNING},
+    {"name": "Logo-Grid", "select": "section#references div.references-grid", "pages": INDEX},
+    {"name": "Referenz-Cards", "select": "div.references-grid div.reference-card", "pages": INDEX},
+    {"name": "Referenz-Logos", "select": "section#references img[src*=logos]", "files": "src", "pages": INDEX},
+
+    # Startseite: Sonstiges
+    {"name": "Lucide Icons", "select": "[data-lucide], script[src*=lucide]", "pages": INDEX},
+    {"name": "Media Queries", "select": "style", "text": ("@media",), "pages": INDEX, "severity": WARNING},
+    {"name": "Call-to-Action Buttons", "select": "a[class*=btn]", "pages": INDEX},
+]
+
+class Element:
+    """Ein Element im flachen Dokument; Nachfahren liegen in elements[index + 1:end]"""
+
+    __slots__ = ("tag", "attrs", "classes", "parent", "index", "end", "text_start", "text_end",
+                 "offset", "start_tag")
+
+    def __init__(self, tag: str, attrs: Dict[str, str], parent: Optional["Element"], index: int, text_start: int):
+        self.tag = tag
+        self.attrs = attrs
+        self.classes = frozenset(attrs.get("class", "").split())
+        self.parent = parent
+        self.index = index
+        self.end = index + 1
+        self.text_start = text_start
+        self.text_end = text_start
+        # Position und Originaltext des Start-Tags im Quelltext, für Umschreibungen
+        self.offset = 0
+        self.start_tag = ""
+
+    def get(self, name: str, default: str = "") -> str:
+        return self.attrs.get(name, default)
+
+    def contains(self, other: "Element") -> bool:
+        return self.index < other.index < self.end
+
+class _Builder(HTMLParser):
+    """Ein Durchlauf über das HTML: Elemente, Textstücke und alle Indizes"""
+
+    def __init__(self, document: "Document", html: str):
+        super().__init__(convert_charrefs=True)
+        self.document = document
+        self.stack: List[Element] = []
+        self.line_starts = [0] + [match.end() for match in re.finditer("\n", html)]
+
+    def handle_starttag(self, tag, attrs):
+        document = self.document
+        element = Element(
+            tag, {name: value or "" for name, value in attrs},
+            self.stack[-1] if self.stack else None,
+            len(document.elements), len(document.texts)
+        )
+        line, column = self.getpos()
+        element.offset = self.line_starts[line - 1] + column
+        element.start_tag = self.get_starttag_text() or ""
+        document.elements.append(element)
+        document.by_tag.setdefault(tag, []).append(element)
+        if "id" in element.attrs:
+            document.by_id.setdefault(element.attrs["id"], []).append(element)
+        for name in element.classes:
+            document.by_class.setdefault(name, []).append(element)
+
+        if tag in VOID_ELEMENTS:
+            self._close(element)
+        else:
+            self.stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        # Nicht geschlossene Kinder (z.B. <p> ohne </p>) werden mit geschlossen
+        for depth in range(len(self.stack) - 1, -1, -1):
+            if self.stack[depth].tag == tag:
+                for element in self.stack[depth:]:
+                    self._close(element)
+                del self.stack[depth:]
+                return
+
+    def handle_data(self, data):
+        self.document.texts.append(data)
+
+    def _close(self, element: Element):
+        element.end = len(self.document.elements)
+        element.text_end = len(self.document.texts)
+
+    def close(self):
+        super().close()
+        for element in self.stack:
+            self._close(element)
+        self.stack = []
+
+class Document:
+    """Einmal geparste HTML-Seite mit Indizes nach Tag, id und class"""
+
+    def __init__(self, html: str, path: Optional[Path] = None):
+        self.path = path
+        self.elements: List[Element] = []
+        self.texts: List[str] = []
+        self.by_tag: Dict[str, List[Element]] = {}
+        self.by_id: Dict[str, List[Element]] = {}
+        self.by_class: Dict[str, List[Element]] = {}
+
+        builder = _Builder(self, html)
+        builder.feed(html)
+        builder.close()
+
+    @classmethod
+    def load(cls, path: Path) -> "Document":
+        return cls(path.read_text(encoding="utf-8"), path)
+
+    def text(self, element: Element) -> str:
+        return "".join(self.texts[element.text_start:element.text_end])
+
+    def select(self, selector: str, within: Optional[Element] = None) -> List[Element]:
+        """Alle Elemente, auf die der Selektor passt, in Dokumentreihenfolge"""
+        found = {}
+        for chain in parse_selector(selector):
+            for element in self._candidates(chain[-1]):
+                if within is not None and not within.contains(element):
+                    continue
+                if _matches_chain(element, chain):
+                    found[element.index] = element
+        return [found[index] for index in sorted(found)]
+
+    def _candidates(self, compound: "Compound") -> List[Element]:
+        # Der selektivste Index zuerst: id, dann class, dann Tag
+        if compound.id:
+            return self.by_id.get(compound.id, [])
+        if compound.classes:
+            return min((self.by_class.get(name, []) for name in compound.classes), key=len)
+        if compound.tag:
+            return self.by_tag.get(compound.tag, [])
+        return self.elements
+
+class Compound:
+    """Ein einfacher Selektor ohne Kombinatoren, z.B. a.btn[href^='#']"""
+
+    __slots__ = ("tag", "id", "classes", "attrs", "negated")
+
+    def __init__(self):
+        self.tag = ""
+        self.id = ""
+        self.classes: List[str] = []
+        self.attrs: List[Tuple[str, str, str]] = []
+        self.negated: List["Compound"] = []
+
+    def matches(self, element: Element) -> bool:
+        if self.tag and element.tag != self.tag:
+            return False
+        if self.id and element.attrs.get("id") != self.id:
+            return False
+        if any(name not in element.classes for name in self.classes):
+            return False
+        for name, op, value in self.attrs:
+            if name not in element.attrs:
+                return False
+            actual = element.attrs[name]
+            if op == "=" and actual != value:
+                return False
+            if op == "*=" and value not in actual:
+                return False
+            if op == "^=" and not actual.startswith(value):
+                return False
+            if op == "$=" and not actual.endswith(value):
+                return False
+        return not any(negated.matches(element) for negated in self.negated)
+
+_TOKEN = re.compile(r"""
+    (?P<tag>[a-zA-Z][\w-]*|\*)
+  | \#(?P<id>[\w-]+)
+  | \.(?P<cls>[\w-]+)
+  | \[\s*(?P<attr>[\w-]+)\s*(?:(?P<op>[*^$]?=)\s*(?P<value>'[^']*'|"[^"]*"|[^\]\s]+)\s*)?\]
+  | :not\((?P<not>[^)]*)\)
+""", re.VERBOSE)
+
+def _parse_compound(text: str) -> Compound:
+    compound = Compound()
+    position = 0
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if not match:
+            raise ValueError(f"Ungültiger Selektor: {text!r}")
+        if match.group("tag"):
+            compound.tag = "" if match.group("tag") == "*" else match.group("tag").lower()
+        elif match.group("id"):
+            compound.id = match.group("id")
+        elif match.group("cls"):
+            compound.classes.append(match.group("cls"))
+        elif match.group("attr"):
+            value = match.group("value") or ""
+            if value[:1] in ("'", '"'):
+                value = value[1:-1]
+            compound.attrs.append((match.group("attr").lower(), match.group("op") or "", value))
+        else:
+            compound.negated.append(_parse_compound(match.group("not").strip()))
+        position = match.end()
+    return compound
+
+_selector_cache: Dict[str, List[List[Compound]]] = {}
+
+def parse_selector(selector: str) -> List[List[Compound]]:
+    """'a b, c' -> [[a, b], [c]] (Nachfahren-Ketten, durch Komma getrennt)"""
+    if selector not in _selector_cache:
+        _selector_cache[selector] = [
+            [_parse_compound(part) for part in group.split()]
+            for group in selector.split(",") if group.strip()
+        ]
+    return _selector_cache[selector]
+
+def _matches_chain(element: Element, chain: List[Compound]) -> bool:
+    """Prüft von rechts nach links: Element passt, Vorfahren passen zu den übrigen Teilen"""
+    if not chain[-1].matches(element):
+        return False
+    ancestor = element.parent
+    for compound in reversed(chain[:-1]):
+        while ancestor is not None and not compound.matches(ancestor):
+            ancestor = ancestor.parent
+        if ancestor is None:
+            return False
+        ancestor = ancestor.parent
+    return True
+
+def is_local_reference(url: str) -> bool:
+    """Relative Pfade im Repo (keine externen URLs, Anker, data: oder mailto:)"""
+    parts = urlsplit(url)
+    return bool(url) and not parts.scheme and not parts.netloc and not url.startswith("#") and bool(parts.path)
+
+def resolve_reference(url: str, source: Path, root: Path = Path(".")) -> Optional[Path]:
+    """Datei zu einer lokalen Referenz: /pfad relativ zum Site-Root, sonst relativ zur Quelldatei"""
+    if not is_local_reference(url):
+        return None
+    path = unquote(urlsplit(url).path)
+    if path.startswith("/"):
+        return Path(os.path.normpath(root / path.lstrip("/")))
+    return Path(os.path.normpath(source.parent / path))
+
+def missing_files(document: Document, elements: Iterable[Element], attribute: str) -> List[str]:
+    """Lokale Referenzen, deren Datei relativ zur Seite nicht existiert"""
+    source = document.path or Path("index.html")
+    missing = []
+    for element in elements:
+        url = element.get(attribute).strip()
+        path = resolve_reference(url, source)
+        if path is not None and not path.exists():
+            missing.append(url)
+    return missing
+
+CSS_URL = re.compile(r"""url\(\s*(['"]?)(?P<url>[^'")]+)\1\s*\)|@import\s+(['"])(?P<import>[^'"]+)\3""")
+
+def css_references(css: str) -> List[Tuple[str, str]]:
+    """(Art, URL) aller url(...) und @import in CSS-Text"""
+    references = []
+    for match in CSS_URL.finditer(css):
+        if match.group("import"):
+            references.append(("css", match.group("import").strip()))
+        else:
+            references.append(("image", match.group("url").strip()))
+    return references
+
+def srcset_urls(value: str) -> List[str]:
+    """URLs aus einem srcset ("a.webp 1x, b.webp 2x")"""
+    return [candidate.split()[0] for candidate in value.split(",") if candidate.strip()]
+
+# link rel -> Art der Ressource; Icons und Manifest werden geprüft, zählen aber nicht zum Seitengewicht
+LINK_KINDS = {"stylesheet": "css", "icon": "other", "apple-touch-icon": "other", "manifest": "other"}
+PRELOAD_KINDS = {"style": "css", "script": "js", "image": "image", "font": "font"}
+
+def asset_references(document: Document) -> List[Tuple[str, str, bool]]:
+    """(Art, URL, wird geladen) aller Ressourcen einer Seite
+
+    In <picture> und srcset lädt der Browser nur eine Variante: gezählt wird die erste
+    Quelle, alle weiteren Varianten werden geprüft, aber nicht zum Seitengewicht gerechnet.
+    """
+    references = []
+    in_picture = set()
+    for picture in document.by_tag.get("picture", []):
+        candidates = [element for element in document.elements[picture.index + 1:picture.end]
+                      if element.tag in ("source", "img")]
+        for position, element in enumerate(candidates):
+            in_picture.add(element.index)
+            urls = srcset_urls(element.get("srcset")) + ([element.get("src")] if element.get("src") else [])
+            references.extend(("image", url, position == 0 and i == 0) for i, url in enumerate(urls))
+
+    for element in document.elements:
+        if element.index in in_picture:
+            continue
+        if element.tag == "img":
+            urls = ([element.get("src")] if element.get("src") else []) + srcset_urls(element.get("srcset"))
+            references.extend(("image", url, i == 0) for i, url in enumerate(urls))
+        elif element.tag in ("source", "video", "audio", "track") and (element.get("src") or element.get("srcset")):
+            urls = [element.get("src")] if element.get("src") else srcset_urls(element.get("srcset"))
+            references.extend(("other", url, False) for url in urls)
+        elif element.tag == "script" and element.get("src"):
+            references.append(("js", element.get("src"), True))
+        elif element.tag == "link" and element.get("href"):
+            rel = element.get("rel").lower().split()
+            kind = next((LINK_KINDS[token] for token in rel if token in LINK_KINDS), None)
+            if "preload" in rel:
+                kind = PRELOAD_KINDS.get(element.get("as"), "other")
+            if kind:
+                references.append((kind, element.get("href"), kind != "other"))
+        elif element.tag == "style":
+            references.extend((kind, url, True) for kind, url in css_references(document.text(element)))
+        if "style" in element.attrs and "url(" in element.attrs["style"]:
+            references.extend((kind, url, True) for kind, url in css_references(element.attrs["style"]))
+    return [(kind, url.strip(), loaded) for kind, url, loaded in references if url.strip()]
+
+def applies_to(check: Dict, page: str) -> bool:
+    patterns = check.get("pages")
+    return patterns is None or any(fnmatch.fnmatch(page, pattern) for pattern in patterns)
+
+def run_check(document: Document, check: Dict) -> Tuple[bool, str]:
+    """Wertet einen Check aus: (bestanden, Detail)"""
+    matches = document.select(check["select"])
+    if check.get("text"):
+        words = [word.lower() for word in check["text"]]
+        matches = [m for m in matches if all(word in document.text(m).lower() for word in words)]
+
+    minimum, maximum = check.get("count", (1, None))
+    passed = len(matches) >= minimum and (maximum is None or len(matches) <= maximum)
+    detail = f"{len(matches)} Treffer"
+
+    if check.get("files"):
+        missing = missing_files(document, matches, check["files"])
+        if missing:
+            passed = False
+            detail += f", {len(missing)} Dateien fehlen: " + ", ".join(missing[:5])
+            if len(missing) > 5:
+                detail += ", …"
+    return passed, detail
+
+def site_pages(root: str = ".") -> List[str]:
+    base = Path(root)
+    pages = ["index.html"] if (base / "index.html").exists() else []
+    pages.extend(f"pages/{page.name}" for page in sorted((base / "pages").glob("*.html")))
+    return pages
+
+def validate(pages: List[str], checks: List[Dict] = CHECKS, details: bool = False) -> Tuple[int, int]:
+    """Prüft alle Seiten und gibt die Ergebnisse aus: (Fehler, Warnungen)"""
+    errors = warnings = 0
+    for page in pages:
+        document = Document.load(Path(page))
+        print(f"\n[{page}]")
+        for check in checks:
+            if not applies_to(check, page):
+                continue
+            passed, detail = run_check(document, check)
+            if passed:
+                if details:
+                    print(f"  ✓ {check['name']} ({detail})")
+                continue
+            if check.get("severity", ERROR) == WARNING:
+                warnings += 1
+                print(f"  ⚠ {check['name']}: {detail}")
+            else:
+                errors += 1
+                print(f"  ✗ {check['name']}: {detail}")
+    return errors, warnings
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Prüft alle HTML-Seiten der Website")
+    parser.add_argument("pages", nargs="*", help="Seiten (Standard: index.html und pages/*.html)")
+    parser.add_argument("--details", action="store_true", help="Auch bestandene Checks mit Trefferzahl zeigen")
+    args = parser.parse_args(argv)
+
+    pages = args.pages or site_pages()
+
+    print("=" * 60)
+    print("KOST WEBSITE HTML-CHECK")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    errors, warnings = validate(pages, details=args.details)
+    elapsed = time.perf_counter() - start
+
+    print()
+    print("=" * 60)
+    print(f"{len(pages)} Seiten in {elapsed * 1000:.0f}ms geprüft: {errors} Fehler, {warnings} Warnungen")
+    print("(Live-Checks: python check-live-site.py)")
+    print("=" * 60)
+
+    sys.exit(1 if errors else 0)
+
+if __name__ == "__main__":
+    main()
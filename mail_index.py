@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mail Index
+Liest die .eml-Dateien in Kostmails/ zeilenweise (ohne die ganze Datei zu laden) und
+speichert Header, Textteile und Anhänge samt Byte-Offsets in einem SQLite-Index.
+Dateien werden nur neu gelesen, wenn sich mtime oder Größe geändert haben; Anhänge
+lassen sich später direkt über ihren Offset dekodieren, ohne die Mail erneut zu parsen.
+Parsen und Dekodieren laufen auf Wunsch in einem Prozess-Pool (workers > 1); Fehler
+einzelner Dateien werden als Datensätze geliefert statt das Ganze abzubrechen.
+"""
+
+import binascii
+import hashlib
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from email import policy
+from email.parser import BytesHeaderParser
+from email.utils import getaddresses, parsedate_to_datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+MAIL_DIR = "Kostmails"
+MAIL_INDEX_FILE = ".kostmails-index.sqlite"
+# Textteile größer als das werden nicht in den Index übernommen
+MAX_TEXT_BYTES = 5 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    sha256 TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    message_id TEXT,
+    subject TEXT,
+    sender TEXT,
+    sender_address TEXT,
+    recipients TEXT,
+    date TEXT
+);
+CREATE TABLE IF NOT EXISTS bodies (
+    message INTEGER NOT NULL REFERENCES messages(id) ON DELETE CASCADE,
+    part TEXT NOT NULL,
+    content_type TEXT NOT NULL,
+    charset TEXT,
+    text TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS attachments (
+    message INTEGER NOT NULL REFERENCES messages(id) ON DELETE CASCADE,
+    part TEXT NOT NULL,
+    filename TEXT,
+    content_type TEXT NOT NULL,
+    disposition TEXT,
+    content_id TEXT,
+    encoding TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS errors (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    stage TEXT NOT NULL,
+    exception TEXT NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bodies_message ON bodies(message);
+CREATE INDEX IF NOT EXISTS attachments_message ON attachments(message);
+CREATE INDEX IF NOT EXISTS attachments_sha256 ON attachments(sha256);
+"""
+
+class TransferDecoder:
+    """Dekodiert base64 / quoted-printable stückweise"""
+
+    def __init__(self, encoding: str):
+        self.encoding = (encoding or "7bit").lower()
+        self.pending = b""
+
+    def feed(self, data: bytes) -> bytes:
+        if self.encoding == "base64":
+            data = self.pending + b"".join(data.split())
+            usable = len(data) - len(data) % 4
+            self.pending = data[usable:]
+            return binascii.a2b_base64(data[:usable]) if usable else b""
+        if self.encoding == "quoted-printable":
+            # QP ist zeilenweise kodiert; nur vollständige Zeilen dekodieren
+            data = self.pending + data
+            cut = data.rfind(b"\n") + 1
+            self.pending = data[cut:]
+            return binascii.a2b_qp(data[:cut])
+        return data
+
+    def flush(self) -> bytes:
+        data, self.pending = self.pending, b""
+        if not data:
+            return b""
+        if self.encoding == "base64":
+            return binascii.a2b_base64(data + b"=" * (-len(data) % 4))
+        if self.encoding == "quoted-printable":
+            return binascii.a2b_qp(data)
+        return data
+
+class _Lines:
+    """Zeilen einer Datei mit Byte-Offset; eine Zeile kann zurückgelegt werden"""
+
+    def __init__(self, f, digest):
+        self.f = f
+        self.digest = digest
+        self.offset = 0
+        self.pushed = None
+
+    def next(self):
+        if self.pushed is not None:
+            line, self.pushed = self.pushed, None
+            return line
+        line = self.f.readline()
+        if not line:
+            return None
+        self.digest.update(line)
+        offset = self.offset
+        self.offset += len(line)
+        return offset, line
+
+    def push(self, line):
+        self.pushed = line
+
+def _strip_newline(line: bytes) -> bytes:
+    return line[:-2] if line.endswith(b"\r\n") else line[:-1] if line.endswith(b"\n") else line
+
+def _delimiter(line: bytes, boundaries: List[bytes]) -> bool:
+    stripped = line.rstrip()
+    return stripped.startswith(b"--") and any(
+        stripped == b"--" + boundary or stripped == b"--" + boundary + b"--" for boundary in boundaries
+    )
+
+class _Scanner:
+    """Rekursiver MIME-Scanner über _Lines; sammelt Textteile und Anhänge"""
+
+    def __init__(self, lines: _Lines):
+        self.lines = lines
+        self.header_parser = BytesHeaderParser(policy=policy.default)
+        self.bodies: List[Dict] = []
+        self.attachments: List[Dict] = []
+        self.headers = None
+
+    def entity(self, boundaries: List[bytes], part: str):
+        raw = []
+        while True:
+            item = self.lines.next()
+            if item is None:
+                break
+            if _delimiter(item[1], boundaries):
+                self.lines.push(item)
+                break
+            raw.append(item[1])
+            if not item[1].strip():
+                break
+        headers = self.header_parser.parsebytes(b"".join(raw))
+        if self.headers is None:
+            self.headers = headers
+
+        if headers.get_content_maintype() == "multipart" and headers.get_boundary():
+            self.multipart(headers.get_boundary().encode("utf-8", "replace"), boundaries, part)
+        else:
+            self.leaf(headers, boundaries, part)
+
+    def multipart(self, boundary: bytes, boundaries: List[bytes], part: str):
+        inner = boundaries + [boundary]
+        number = 0
+        # Präambel überspringen bis zur ersten Grenze
+        while True:
+            item = self.lines.next()
+            if item is None:
+                return
+            stripped = item[1].rstrip()
+            if stripped == b"--" + boundary + b"--":
+                break
+            if stripped == b"--" + boundary:
+                number += 1
+                self.entity(inner, f"{part}.{number}" if part else str(number))
+                continue
+            if _delimiter(item[1], boundaries):
+                # Grenze eines äußeren Teils ohne Abschluss dieses Teils
+                self.lines.push(item)
+                return
+        # Epilog bis zur nächsten äußeren Grenze
+        while True:
+            item = self.lines.next()
+            if item is None:
+                return
+            if _delimiter(item[1], boundaries):
+                self.lines.push(item)
+                return
+
+    def leaf(self, headers, boundaries: List[bytes], part: str):
+        encoding = str(headers.get("Content-Transfer-Encoding", "7bit")).strip().lower()
+        content_type = headers.get_content_type()
+        disposition = headers.get_content_disposition()
+        is_text = content_type in ("text/plain", "text/html") and disposition != "attachment"
+
+        decoder = TransferDecoder(encoding)
+        digest = hashlib.sha256()
+        text = bytearray()
+        size = 0
+        start = None
+        end = None
+        previous = None
+
+        def consume(data: bytes):
+            nonlocal size
+            decoded = decoder.feed(data)
+            size += len(decoded)
+            digest.update(decoded)
+            if is_text and len(text) < MAX_TEXT_BYTES:
+                text.extend(decoded)
+
+        while True:
+            item = self.lines.next()
+            if item is None or _delimiter(item[1], boundaries):
+                if item is not None:
+                    self.lines.push(item)
+                # Der Zeilenumbruch vor der Grenze gehört zur Grenze, nicht zum Inhalt
+                if previous is not None:
+                    last = _strip_newline(previous[1]) if item is not None else previous[1]
+                    consume(last)
+                    end = previous[0] + len(last)
+                break
+            if start is None:
+                start = item[0]
+            if previous is not None:
+                consume(previous[1])
+            previous = item
+
+        tail = decoder.flush()
+        size += len(tail)
+        digest.update(tail)
+        if is_text:
+            text.extend(tail)
+        start = start if start is not None else self.lines.offset
+        end = end if end is not None else start
+
+        if is_text:
+            charset = headers.get_content_charset() or "utf-8"
+            try:
+                decoded = bytes(text).decode(charset, errors="replace")
+            except LookupError:
+                decoded = bytes(text).decode("utf-8", errors="replace")
+            self.bodies.append({"part": part or "1", "content_type": content_type,
+                                "charset": charset, "text": decoded})
+        elif headers.get_content_maintype() != "multipart":
+            self.attachments.append({
+                "part": part or "1",
+                "filename": headers.get_filename(),
+                "content_type": content_type,
+                "disposition": disposition,
+                "content_id": str(headers.get("Content-ID", "")).strip("<> ") or None,
+                "encoding": encoding,
+                "offset": start,
+                "length": end - start,
+                "size": size,
+                "sha256": digest.hexdigest(),
+            })
+
+def _header_date(value) -> Optional[str]:
+    try:
+        return parsedate_to_datetime(str(value)).isoformat() if value else None
+    except (TypeError, ValueError):
+        return None
+
+def scan_message(path: str) -> Dict:
+    """Liest eine .eml-Datei in einem Durchgang: Header, Textteile, Anhänge mit Offsets"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        scanner = _Scanner(_Lines(f, digest))
+        scanner.entity([], "")
+        # Rest (z.B. nach einem fehlerhaften Abschluss) nur noch für den Hash lesen
+        while scanner.lines.next() is not None:
+            pass
+
+    headers = scanner.headers
+    sender = str(headers.get("From", ""))
+    addresses = getaddresses([sender])
+    return {
+        "path": Path(path).as_posix(),
+        "sha256": digest.hexdigest(),
+        "message_id": str(headers.get("Message-ID", "")).strip() or None,
+        "subject": str(headers.get("Subject", "")),
+        "sender": sender,
+        "sender_address": addresses[0][1].lower() if addresses else "",
+        "recipients": ", ".join(str(headers.get(name, "")) for name in ("To", "Cc") if headers.get(name)),
+        "date": _header_date(headers.get("Date")),
+        "bodies": scanner.bodies,
+        "attachments": scanner.attachments,
+    }
+
+def error_record(path: str, stage: str, error: Exception) -> Dict:
+    """Fehler einer Datei als Datensatz (stage: parse oder extract)"""
+    return {"type": "error", "file": path, "stage": stage,
+            "exception": type(error).__name__, "message": str(error)}
+
+def _scan_or_error(path: str) -> Dict:
+    try:
+        return scan_message(path)
+    except Exception as e:
+        return error_record(path, "parse", e)
+
+def iter_attachment(attachment) -> Iterator[bytes]:
+    """Dekodierter Inhalt eines Anhangs in Stücken, direkt ab seinem Offset gelesen"""
+    decoder = TransferDecoder(attachment["encoding"])
+    with open(attachment["path"], "rb") as f:
+        f.seek(attachment["offset"])
+        remaining = attachment["length"]
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            decoded = decoder.feed(chunk)
+            if decoded:
+                yield decoded
+    tail = decoder.flush()
+    if tail:
+        yield tail
+
+def error_record_from_row(row) -> Dict:
+    return {"type": "error", "file": row["path"], "stage": row["stage"],
+            "exception": row["exception"], "message": row["message"]}
+
+def _decode_or_error(attachment: Dict) -> Dict:
+    try:
+        return {"type": "attachment", "attachment": attachment, "data": b"".join(iter_attachment(attachment))}
+    except Exception as e:
+        return error_record(attachment["path"], "extract", e)
+
+def parallel_map(function: Callable, items: Iterable, workers: int = 1) -> Iterator:
+    """map() über einen Prozess-Pool; Ergebnisse kommen in Eingabereihenfolge, sobald sie vorliegen"""
+    if workers <= 1:
+        yield from map(function, items)
+        return
+    items = list(items)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(function, items, chunksize=max(1, len(items) // (workers * 4)))
+
+class MailIndex:
+    """SQLite-Index über alle .eml-Dateien eines Verzeichnisses"""
+
+    def __init__(self, path: str = MAIL_INDEX_FILE, mail_dir: str = MAIL_DIR):
+        self.path = path
+        self.mail_dir = Path(mail_dir)
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA foreign_keys = ON")
+        self.db.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.db.close()
+
+    def update(self, workers: int = 1) -> Dict:
+        """Indexiert neue und geänderte Dateien, entfernt gelöschte
+
+        Liefert die Anzahl pro Fall und unter "errors" einen Datensatz pro Datei, die sich
+        nicht lesen ließ. Fehlerhafte Dateien werden erst nach einer Änderung erneut versucht.
+        """
+        stats = {"indexed": 0, "unchanged": 0, "removed": 0, "failed": 0, "errors": []}
+        known = {row["path"]: row for row in self.db.execute("SELECT id, path, mtime_ns, size FROM messages")}
+        failed = {row["path"]: row for row in self.db.execute("SELECT * FROM errors")}
+        files = sorted(self.mail_dir.glob("*.eml"))
+
+        pending = {}
+        for file in files:
+            key = file.as_posix()
+            try:
+                stat = file.stat()
+            except OSError as e:
+                known.pop(key, None)
+                stats["failed"] += 1
+                stats["errors"].append(error_record(key, "parse", e))
+                continue
+            row = known.pop(key, None) or failed.get(key)
+            if row and row["mtime_ns"] == stat.st_mtime_ns and row["size"] == stat.st_size:
+                if key in failed:
+                    stats["failed"] += 1
+                    stats["errors"].append(error_record_from_row(failed[key]))
+                else:
+                    stats["unchanged"] += 1
+                continue
+            pending[key] = stat
+
+        with self.db:
+            for record in parallel_map(_scan_or_error, list(pending), workers):
+                path = record.get("path") or record["file"]
+                stat = pending[path]
+                if record.get("type") == "error":
+                    self.db.execute("DELETE FROM messages WHERE path = ?", (path,))
+                    self.db.execute(
+                        "INSERT OR REPLACE INTO errors (path, mtime_ns, size, stage, exception, message) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (path, stat.st_mtime_ns, stat.st_size, record["stage"], record["exception"],
+                         record["message"]),
+                    )
+                    stats["failed"] += 1
+                    stats["errors"].append(record)
+                    continue
+                self.db.execute("DELETE FROM errors WHERE path = ?", (path,))
+                self.store(record, stat)
+                stats["indexed"] += 1
+
+            for row in known.values():
+                self.db.execute("DELETE FROM messages WHERE id = ?", (row["id"],))
+                stats["removed"] += 1
+            present = {file.as_posix() for file in files}
+            for path in failed:
+                if path not in present:
+                    self.db.execute("DELETE FROM errors WHERE path = ?", (path,))
+        return stats
+
+    def store(self, record: Dict, stat):
+        """Ersetzt die Einträge einer Datei durch ein Ergebnis von scan_message"""
+        self.db.execute("DELETE FROM messages WHERE path = ?", (record["path"],))
+        cursor = self.db.execute(
+            "INSERT INTO messages (path, sha256, mtime_ns, size, message_id, subject, sender, "
+            "sender_address, recipients, date) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (record["path"], record["sha256"], stat.st_mtime_ns, stat.st_size, record["message_id"],
+             record["subject"], record["sender"], record["sender_address"], record["recipients"], record["date"]),
+        )
+        message = cursor.lastrowid
+        self.db.executemany(
+            "INSERT INTO bodies (message, part, content_type, charset, text) VALUES (?, ?, ?, ?, ?)",
+            [(message, b["part"], b["content_type"], b["charset"], b["text"]) for b in record["bodies"]],
+        )
+        self.db.executemany(
+            "INSERT INTO attachments (message, part, filename, content_type, disposition, content_id, "
+            "encoding, offset, length, size, sha256) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(message, a["part"], a["filename"], a["content_type"], a["disposition"], a["content_id"],
+              a["encoding"], a["offset"], a["length"], a["size"], a["sha256"]) for a in record["attachments"]],
+        )
+
+    def messages(self) -> List[sqlite3.Row]:
+        return self.db.execute("SELECT * FROM messages ORDER BY path").fetchall()
+
+    def message(self, message_id: int) -> Optional[sqlite3.Row]:
+        return self.db.execute("SELECT * FROM messages WHERE id = ?", (message_id,)).fetchone()
+
+    def body(self, message_id: int, content_type: Optional[str] = None) -> str:
+        """Erster Textteil einer Mail (optional nur text/plain oder text/html)"""
+        query = "SELECT text FROM bodies WHERE message = ?"
+        params = [message_id]
+        if content_type:
+            query += " AND content_type = ?"
+            params.append(content_type)
+        row = self.db.execute(query + " ORDER BY rowid LIMIT 1", params).fetchone()
+        return row["text"] if row else ""
+
+    def find(self, *needles: str, content_type: Optional[str] = None) -> List[sqlite3.Row]:
+        """Mails, deren Text einen der Begriffe enthält (ohne Groß-/Kleinschreibung)"""
+        conditions = " OR ".join("instr(lower(text), ?) > 0" for _ in needles)
+        query = f"SELECT DISTINCT message FROM bodies WHERE ({conditions})"
+        params = [needle.lower() for needle in needles]
+        if content_type:
+            query += " AND content_type = ?"
+            params.append(content_type)
+        ids = [row["message"] for row in self.db.execute(query, params)]
+        return [self.message(message_id) for message_id in sorted(ids)]
+
+    def attachments(self, message_id: Optional[int] = None, disposition: Optional[str] = None) -> List[sqlite3.Row]:
+        query = ("SELECT attachments.rowid AS id, attachments.*, messages.path FROM attachments "
+                 "JOIN messages ON messages.id = attachments.message WHERE 1")
+        params = []
+        if message_id is not None:
+            query += " AND message = ?"
+            params.append(message_id)
+        if disposition:
+            query += " AND disposition = ?"
+            params.append(disposition)
+        return self.db.execute(query + " ORDER BY message, attachments.rowid", params).fetchall()
+
+    def iter_attachment(self, attachment) -> Iterator[bytes]:
+        return iter_attachment(attachment)
+
+    def read_attachment(self, attachment) -> bytes:
+        return b"".join(iter_attachment(attachment))
+
+    def extract(self, attachments: Iterable, workers: int = 1) -> Iterator[Dict]:
+        """Dekodiert Anhänge (parallel bei workers > 1) in Eingabereihenfolge
+
+        Liefert {"type": "attachment", "attachment": ..., "data": bytes} oder einen Fehler-Datensatz.
+        """
+        return parallel_map(_decode_or_error, [dict(attachment) for attachment in attachments], workers)
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mail Search
+Invertierter Volltext-Index über die Kostmails, gespeichert in derselben SQLite-Datei
+wie der Mail-Index. Wörter werden kleingeschrieben, Umlaute gefaltet (ä → a, ß → ss)
+und mit CISTEM auf ihren Stamm reduziert, damit "Zusammenarbeit" auch "zusammenarbeiten"
+findet. Neu indexiert werden nur Mails, die der Mail-Index neu aufgenommen hat.
+"""
+
+import math
+import re
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from mail_index import MailIndex
+from mail_text import html_to_text
+
+# Bei Änderungen am Tokenizer oder Stemmer erhöhen, dann wird neu indexiert
+ANALYZER_VERSION = "2"
+SNIPPET_WORDS = 24
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS search_docs (
+    message INTEGER PRIMARY KEY REFERENCES messages(id) ON DELETE CASCADE,
+    length INTEGER NOT NULL,
+    senders TEXT NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS search_postings (
+    term TEXT NOT NULL,
+    message INTEGER NOT NULL REFERENCES messages(id) ON DELETE CASCADE,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (term, message)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS search_postings_message ON search_postings(message);
+"""
+
+WORD = re.compile(r"\w+", re.UNICODE)
+# Absender weitergeleiteter Mails ("Von: Ralf Rauch <ralf.rauch@wdi.de>")
+FORWARDED_SENDER = re.compile(r"^\s*\*?(?:Von|From)\s*:\*?\s*(.+)$", re.IGNORECASE | re.MULTILINE)
+FOLD = str.maketrans({"ä": "a", "ö": "o", "ü": "u", "ß": "ss"})
+
+def stem(word: str) -> str:
+    """CISTEM-Stemmer (Weissweiler & Fraser 2017) für kleingeschriebene Wörter"""
+    word = word.translate(FOLD)
+    if len(word) > 5 and word.startswith("ge"):
+        word = word[2:]
+    word = word.replace("sch", "$").replace("ei", "%").replace("ie", "&")
+    word = re.sub(r"(.)\1", r"\1*", word)
+
+    while len(word) > 3:
+        if len(word) > 5 and word[-2:] in ("em", "er", "nd"):
+            word = word[:-2]
+        elif word[-1] in "tesn":
+            word = word[:-1]
+        else:
+            break
+
+    word = re.sub(r"(.)\*", r"\1\1", word)
+    return word.replace("$", "sch").replace("%", "ei").replace("&", "ie")
+
+def tokens(text: str) -> Iterator[Tuple[str, re.Match]]:
+    """(Stamm, Fundstelle) für jedes Wort eines Textes"""
+    for match in WORD.finditer(text):
+        word = match.group().lower()
+        if len(word) > 1 and not word.isdigit():
+            yield stem(word), match
+
+def analyze(text: str) -> List[str]:
+    return [term for term, _ in tokens(text)]
+
+class Hit(NamedTuple):
+    message: int
+    score: float
+    path: str
+    subject: str
+    sender: str
+    date: Optional[str]
+    snippet: str
+
+class MailSearch:
+    """Volltextsuche über die Mails eines MailIndex"""
+
+    def __init__(self, index: MailIndex):
+        self.index = index
+        self.db = index.db
+        self.db.executescript(SCHEMA)
+        row = self.db.execute("SELECT value FROM search_meta WHERE key = 'analyzer'").fetchone()
+        if not row or row["value"] != ANALYZER_VERSION:
+            with self.db:
+                self.db.execute("DELETE FROM search_postings")
+                self.db.execute("DELETE FROM search_docs")
+                self.db.execute("INSERT OR REPLACE INTO search_meta (key, value) VALUES ('analyzer', ?)",
+                                (ANALYZER_VERSION,))
+
+    def document(self, message_id: int) -> str:
+        """Betreff und Text einer Mail; text/plain bevorzugt, sonst aus HTML"""
+        message = self.index.message(message_id)
+        parts = [row["text"] for row in self.db.execute(
+            "SELECT text FROM bodies WHERE message = ? AND content_type = 'text/plain' ORDER BY rowid",
+            (message_id,))]
+        if not parts:
+            parts = [html_to_text(row["text"]) for row in self.db.execute(
+                "SELECT text FROM bodies WHERE message = ? AND content_type = 'text/html' ORDER BY rowid",
+                (message_id,))]
+        return "\n\n".join([message["subject"] or ""] + parts)
+
+    def update(self) -> int:
+        """Indexiert alle Mails, die noch nicht im Volltext-Index sind; gelöschte fallen per CASCADE heraus"""
+        pending = [row["id"] for row in self.db.execute(
+            "SELECT id FROM messages WHERE id NOT IN (SELECT message FROM search_docs) ORDER BY id")]
+        with self.db:
+            for message_id in pending:
+                text = self.document(message_id)
+                counts: Dict[str, int] = {}
+                for term in analyze(text):
+                    counts[term] = counts.get(term, 0) + 1
+                senders = "\n".join(match.strip() for match in FORWARDED_SENDER.findall(text))
+                self.db.execute("INSERT INTO search_docs (message, length, senders, text) VALUES (?, ?, ?, ?)",
+                                (message_id, sum(counts.values()), senders, text))
+                self.db.executemany("INSERT INTO search_postings (term, message, count) VALUES (?, ?, ?)",
+                                    [(term, message_id, count) for term, count in counts.items()])
+        return len(pending)
+
+    def search(self, query: str = "", sender: Optional[str] = None, any_term: bool = False,
+               limit: Optional[int] = 10) -> List[Hit]:
+        """Mails mit allen (any_term: mindestens einem) Suchbegriffen, nach TF-IDF sortiert
+
+        sender schränkt auf Mails ein, deren Absender – auch in weitergeleiteten Teilen – den
+        Text enthält. Ohne Suchbegriffe werden alle Mails des Absenders geliefert.
+        """
+        terms = list(dict.fromkeys(analyze(query)))
+        if query.strip() and not terms:
+            return []
+        total = self.db.execute("SELECT COUNT(*) FROM search_docs").fetchone()[0]
+
+        if terms:
+            placeholders = ", ".join("?" for _ in terms)
+            scores: Dict[int, float] = {}
+            matched: Dict[int, int] = {}
+            frequencies = dict(self.db.execute(
+                f"SELECT term, COUNT(*) FROM search_postings WHERE term IN ({placeholders}) GROUP BY term", terms))
+            for term, message_id, count in self.db.execute(
+                    f"SELECT term, message, count FROM search_postings WHERE term IN ({placeholders})", terms):
+                idf = math.log(1 + total / frequencies[term])
+                scores[message_id] = scores.get(message_id, 0.0) + (1 + math.log(count)) * idf
+                matched[message_id] = matched.get(message_id, 0) + 1
+            candidates = {message_id: score for message_id, score in scores.items()
+                          if any_term or matched[message_id] == len(terms)}
+        else:
+            candidates = {row[0]: 0.0 for row in self.db.execute("SELECT message FROM search_docs")}
+
+        hits = []
+        for message_id, score in candidates.items():
+            row = self.db.execute(
+                "SELECT messages.*, search_docs.senders, search_docs.text FROM messages "
+                "JOIN search_docs ON search_docs.message = messages.id WHERE messages.id = ?",
+                (message_id,)).fetchone()
+            if sender and sender.lower() not in "\n".join(
+                    filter(None, (row["sender"], row["sender_address"], row["senders"]))).lower():
+                continue
+            hits.append(Hit(message_id, score, row["path"], row["subject"] or "", row["sender"] or "",
+                            row["date"], snippet(row["text"], terms)))
+        hits.sort(key=lambda hit: (-hit.score, hit.date or "", hit.path))
+        return hits[:limit] if limit else hits
+
+def snippet(text: str, terms: List[str], width: int = SNIPPET_WORDS) -> str:
+    """Ausschnitt um die Stelle mit den meisten verschiedenen Suchbegriffen, Treffer in »…«"""
+    words = list(tokens(text))
+    if not words:
+        return ""
+    wanted = set(terms)
+    hits = [i for i, (term, _) in enumerate(words) if term in wanted]
+    if not hits:
+        start, end = 0, min(len(words), width)
+    else:
+        best = max(hits, key=lambda i: (len({term for term, _ in words[i:i + width]} & wanted), -i))
+        start = max(0, best - width // 4)
+        end = min(len(words), start + width)
+
+    first, last = words[start][1].start(), words[end - 1][1].end()
+    pieces = []
+    position = first
+    for term, match in words[start:end]:
+        if term in wanted:
+            pieces.append(text[position:match.start()])
+            pieces.append(f"»{match.group()}«")
+            position = match.end()
+    pieces.append(text[position:last])
+    excerpt = re.sub(r"\s+", " ", "".join(pieces)).strip()
+    return ("… " if start else "") + excerpt + (" …" if end < len(words) else "")
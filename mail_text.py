@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mail Text
+Wandelt HTML-Teile von E-Mails in einem Durchgang in sauberen Text: alle Entities werden
+dekodiert (&nbsp;, &#8230;, &auml; …), Leerraum innerhalb von Absätzen zusammengefasst,
+Block-Elemente werden zu Zeilen und leere Absätze (Outlook: <p>&nbsp;</p>) zu Leerzeilen.
+Inhalte von <style>, <script> und <head> fallen weg.
+"""
+
+import re
+from html.parser import HTMLParser
+from typing import List
+
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = re.compile(r"\s+")
+# Geschützte Leerzeichen werden normale Leerzeichen, unsichtbare Zeichen fallen weg
+INVISIBLE = str.maketrans({"\xa0": " ", "\u200b": None, "\ufeff": None, "\xad": None})
+
+class HTMLTextConverter(HTMLParser):
+    """HTML → Text; Daten können stückweise per feed() kommen"""
+
+    SKIP = {"style", "script", "head", "title", "template"}
+    BLOCK = {"address", "article", "blockquote", "dd", "div", "dl", "dt", "footer", "h1", "h2", "h3",
+             "h4", "h5", "h6", "header", "hr", "li", "ol", "pre", "section", "table", "tr", "ul"}
+    CELL = {"td", "th"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.lines: List[str] = []
+        self.line: List[str] = []
+        self.skip = 0
+        self.paragraph_text = False
+
+    def newline(self, blank: bool = False):
+        """Beendet die aktuelle Zeile; blank=True erzeugt eine Leerzeile, falls sie leer war"""
+        text = " ".join("".join(self.line).split())
+        self.line = []
+        if text:
+            self.lines.append(text)
+        elif blank and self.lines and self.lines[-1]:
+            self.lines.append("")
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self.skip += 1
+        elif self.skip:
+            return
+        elif tag == "br":
+            self.newline(blank=True)
+        elif tag == "p":
+            self.newline()
+            self.paragraph_text = False
+        elif tag in self.BLOCK:
+            self.newline()
+        elif tag in self.CELL:
+            self.line.append(" ")
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP:
+            self.skip = max(0, self.skip - 1)
+        elif self.skip:
+            return
+        elif tag == "p":
+            self.newline(blank=not self.paragraph_text)
+            self.paragraph_text = True
+        elif tag in self.BLOCK:
+            self.newline()
+        elif tag in self.CELL:
+            self.line.append(" ")
+
+    def handle_data(self, data):
+        if self.skip:
+            return
+        data = WHITESPACE.sub(" ", data.translate(INVISIBLE))
+        if data.strip():
+            self.paragraph_text = True
+        self.line.append(data)
+
+    def text(self) -> str:
+        self.close()
+        self.newline()
+        while self.lines and not self.lines[-1]:
+            self.lines.pop()
+        return "\n".join(self.lines)
+
+def html_to_text(html: str) -> str:
+    converter = HTMLTextConverter()
+    for start in range(0, len(html), CHUNK_SIZE):
+        converter.feed(html[start:start + CHUNK_SIZE])
+    return converter.text()
+
+def paragraphs(text: str) -> List[str]:
+    """Absätze (durch Leerzeilen getrennt), Zeilen innerhalb eines Absatzes zusammengefügt"""
+    return [" ".join(block.split()) for block in re.split(r"\n\s*\n", text) if block.strip()]
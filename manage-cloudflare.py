@@ -5,42 +5,22 @@ Cloudflare Management Tool
 Vollständiges Tool zum Verwalten von Cloudflare WAF Rules, Firewall Rules, etc.
 """
 
-import requests
+import argparse
 import json
-import sys
-import os
-from typing import Dict, List, Optional
-from pathlib import Path
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional
 
-# Lade Konfiguration
-def load_config():
-    """Lädt Cloudflare API Konfiguration"""
-    config = {}
-    
-    # 1. Versuche Config-Datei zu laden
-    config_file = Path(".cloudflare-config.json")
-    if not config_file.exists():
-        config_file = Path("cloudflare-config.json")
-    
-    if config_file.exists():
-        try:
-            with open(config_file, 'r', encoding='utf-8') as f:
-                file_config = json.load(f)
-                config.update(file_config)
-        except Exception as e:
-            print(f"⚠️ Fehler beim Laden der Config-Datei: {e}")
-    
-    # 2. Überschreibe mit Umgebungsvariablen (haben Priorität)
-    if os.getenv("CLOUDFLARE_API_TOKEN"):
-        config["api_token"] = os.getenv("CLOUDFLARE_API_TOKEN")
-    if os.getenv("CLOUDFLARE_ZONE_ID"):
-        config["zone_id"] = os.getenv("CLOUDFLARE_ZONE_ID")
-    if os.getenv("CLOUDFLARE_ACCOUNT_ID"):
-        config["account_id"] = os.getenv("CLOUDFLARE_ACCOUNT_ID")
-    if os.getenv("CLOUDFLARE_DOMAIN"):
-        config["domain"] = os.getenv("CLOUDFLARE_DOMAIN")
-    
-    return config
+import requests
+
+from cloudflare_api import (
+    OUTPUT_FORMATS, AuditIndex, CloudflareAPIError, RecordWriter, RulesetTransaction, Snapshot,
+    get_client, load_config
+)
+from rule_analyzer import (
+    PROBLEM_BOTS, PROBLEM_HOMEPAGE, RuleChanges, rate_limit_targets_homepage,
+    rule_problems, rule_summary, with_googlebot_exception
+)
 
 # Konfiguration
 config = load_config()
@@ -49,162 +29,483 @@ CLOUDFLARE_ZONE_ID = config.get("zone_id", "")
 CLOUDFLARE_ACCOUNT_ID = config.get("account_id", "")
 DOMAIN = config.get("domain", "kost-sicherheitstechnik.de")
 
+RULE_CATEGORIES = ("waf_rules", "rate_limiting", "firewall")
+
+# Zone IDs sind 32 Hex-Zeichen, alles andere in einer Zonenliste ist eine Domain
+ZONE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
 class CloudflareManager:
     def __init__(self, api_token: str, zone_id: Optional[str] = None):
         self.api_token = api_token
         self.zone_id = zone_id
-        self.headers = {
-            "Authorization": f"Bearer {api_token}",
-            "Content-Type": "application/json"
-        }
+        self.client = get_client(api_token)
     
     def get_zone_id(self, domain: str) -> Optional[str]:
         """Holt Zone ID für eine Domain"""
         if self.zone_id:
             return self.zone_id
         
-        response = requests.get(
-            f"https://api.cloudflare.com/client/v4/zones?name={domain}",
-            headers=self.headers
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            if data.get("result") and len(data["result"]) > 0:
-                return data["result"][0]["id"]
-        
-        return None
+        try:
+            return self.client.zone_id(domain)
+        except (CloudflareAPIError, requests.RequestException) as e:
+            print(f"⚠️ Zone konnte nicht gesucht werden: {e}")
+            return None
+    
+    def iter_zones(self) -> Iterator[Dict]:
+        """Liefert alle Zonen des Accounts, Seite für Seite"""
+        yield from self.client.paginate("zones", per_page=50)
+    
+    def list_zones(self) -> List[Dict]:
+        """Listet alle Zonen des Accounts (alle Seiten)"""
+        return list(self.iter_zones())
     
     def list_waf_rules(self) -> List[Dict]:
         """Listet alle WAF Custom Rules"""
         if not self.zone_id:
             self.zone_id = self.get_zone_id(DOMAIN)
         
-        # Versuche verschiedene Endpoints
-        endpoints = [
-            f"https://api.cloudflare.com/client/v4/zones/{self.zone_id}/rulesets/phases/http_request_firewall_custom/entrypoint",
-            f"https://api.cloudflare.com/client/v4/zones/{self.zone_id}/rulesets",
-        ]
+        # Der zuletzt funktionierende Endpoint der Zone wird direkt verwendet
+        response = self.client.custom_ruleset(self.zone_id)
+        if response is None:
+            return []
         
-        for endpoint in endpoints:
-            response = requests.get(endpoint, headers=self.headers)
-            if response.status_code == 200:
-                data = response.json()
-                result = data.get("result", {})
-                if isinstance(result, dict):
-                    return result.get("rules", [])
-                elif isinstance(result, list):
-                    return result
+        result = response.json().get("result", {})
+        if isinstance(result, dict):
+            return result.get("rules", [])
+        elif isinstance(result, list):
+            return result
         
         return []
     
+    def iter_rate_limiting_rules(self) -> Iterator[Dict]:
+        """Liefert alle Rate Limiting Rules, Seite für Seite"""
+        if not self.zone_id:
+            self.zone_id = self.get_zone_id(DOMAIN)
+        
+        yield from self.client.paginate(f"zones/{self.zone_id}/rate_limits", per_page=1000)
+    
     def list_rate_limiting_rules(self) -> List[Dict]:
         """Listet alle Rate Limiting Rules"""
+        return list(self.iter_rate_limiting_rules())
+    
+    def iter_firewall_rules(self) -> Iterator[Dict]:
+        """Liefert alle Firewall Rules, Seite für Seite"""
         if not self.zone_id:
             self.zone_id = self.get_zone_id(DOMAIN)
         
-        response = requests.get(
-            f"https://api.cloudflare.com/client/v4/zones/{self.zone_id}/rate_limits",
-            headers=self.headers
-        )
-        
-        if response.status_code == 200:
-            return response.json().get("result", [])
-        
-        return []
+        yield from self.client.paginate(f"zones/{self.zone_id}/firewall/rules", per_page=100)
     
     def list_firewall_rules(self) -> List[Dict]:
         """Listet alle Firewall Rules"""
-        if not self.zone_id:
-            self.zone_id = self.get_zone_id(DOMAIN)
-        
-        response = requests.get(
-            f"https://api.cloudflare.com/client/v4/zones/{self.zone_id}/firewall/rules",
-            headers=self.headers
-        )
-        
-        if response.status_code == 200:
-            return response.json().get("result", [])
-        
-        return []
+        return list(self.iter_firewall_rules())
     
     def update_waf_rule(self, rule_id: str, expression: str, action: str, description: str) -> bool:
         """Aktualisiert eine WAF Rule"""
         if not self.zone_id:
             self.zone_id = self.get_zone_id(DOMAIN)
         
-        # TODO: Implementiere Update-Logik
-        # Dies hängt von der Cloudflare API Struktur ab
-        print(f"⚠️ Update noch nicht implementiert für Rule {rule_id}")
-        return False
+        transaction = RulesetTransaction(self.client)
+        update = transaction.zone(self.zone_id)
+        if update is None or not update.replace_rule(rule_id, expression=expression, action=action, description=description):
+            print(f"❌ Rule {rule_id} nicht gefunden")
+            return False
+        
+        return transaction.apply()
     
     def add_googlebot_exception(self, rule: Dict) -> Dict:
         """Fügt Googlebot-Ausnahme zu einer Regel hinzu"""
-        expression = rule.get("expression", "")
-        
-        # Prüfe ob bereits Ausnahme vorhanden
-        if "googlebot" in expression.lower():
-            return rule
-        
-        # Füge Ausnahme hinzu
-        new_expression = f"({expression}) and not (http.user_agent contains \"Googlebot\" or http.user_agent contains \"Bingbot\" or http.user_agent contains \"Slurp\" or http.user_agent contains \"DuckDuckBot\")"
-        
         updated_rule = rule.copy()
-        updated_rule["expression"] = new_expression
+        updated_rule["expression"] = with_googlebot_exception(rule.get("expression", ""))
         
         return updated_rule
     
-    def analyze_rules(self) -> Dict:
-        """Analysiert alle Rules auf Probleme"""
+    def analyze_rules(self, waf_rules: Optional[Iterable[Dict]] = None,
+                      rate_rules: Optional[Iterable[Dict]] = None,
+                      previous: Optional[Dict[str, Dict]] = None) -> Dict:
+        """Analysiert alle Rules auf Probleme (optional mit bereits geladenen Rules)
+        
+        Mit previous (Hash-Index des letzten Audits) werden nur neue und geänderte Rules
+        analysiert; issues["changes"] enthält dann den Vergleich pro Kategorie.
+        """
         issues = {
             "waf_rules": [],
             "rate_limiting": [],
             "firewall": []
         }
+        changes = {}
         
         # WAF Rules
-        waf_rules = self.list_waf_rules()
+        if waf_rules is None:
+            waf_rules = self.list_waf_rules()
+        if previous is not None:
+            changes["waf_rules"] = RuleChanges(previous.get("waf_rules", {}), waf_rules)
+            waf_rules = changes["waf_rules"].to_analyze
+        problem_messages = {
+            PROBLEM_HOMEPAGE: "Zielt auf Startseite ohne Googlebot-Ausnahme",
+            PROBLEM_BOTS: "Blockiert Bots ohne Googlebot-Ausnahme",
+        }
         for rule in waf_rules:
-            expression = rule.get("expression", "")
-            action = rule.get("action", "")
-            
-            # Prüfe auf Probleme
-            if ("/" in expression or 'eq "/"' in expression) and "/api/contact" not in expression:
-                if "googlebot" not in expression.lower():
+            # analyze_expression() cacht pro Expression-Hash, identische Expressions
+            # werden also auch hier nur einmal geparst
+            for problem in rule_problems(rule):
+                if problem in problem_messages:
                     issues["waf_rules"].append({
                         "rule": rule,
-                        "problem": "Zielt auf Startseite ohne Googlebot-Ausnahme"
-                    })
-            
-            if ("bot" in expression.lower() or "cf.client.bot" in expression) and "googlebot" not in expression.lower():
-                if action.lower() in ["block", "challenge"]:
-                    issues["waf_rules"].append({
-                        "rule": rule,
-                        "problem": "Blockiert Bots ohne Googlebot-Ausnahme"
+                        "code": problem,
+                        "problem": problem_messages[problem]
                     })
+                    if changes:
+                        changes["waf_rules"].record(rule, problem_messages[problem])
         
         # Rate Limiting
-        rate_rules = self.list_rate_limiting_rules()
+        if rate_rules is None:
+            rate_rules = self.iter_rate_limiting_rules()
+        if previous is not None:
+            changes["rate_limiting"] = RuleChanges(previous.get("rate_limiting", {}), rate_rules)
+            rate_rules = changes["rate_limiting"].to_analyze
         for rule in rate_rules:
-            match = rule.get("match", {})
-            match_str = json.dumps(match)
-            
-            if "/" in match_str and "/api/contact" not in match_str:
+            if rate_limit_targets_homepage(rule.get("match", {})):
                 issues["rate_limiting"].append({
                     "rule": rule,
+                    "code": PROBLEM_HOMEPAGE,
                     "problem": "Zielt auf Startseite '/'"
                 })
+                if changes:
+                    changes["rate_limiting"].record(rule, "Zielt auf Startseite '/'")
         
+        if changes:
+            issues["changes"] = changes
         return issues
 
+def fix_waf_issues(results: List[Dict], dry_run: bool) -> bool:
+    """Ergänzt Googlebot-Ausnahmen für alle problematischen WAF Rules, ein PUT pro Zone"""
+    transaction = RulesetTransaction(get_client(CLOUDFLARE_API_TOKEN))
+    
+    for result in results:
+        zone_id = result["zone"]["id"]
+        for issue in result["issues"]["waf_rules"]:
+            rule = issue["rule"]
+            update = transaction.zone(zone_id)
+            if update is None:
+                print(f"⚠️ Kein Custom-Rules-Entrypoint für Zone {zone_id}")
+                break
+            update.replace_rule(rule.get("id"), expression=with_googlebot_exception(rule.get("expression", "")))
+    
+    pending = transaction.pending()
+    if not pending:
+        print("ℹ️ Keine Änderungen notwendig")
+        return True
+    
+    print(transaction.diff())
+    print()
+    
+    if dry_run:
+        print(f"ℹ️ Dry-Run: {len(pending)} Zonen würden aktualisiert")
+        return True
+    
+    if transaction.apply():
+        print(f"✅ {len(pending)} Zonen aktualisiert")
+        return True
+    return False
+
+def resolve_zones(manager: CloudflareManager, spec: str) -> List[Dict]:
+    """Bestimmt die zu prüfenden Zonen aus 'all' oder einer Datei (eine Domain/Zone ID pro Zeile)"""
+    client = manager.client
+    if spec == "all":
+        zones = manager.list_zones()
+        client.zones.remember_zones(zones)
+        return zones
+    
+    entries = []
+    with open(spec, 'r', encoding='utf-8') as f:
+        for line in f:
+            entry = line.strip()
+            if entry and not entry.startswith("#"):
+                entries.append(entry)
+    
+    # Zone IDs direkt übernehmen, alle Domains gemeinsam (gecacht) auflösen
+    domains = [entry for entry in entries if not ZONE_ID_PATTERN.match(entry)]
+    zone_ids = client.zone_ids(domains) if domains else {}
+    
+    selected = []
+    for entry in entries:
+        if ZONE_ID_PATTERN.match(entry):
+            selected.append({"id": entry, "name": client.zones.zone_name(entry) or entry})
+        elif zone_ids.get(entry.lower()):
+            selected.append({"id": zone_ids[entry.lower()], "name": entry.lower()})
+        else:
+            print(f"⚠️ Zone nicht im Account gefunden: {entry}")
+    
+    return selected
+
+def audit_zones(zones: List[Dict], workers: int, audit_index: Optional[AuditIndex] = None,
+                writer: Optional[RecordWriter] = None) -> List[Dict]:
+    """Lädt die Rules aller Zonen parallel und analysiert sie (mit audit_index nur Änderungen)
+    
+    Mit einem strukturierten writer wird jede Zone gestreamt, sobald sie fertig ist, und
+    ihre Rule-Listen werden danach verworfen; im Ergebnis bleiben nur Anzahlen und Probleme.
+    """
+    managers = [CloudflareManager(CLOUDFLARE_API_TOKEN, zone["id"]) for zone in zones]
+    
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Alle Listen-Requests aller Zonen gehen gleichzeitig in denselben Pool
+        futures = [
+            (
+                pool.submit(manager.list_waf_rules),
+                pool.submit(manager.list_rate_limiting_rules),
+                pool.submit(manager.list_firewall_rules),
+            )
+            for manager in managers
+        ]
+        
+        results = []
+        for zone, manager, (waf, rate, firewall) in zip(zones, managers, futures):
+            try:
+                waf_rules = waf.result()
+                rate_rules = rate.result()
+                previous = audit_index.zone(zone["id"]) if audit_index is not None else None
+                issues = manager.analyze_rules(waf_rules, rate_rules, previous)
+                results.append({
+                    "zone": zone,
+                    "waf_rules": waf_rules,
+                    "rate_limiting": rate_rules,
+                    "firewall": firewall.result(),
+                    "issues": issues
+                })
+                # Nur vollständig geprüfte Zonen gehen in den Index
+                for category, changes in issues.get("changes", {}).items():
+                    audit_index.update(zone["id"], category, changes.index)
+            except (CloudflareAPIError, requests.RequestException) as e:
+                # Unvollständige Daten dürfen nie als "keine Probleme" erscheinen;
+                # Timeouts einer Zone brechen den Bericht der übrigen nicht ab
+                results.append({
+                    "zone": zone,
+                    "error": str(e),
+                    "waf_rules": [],
+                    "rate_limiting": [],
+                    "firewall": [],
+                    "issues": {"waf_rules": [], "rate_limiting": [], "firewall": []}
+                })
+            
+            result = results[-1]
+            result["counts"] = {key: len(result[key]) for key in RULE_CATEGORIES}
+            if writer is not None and writer.structured:
+                emit_zone_records(writer, result)
+                for key in RULE_CATEGORIES:
+                    result[key] = []
+    
+    return results
+
+def emit_zone_records(writer: RecordWriter, result: Dict):
+    """Datensätze einer Zone: Rules, Probleme, entfernte Rules bzw. der Fehler"""
+    zone = {"zone_id": result["zone"]["id"], "zone": result["zone"]["name"]}
+    if result.get("error"):
+        writer.emit("error", **dict(zone, message=result["error"]))
+        return
+    
+    issues = result["issues"]
+    changes = issues.get("changes")
+    for category in RULE_CATEGORIES:
+        if changes is None:
+            rules = [(rule, None) for rule in result[category]]
+        elif category in changes:
+            # Inkrementell: nur analysierte Rules ausgeben
+            rules = ([(rule, "added") for rule in changes[category].added]
+                     + [(rule, "changed") for rule in changes[category].changed])
+        else:
+            rules = []
+        
+        for rule, change in rules:
+            record = dict(zone, category=category, **rule_summary(rule))
+            if change:
+                record["change"] = change
+            writer.emit("rule", **record)
+        
+        if changes is not None and category in changes:
+            for entry in changes[category].removed:
+                writer.emit("removed", **dict(zone, category=category, rule_id=entry["id"],
+                                              description=entry.get("description", ""),
+                                              problems=entry.get("problems", [])))
+        
+        for issue in issues[category]:
+            writer.emit("issue", **dict(zone, category=category, rule_id=issue["rule"].get("id", ""),
+                                        description=issue["rule"].get("description", ""),
+                                        problem=issue["code"], message=issue["problem"]))
+
+def print_zone_changes(changes: Dict[str, RuleChanges]):
+    """Kurzfassung eines inkrementellen Laufs: nur Neues, Geändertes und Entferntes"""
+    for key, label in (("waf_rules", "WAF"), ("rate_limiting", "Rate Limiting")):
+        change = changes[key]
+        print(f"  Δ {label}: +{len(change.added)} ~{len(change.changed)} -{len(change.removed)} "
+              f"({change.unchanged} unverändert, {change.known_problems} bekannte Probleme)")
+        for entry in change.removed:
+            print(f"  ➖ {label}: {entry.get('description') or entry['id']} entfernt"
+                  + (f" (hatte: {', '.join(entry['problems'])})" if entry.get("problems") else ""))
+
+def print_zone_report(results: List[Dict]):
+    """Gibt den zusammengeführten Bericht über alle Zonen aus"""
+    total_issues = 0
+    known_issues = 0
+    incremental = False
+    failed = 0
+    unchanged = 0
+    
+    for result in results:
+        issues = result["issues"]
+        zone_issues = len(issues["waf_rules"]) + len(issues["rate_limiting"]) + len(issues["firewall"])
+        total_issues += zone_issues
+        if "changes" in issues:
+            incremental = True
+            known_issues += sum(change.known_problems for change in issues["changes"].values())
+        
+        # Inkrementell: Zonen ohne Änderungen seit dem letzten Lauf nicht ausgeben
+        if "changes" in issues and not any(issues["changes"].values()):
+            unchanged += 1
+            continue
+        
+        print("=" * 60)
+        print(f"{result['zone']['name']} ({result['zone']['id']})")
+        print("=" * 60)
+        if result.get("error"):
+            failed += 1
+            print(f"  ❌ Zone konnte nicht geprüft werden: {result['error']}")
+            print()
+            continue
+        
+        counts = result["counts"]
+        print(f"  WAF Rules: {counts['waf_rules']}, "
+              f"Rate Limiting: {counts['rate_limiting']}, "
+              f"Firewall: {counts['firewall']}")
+        
+        changes = issues.get("changes")
+        if changes is not None:
+            print_zone_changes(changes)
+            if zone_issues == 0 and any(changes.values()):
+                print("  ✅ Keine neuen Probleme")
+        elif zone_issues == 0:
+            print("  ✅ Keine Probleme gefunden")
+        for key, label in (("waf_rules", "WAF"), ("rate_limiting", "Rate Limiting"), ("firewall", "Firewall")):
+            for issue in issues[key]:
+                print(f"  ⚠️ {label}: {issue['rule'].get('description', 'Unbenannt')}: {issue['problem']}")
+        print()
+    
+    print("=" * 60)
+    print("Zusammenfassung")
+    print("=" * 60)
+    if incremental:
+        print(f"{len(results) - failed} Zonen geprüft, {total_issues} neue Probleme, "
+              f"{known_issues} bekannte Probleme in unveränderten Rules")
+    else:
+        print(f"{len(results) - failed} Zonen geprüft, {total_issues} Probleme gefunden")
+    if unchanged:
+        print(f"ℹ️ {unchanged} Zonen unverändert seit dem letzten Lauf")
+    if failed:
+        print(f"❌ {failed} Zonen konnten nicht geprüft werden")
+    print(f"📊 {get_client(CLOUDFLARE_API_TOKEN).scheduler.summary()}")
+
+def audit_account(spec: str, workers: int, fix: bool = False, dry_run: bool = False,
+                  incremental: bool = False, writer: Optional[RecordWriter] = None):
+    """Multi-Zonen-Audit über den ganzen Account oder eine Zonenliste"""
+    manager = CloudflareManager(CLOUDFLARE_API_TOKEN)
+    
+    print("🔍 Lade Zonen...")
+    try:
+        zones = resolve_zones(manager, spec)
+    except (CloudflareAPIError, requests.RequestException) as e:
+        print(f"❌ Zonen konnten nicht geladen werden: {e}")
+        if writer is not None:
+            writer.emit("error", message=str(e))
+        return
+    if not zones:
+        print("❌ Keine Zonen gefunden!")
+        return
+    
+    print(f"✅ {len(zones)} Zonen gefunden, analysiere mit {workers} Workern...")
+    print()
+    
+    audit_index = AuditIndex() if incremental else None
+    results = audit_zones(zones, workers, audit_index, writer)
+    print_zone_report(results)
+    if audit_index is not None:
+        audit_index.save()
+    if writer is not None:
+        writer.emit("summary",
+                    zones=len(results),
+                    failed=sum(1 for result in results if result.get("error")),
+                    issues=sum(len(result["issues"][key]) for result in results for key in RULE_CATEGORIES),
+                    api=get_client(CLOUDFLARE_API_TOKEN).scheduler.metrics)
+    
+    if fix:
+        print()
+        fix_waf_issues(results, dry_run)
+
+def export_snapshot(zones: List[Dict], path: str):
+    """Speichert die Rules der Zonen als Snapshot für --from-snapshot"""
+    print(f"📦 Exportiere {len(zones)} Zonen...")
+    try:
+        snapshot = Snapshot.capture(get_client(CLOUDFLARE_API_TOKEN), zones)
+    except (CloudflareAPIError, requests.RequestException) as e:
+        print(f"❌ Snapshot unvollständig, nichts gespeichert: {e}")
+        return
+    
+    snapshot.save(path)
+    rules = sum(len(zone["ruleset"].get("rules", []))
+                for zone in snapshot.zones if isinstance(zone["ruleset"], dict))
+    print(f"✅ Snapshot gespeichert: {path} ({len(snapshot.zones)} Zonen, {rules} WAF Rules)")
+
 def main():
+    parser = argparse.ArgumentParser(description="Cloudflare Management Tool")
+    parser.add_argument("--zones", metavar="DATEI|all",
+                        help="Mehrere Zonen prüfen: 'all' für alle Zonen des Accounts "
+                             "oder Datei mit einer Domain/Zone ID pro Zeile")
+    parser.add_argument("--workers", type=int, default=8,
+                        help="Anzahl paralleler API-Requests im Multi-Zonen-Modus (Standard: 8)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Lokalen Antwort-Cache komplett deaktivieren")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Gecachte Antworten neu laden (Cache wird aktualisiert)")
+    parser.add_argument("--fix", action="store_true",
+                        help="Googlebot-Ausnahmen für alle problematischen WAF Rules ergänzen (ein PUT pro Zone)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Mit --fix: nur den Diff anzeigen, nichts schreiben")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Mit --zones: nur seit dem letzten Lauf neue, geänderte oder entfernte "
+                             "Rules analysieren und melden")
+    parser.add_argument("--export-snapshot", metavar="DATEI",
+                        help="Rules der Zone(n) als Snapshot speichern (Endung .gz: komprimiert)")
+    parser.add_argument("--from-snapshot", metavar="DATEI",
+                        help="Offline aus einem Snapshot analysieren, ohne API-Requests")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="text",
+                        help="json/ndjson: ein Datensatz pro Rule und Problem auf stdout, "
+                             "pro Zone gestreamt (Text geht nach stderr)")
+    args = parser.parse_args()
+    if args.incremental and (args.fix or not args.zones):
+        parser.error("--incremental geht nur mit --zones und ohne --fix "
+                     "(bekannte Probleme würden sonst nicht gefixt)")
+    
+    with RecordWriter(args.format) as writer:
+        run(args, writer)
+
+def run(args, writer: RecordWriter):
+    """Führt den per Kommandozeile gewählten Modus aus"""
+    client = get_client(CLOUDFLARE_API_TOKEN)
+    client.cache.enabled = not args.no_cache
+    client.cache.refresh = args.refresh
+    
+    snapshot = None
+    if args.from_snapshot:
+        snapshot = client.use_snapshot(args.from_snapshot)
+        if args.fix and not args.dry_run:
+            print("ℹ️ Snapshot ist schreibgeschützt, --fix läuft als Dry-Run")
+            args.dry_run = True
+    
     print("=" * 60)
     print("Cloudflare Management Tool")
     print("=" * 60)
     print()
     
-    # API Token prüfen
-    if not CLOUDFLARE_API_TOKEN:
+    # API Token prüfen (Snapshots brauchen keinen)
+    if not CLOUDFLARE_API_TOKEN and not snapshot:
         print("❌ FEHLER: CLOUDFLARE_API_TOKEN nicht konfiguriert!")
         print()
         print("Führe zuerst das Setup-Script aus:")
@@ -213,8 +514,22 @@ def main():
         print("Oder siehe CLOUDFLARE-API-FULL-SETUP.md für Details")
         return
     
+    if args.export_snapshot and args.zones:
+        try:
+            zones = resolve_zones(CloudflareManager(CLOUDFLARE_API_TOKEN), args.zones)
+        except (CloudflareAPIError, requests.RequestException) as e:
+            print(f"❌ Zonen konnten nicht geladen werden: {e}")
+            return
+        export_snapshot(zones, args.export_snapshot)
+        return
+    
+    if args.zones:
+        audit_account(args.zones, max(1, args.workers), args.fix, args.dry_run, args.incremental, writer)
+        return
+    
     # Manager erstellen
-    manager = CloudflareManager(CLOUDFLARE_API_TOKEN, CLOUDFLARE_ZONE_ID)
+    zone_id = snapshot.zone_id(CLOUDFLARE_ZONE_ID, DOMAIN) if snapshot else CLOUDFLARE_ZONE_ID
+    manager = CloudflareManager(CLOUDFLARE_API_TOKEN, zone_id)
     
     if not manager.zone_id:
         manager.zone_id = manager.get_zone_id(DOMAIN)
@@ -226,11 +541,33 @@ def main():
     print(f"✅ Zone ID: {manager.zone_id}")
     print()
     
+    if args.export_snapshot:
+        export_snapshot([{"id": manager.zone_id, "name": DOMAIN}], args.export_snapshot)
+        return
+    
     # Analysiere Rules
     print("🔍 Analysiere alle Rules...")
     print()
     
-    issues = manager.analyze_rules()
+    zone = {"id": manager.zone_id, "name": DOMAIN}
+    try:
+        waf_rules = manager.list_waf_rules()
+        # Für Datensätze werden die Rate Limiting Rules gebraucht, sonst nur gestreamt geprüft
+        rate_rules = manager.list_rate_limiting_rules() if writer.structured else None
+        issues = manager.analyze_rules(waf_rules, rate_rules)
+    except (CloudflareAPIError, requests.RequestException) as e:
+        print(f"❌ Rules konnten nicht vollständig geladen werden: {e}")
+        print(f"📊 {manager.client.scheduler.summary()}")
+        emit_zone_records(writer, {"zone": zone, "error": str(e)})
+        return
+    
+    emit_zone_records(writer, {
+        "zone": zone,
+        "waf_rules": waf_rules,
+        "rate_limiting": rate_rules or [],
+        "firewall": [],
+        "issues": issues
+    })
     
     total_issues = len(issues["waf_rules"]) + len(issues["rate_limiting"]) + len(issues["firewall"])
     
@@ -258,7 +595,6 @@ def main():
     print("Alle WAF Rules")
     print("=" * 60)
     
-    waf_rules = manager.list_waf_rules()
     if waf_rules:
         for i, rule in enumerate(waf_rules, 1):
             print(f"\n{i}. {rule.get('description', 'Unbenannt')}")
@@ -266,6 +602,13 @@ def main():
             print(f"   Action: {rule.get('action', 'N/A')}")
     else:
         print("Keine WAF Rules gefunden")
+    
+    print()
+    print(f"📊 {manager.client.scheduler.summary()}")
+    
+    if args.fix:
+        print()
+        fix_waf_issues([{"zone": {"id": manager.zone_id}, "issues": issues}], args.dry_run)
 
 if __name__ == "__main__":
     main()
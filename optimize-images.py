@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Image Optimizer
+Erzeugt aus allen JPG/PNG in images/ verkleinerte WebP- und AVIF-Varianten (parallel
+über alle Kerne) und schreibt sie mit Manifest nach images/variants/. Unveränderte
+Bilder (gleicher Inhalts-Hash) werden übersprungen. Mit --rewrite werden die <img>-Tags
+in index.html und pages/*.html in <picture> mit srcset umgeschrieben.
+
+Benötigt Pillow (pip install Pillow); AVIF ab Pillow 11.2 oder mit pillow-avif-plugin.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from html_checks import Document, resolve_reference, site_pages
+
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+IMAGE_DIR = Path("images")
+VARIANT_DIR = IMAGE_DIR / "variants"
+MANIFEST_FILE = VARIANT_DIR / "manifest.json"
+
+SOURCE_SUFFIXES = (".jpg", ".jpeg", ".png")
+DEFAULT_WIDTHS = (480, 960, 1440)
+# Reihenfolge = Reihenfolge der <source>-Tags; der Browser nimmt das erste Format, das er kann
+FORMATS = {
+    "avif": {"quality": 50},
+    "webp": {"quality": 80, "method": 6},
+}
+MIME_TYPES = {"avif": "image/avif", "webp": "image/webp"}
+# Nur für Bilder, deren Anzeigebreite weder aus width, sizes noch style hervorgeht
+DEFAULT_SIZES = "100vw"
+PIXELS = re.compile(r"^([\d.]+)(?:px)?$")
+
+def load_pillow() -> Tuple[object, List[str]]:
+    """Pillow-Image-Modul und die Formate, die es schreiben kann"""
+    from PIL import Image, features
+
+    try:
+        import pillow_avif  # noqa: F401 - registriert AVIF bei älteren Pillow-Versionen
+    except ImportError:
+        pass
+
+    formats = ["webp"] if features.check("webp") else []
+    try:
+        if features.check("avif"):
+            formats.insert(0, "avif")
+    except ValueError:
+        # Pillow < 11.2 kennt das Feature nicht; das Plugin trägt sich trotzdem ein
+        if "AVIF" in Image.SAVE:
+            formats.insert(0, "avif")
+    return Image, formats
+
+def file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def variant_path(source: Path, width: int, fmt: str) -> Path:
+    """images/logos/x.png -> images/variants/logos/x.png-480w.webp
+
+    Die Endung bleibt im Namen, sonst überschreiben sich x.png und x.jpg gegenseitig.
+    """
+    relative = source.relative_to(IMAGE_DIR)
+    return VARIANT_DIR / relative.parent / f"{relative.name}-{width}w.{fmt}"
+
+def target_widths(width: int, widths) -> List[int]:
+    """Breiten bis zur Originalbreite; nie hochskalieren"""
+    return sorted({min(w, width) for w in widths})
+
+def encode(source: str, digest: str, widths: Tuple[int, ...], formats: Tuple[str, ...]) -> Dict:
+    """Erzeugt alle Varianten eines Bildes (läuft im Worker-Prozess)"""
+    Image, _ = load_pillow()
+    from PIL import ImageOps
+
+    path = Path(source)
+    with Image.open(path) as original:
+        image = ImageOps.exif_transpose(original)
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+    entry = {"hash": digest, "width": image.width, "height": image.height,
+             "widths": list(widths), "formats": list(formats), "variants": []}
+    for width in target_widths(image.width, widths):
+        height = round(image.height * width / image.width)
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        for fmt in formats:
+            target = variant_path(path, width, fmt)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            resized.save(target, fmt.upper(), **FORMATS[fmt])
+            entry["variants"].append({"path": target.as_posix(), "width": width, "height": height,
+                                      "format": fmt, "size": target.stat().st_size})
+    return entry
+
+def load_manifest() -> Dict[str, Dict]:
+    if MANIFEST_FILE.exists():
+        try:
+            return json.loads(MANIFEST_FILE.read_text(encoding="utf-8"))
+        except ValueError:
+            print(f"⚠️ {MANIFEST_FILE} ist beschädigt, alle Bilder werden neu erzeugt")
+    return {}
+
+def save_manifest(manifest: Dict[str, Dict]):
+    MANIFEST_FILE.parent.mkdir(parents=True, exist_ok=True)
+    temp = MANIFEST_FILE.with_suffix(".tmp")
+    temp.write_text(json.dumps(manifest, indent=2, sort_keys=True, ensure_ascii=False) + "\n", encoding="utf-8")
+    temp.replace(MANIFEST_FILE)
+
+def is_current(entry: Optional[Dict], source: Path, digest: str, widths, formats) -> bool:
+    # Varianten unter einem alten Namensschema werden neu erzeugt
+    return bool(entry) and entry["hash"] == digest and entry.get("widths") == list(widths) \
+        and entry.get("formats") == list(formats) \
+        and all(variant["path"] == variant_path(source, variant["width"], variant["format"]).as_posix()
+                and Path(variant["path"]).exists() for variant in entry["variants"])
+
+def remove_variants(entry: Dict, keep=()):
+    for variant in entry.get("variants", []):
+        if variant["path"] not in keep:
+            Path(variant["path"]).unlink(missing_ok=True)
+
+def find_sources() -> List[Path]:
+    return sorted(
+        path for path in IMAGE_DIR.rglob("*")
+        if path.suffix.lower() in SOURCE_SUFFIXES and VARIANT_DIR not in path.parents
+    )
+
+def build(manifest: Dict[str, Dict], widths, formats, workers: int, force: bool) -> Tuple[int, int, int]:
+    """Aktualisiert Varianten und Manifest: (neu erzeugt, übersprungen, fehlgeschlagen)"""
+    sources = find_sources()
+    keys = {source.as_posix() for source in sources}
+
+    for key in [key for key in manifest if key not in keys]:
+        print(f"🗑️ {key} gelöscht, entferne Varianten")
+        remove_variants(manifest.pop(key))
+
+    jobs = {}
+    for source in sources:
+        digest = file_hash(source)
+        if force or not is_current(manifest.get(source.as_posix()), source, digest, widths, formats):
+            jobs[source.as_posix()] = digest
+
+    built = failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(encode, key, digest, tuple(widths), tuple(formats)): key
+            for key, digest in jobs.items()
+        }
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                entry = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"❌ {key}: {e}")
+                continue
+
+            if key in manifest:
+                remove_variants(manifest[key], keep={variant["path"] for variant in entry["variants"]})
+            manifest[key] = entry
+            built += 1
+            largest = max(variant["width"] for variant in entry["variants"])
+            best = min(variant["size"] for variant in entry["variants"] if variant["width"] == largest)
+            print(f"✓ {key}: {len(entry['variants'])} Varianten, {Path(key).stat().st_size / 1024:.0f} KB -> "
+                  f"{best / 1024:.0f} KB bei {largest}px")
+
+    return built, len(sources) - len(jobs), failed
+
+def picture_markup(img_tag: str, entry: Dict, page: Path, sizes: str) -> str:
+    """<picture> mit je einem <source> pro Format um das unveränderte <img>"""
+    sources = []
+    for fmt in FORMATS:
+        variants = [variant for variant in entry["variants"] if variant["format"] == fmt]
+        if not variants:
+            continue
+        srcset = ", ".join(
+            f"{Path(os.path.relpath(variant['path'], page.parent)).as_posix()} {variant['width']}w"
+            for variant in sorted(variants, key=lambda v: v["width"])
+        )
+        sources.append(f'<source type="{MIME_TYPES[fmt]}" srcset="{srcset}" sizes="{sizes}">')
+    return "<picture>" + "".join(sources) + img_tag + "</picture>"
+
+def image_sizes(img, entry: Dict, default: str) -> str:
+    """sizes für ein <img>: vorhandenes sizes, sonst die Pixelbreite aus width bzw. style
+
+    Bei fester Höhe und automatischer Breite (Logos) wird die Breite über das
+    Seitenverhältnis des Originals bestimmt; nur ohne Angaben gilt default.
+    """
+    if img.get("sizes"):
+        return img.get("sizes")
+    style = dict(
+        (name.strip().lower(), value.strip().lower())
+        for name, _, value in (item.partition(":") for item in (img.get("style") or "").split(";"))
+        if value.strip()
+    )
+
+    def pixels(value: Optional[str]) -> Optional[float]:
+        match = PIXELS.match(value or "")
+        return float(match.group(1)) if match else None
+
+    # CSS im style-Attribut hat Vorrang vor den HTML-Attributen
+    width = pixels(style["width"]) if "width" in style else pixels(img.get("width"))
+    if width:
+        return f"{round(width)}px"
+    height = pixels(style["height"]) if "height" in style else pixels(img.get("height"))
+    if style.get("width", "auto") == "auto" and height and entry.get("width") and entry.get("height"):
+        return f"{round(height * entry['width'] / entry['height'])}px"
+    return default
+
+def rewrite_page(page: Path, manifest: Dict[str, Dict], default_sizes: str) -> Tuple[str, int]:
+    """Seite mit <picture> statt einzelner <img>-Tags: (neuer Quelltext, Anzahl Ersetzungen)"""
+    html = page.read_text(encoding="utf-8")
+    document = Document(html, page)
+
+    replacements = []
+    for img in document.by_tag.get("img", []):
+        ancestor = img.parent
+        while ancestor is not None and ancestor.tag != "picture":
+            ancestor = ancestor.parent
+        if ancestor is not None or img.get("srcset"):
+            continue
+        target = resolve_reference(img.get("src"), page)
+        entry = manifest.get(target.as_posix()) if target else None
+        if not entry or not entry["variants"]:
+            continue
+        markup = picture_markup(img.start_tag, entry, page, image_sizes(img, entry, default_sizes))
+        replacements.append((img.offset, img.offset + len(img.start_tag), markup))
+
+    # Von hinten ersetzen, damit die Offsets davor gültig bleiben
+    for start, end, markup in sorted(replacements, reverse=True):
+        html = html[:start] + markup + html[end:]
+    return html, len(replacements)
+
+def main():
+    parser = argparse.ArgumentParser(description="Erzeugt WebP/AVIF-Varianten aller Bilder in images/")
+    parser.add_argument("--widths", default=",".join(map(str, DEFAULT_WIDTHS)),
+                        help=f"Zielbreiten in Pixeln (Standard: {','.join(map(str, DEFAULT_WIDTHS))})")
+    parser.add_argument("--formats", default=",".join(FORMATS),
+                        help=f"Kommagetrennt aus {', '.join(FORMATS)} (Standard: alle unterstützten)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Parallele Prozesse (Standard: Anzahl Kerne)")
+    parser.add_argument("--force", action="store_true", help="Alle Varianten neu erzeugen")
+    parser.add_argument("--rewrite", action="store_true",
+                        help="Danach <img>-Tags in index.html und pages/*.html durch <picture> ersetzen")
+    parser.add_argument("--rewrite-only", action="store_true",
+                        help="Nur umschreiben, vorhandenes Manifest verwenden")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"sizes für <img> ohne sizes, width oder Breite im style (Standard: {DEFAULT_SIZES})")
+    parser.add_argument("--dry-run", action="store_true", help="Beim Umschreiben nur anzeigen, nichts speichern")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("KOST IMAGE OPTIMIZER")
+    print("=" * 60)
+
+    manifest = load_manifest()
+
+    if not args.rewrite_only:
+        try:
+            _, supported = load_pillow()
+        except ImportError:
+            print("❌ Pillow nicht installiert. Installiere mit: pip install Pillow")
+            sys.exit(2)
+
+        formats = [fmt.strip() for fmt in args.formats.split(",") if fmt.strip()]
+        unknown = [fmt for fmt in formats if fmt not in FORMATS]
+        if unknown:
+            parser.error(f"Unbekannte Formate: {', '.join(unknown)}")
+        for fmt in [fmt for fmt in formats if fmt not in supported]:
+            print(f"⚠️ {fmt.upper()} wird von dieser Pillow-Installation nicht unterstützt, übersprungen "
+                  f"(AVIF: pip install pillow-avif-plugin)")
+        formats = [fmt for fmt in formats if fmt in supported]
+        if not formats:
+            print("❌ Kein Zielformat verfügbar")
+            sys.exit(2)
+        widths = sorted({int(width) for width in args.widths.split(",") if width.strip()})
+
+        start = time.perf_counter()
+        built, skipped, failed = build(manifest, widths, formats, max(1, args.workers), args.force)
+        save_manifest(manifest)
+        print(f"\n📦 {built} Bilder neu erzeugt, {skipped} unverändert übersprungen, {failed} Fehler "
+              f"({time.perf_counter() - start:.1f}s)")
+
+        if failed:
+            sys.exit(1)
+
+    if args.rewrite or args.rewrite_only:
+        if not manifest:
+            print(f"❌ Kein Manifest ({MANIFEST_FILE}), zuerst ohne --rewrite-only ausführen")
+            sys.exit(2)
+        print()
+        total = 0
+        for page in site_pages():
+            html, count = rewrite_page(Path(page), manifest, args.sizes)
+            if not count:
+                continue
+            total += count
+            if not args.dry_run:
+                Path(page).write_text(html, encoding="utf-8")
+            print(f"{'🔍' if args.dry_run else '✏️'} {page}: {count} <img> -> <picture>")
+        print(f"\n{total} Bilder umgeschrieben" + (" (Dry Run, nichts gespeichert)" if args.dry_run else ""))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Googlebot Reachability Prober
+Ruft alle URLs aus sitemap.xml parallel mit Crawler-User-Agents ab und meldet
+Status und Latenz pro URL – prüft nach WAF-Änderungen, ob Crawler noch durchkommen
+"""
+
+import argparse
+import statistics
+import sys
+
+from site_probe import (
+    DEFAULT_WORKERS, PRODUCTION_URL, SITEMAP_FILE, create_session, fetch_all, format_result,
+    load_sitemap, rebase_url
+)
+
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+CRAWLER_AGENTS = {
+    "googlebot": "Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)",
+    "googlebot-smartphone": (
+        "Mozilla/5.0 (Linux; Android 6.0.1; Nexus 5X Build/MMB29P) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/126.0.6478.126 Mobile Safari/537.36 "
+        "(compatible; Googlebot/2.1; +http://www.google.com/bot.html)"
+    ),
+    "bingbot": "Mozilla/5.0 (compatible; bingbot/2.0; +http://www.bing.com/bingbot.htm)",
+    # Zum Vergleich: kommt ein Browser durch, der Crawler aber nicht, blockiert eine Bot-Regel
+    "browser": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
+    ),
+}
+DEFAULT_AGENTS = ("googlebot", "googlebot-smartphone")
+
+# Adresse aus Googles Crawler-Bereich 66.249.64.0/19
+GOOGLEBOT_IP = "66.249.66.1"
+
+def crawler_headers(agent: str, simulate_ip: bool) -> dict:
+    """Request-Header eines Crawlers, optional mit Googlebot-IP für einen lokalen Ersatzserver
+
+    Die echte Quell-IP lässt sich nicht fälschen; ein lokaler Server (oder Worker), der
+    CF-Connecting-IP bzw. X-Forwarded-For auswertet, sieht so aber einen verifizierten Crawler.
+    """
+    headers = {
+        "User-Agent": CRAWLER_AGENTS[agent],
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "Accept-Encoding": "gzip, deflate",
+    }
+    if simulate_ip and agent.startswith("googlebot"):
+        headers.update({
+            "CF-Connecting-IP": GOOGLEBOT_IP,
+            "X-Forwarded-For": GOOGLEBOT_IP,
+            "True-Client-IP": GOOGLEBOT_IP,
+        })
+    return headers
+
+def print_summary(results, agents):
+    """Zusammenfassung pro User Agent; liefert True, wenn alle Crawler-Requests 200 ergaben"""
+    print()
+    print("=" * 60)
+    print("Zusammenfassung")
+    print("=" * 60)
+
+    all_ok = True
+    for agent in agents:
+        agent_results = [result for result in results if result["agent"] == agent]
+        failed = [result for result in agent_results if result["status"] != 200]
+        latencies = [result["ttfb"] for result in agent_results if result["ttfb"] is not None]
+
+        line = f"{agent}: {len(agent_results) - len(failed)}/{len(agent_results)} OK"
+        if latencies:
+            line += (f", TTFB Median {statistics.median(latencies) * 1000:.0f}ms, "
+                     f"Max {max(latencies) * 1000:.0f}ms")
+        print(("✅ " if not failed else "❌ ") + line)
+
+        for result in sorted(failed, key=lambda r: r["url"]):
+            print(f"   {result['status'] or 'ERR'} {result['url']}")
+
+        if failed and agent != "browser":
+            all_ok = False
+
+    return all_ok
+
+def main():
+    parser = argparse.ArgumentParser(description="Prüft, ob Crawler alle Sitemap-URLs erreichen")
+    parser.add_argument("--sitemap", default=SITEMAP_FILE,
+                        help=f"Sitemap-Datei oder -URL (Standard: {SITEMAP_FILE})")
+    parser.add_argument("--base-url", metavar="URL",
+                        help="Statt Produktion diesen Server abfragen, z.B. http://localhost:8000 "
+                             "(Pfade aus der Sitemap bleiben erhalten)")
+    parser.add_argument("--agents", default=",".join(DEFAULT_AGENTS),
+                        help=f"Kommagetrennt aus {', '.join(CRAWLER_AGENTS)} oder 'all' "
+                             f"(Standard: {','.join(DEFAULT_AGENTS)})")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Parallele Requests (Standard: {DEFAULT_WORKERS})")
+    parser.add_argument("--no-ip-simulation", action="store_true",
+                        help="Mit --base-url keine Googlebot-IP in CF-Connecting-IP/X-Forwarded-For senden")
+    args = parser.parse_args()
+
+    agents = list(CRAWLER_AGENTS) if args.agents == "all" else [a.strip() for a in args.agents.split(",")]
+    unknown = [agent for agent in agents if agent not in CRAWLER_AGENTS]
+    if unknown:
+        parser.error(f"Unbekannte User Agents: {', '.join(unknown)}")
+
+    workers = max(1, args.workers)
+    session = create_session(workers)
+
+    print("=" * 60)
+    print("Googlebot Reachability Prober")
+    print("=" * 60)
+
+    try:
+        urls = load_sitemap(args.sitemap, session)
+    except Exception as e:
+        print(f"❌ Sitemap konnte nicht gelesen werden: {e}")
+        sys.exit(2)
+
+    if args.base_url:
+        urls = [rebase_url(url, args.base_url) for url in urls]
+    # IP-Header nur an einen lokalen Ersatzserver, Produktion bekommt echte Crawler-Requests
+    simulate_ip = bool(args.base_url) and not args.no_ip_simulation
+
+    print(f"🔍 {len(urls)} URLs × {len(agents)} User Agents gegen {args.base_url or PRODUCTION_URL}")
+    if simulate_ip:
+        print(f"   (simulierte Googlebot-IP {GOOGLEBOT_IP})")
+    print()
+
+    jobs = [
+        (url, crawler_headers(agent, simulate_ip), {"agent": agent})
+        for url in urls for agent in agents
+    ]
+
+    results = []
+    for result in fetch_all(session, jobs, workers):
+        results.append(result)
+        print(f"{result['agent']:<21}{format_result(result)}")
+
+    session.close()
+    sys.exit(0 if print_summary(results, agents) else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,675 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cloudflare Rule Expression Analyzer
+Parser für die Cloudflare Rules Language und Analyse auf Googlebot-Blockierungen
+"""
+
+import fnmatch
+import hashlib
+import json
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Actions, die einen Crawler aussperren
+BLOCKING_ACTIONS = ("block", "challenge", "js_challenge", "managed_challenge")
+
+PATH_FIELDS = (
+    "http.request.uri.path",
+    "raw.http.request.uri.path",
+    "http.request.uri",
+    "raw.http.request.uri",
+)
+
+BOT_FIELDS = (
+    "cf.client.bot",
+    "cf.bot_management.verified_bot",
+    "cf.verified_bot_category",
+    "cf.bot_management.score",
+    "cf.bot_management.static_resource",
+)
+
+BOT_UA_PATTERN = re.compile(r"bot|crawl|spider|slurp", re.IGNORECASE)
+
+# Wie ein verifizierter Googlebot-Request aus Sicht der Rules Language aussieht.
+# Felder, die hier fehlen (z.B. ip.src), gelten bei der Auswertung als unbekannt.
+GOOGLEBOT_REQUEST = {
+    "http.request.method": "GET",
+    "http.request.version": "HTTP/1.1",
+    "http.host": "www.kost-sicherheitstechnik.de",
+    "http.user_agent": "Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)",
+    "cf.client.bot": True,
+    "cf.bot_management.verified_bot": True,
+    "cf.verified_bot_category": "Search Engine Crawler",
+    "cf.threat_score": 0,
+    "ip.src.country": "US",
+    "ip.geoip.country": "US",
+    "ip.src.continent": "NA",
+    "ip.geoip.continent": "NA",
+    "ip.src.asnum": 15169,
+    "ip.geoip.asnum": 15169,
+    "ssl": True,
+}
+
+# Pfade, die Googlebot typischerweise crawlt
+CRAWL_PATHS = ("/", "/pages/alarmanlagen.html", "/robots.txt", "/sitemap.xml", "/images/KOST-Logo.svg")
+# Per robots.txt gesperrt; Rules, die nur hier greifen, treffen Googlebot nie
+NOT_CRAWLED_PREFIXES = ("/api/",)
+
+class ExpressionError(ValueError):
+    """Expression konnte nicht geparst werden"""
+
+# --- AST ---------------------------------------------------------------------
+
+class Node:
+    __slots__ = ()
+
+class FieldRef(Node):
+    """Feld, optional mit Transformationen wie lower() oder len()"""
+    __slots__ = ("name", "transforms")
+
+    def __init__(self, name: str, transforms: Tuple[str, ...] = ()):
+        self.name = name
+        self.transforms = transforms
+
+    def __repr__(self):
+        return f"FieldRef({self.name!r}, {self.transforms!r})"
+
+class NamedList(Node):
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __repr__(self):
+        return f"NamedList({self.name!r})"
+
+class Call(Node):
+    """Funktion, deren Ergebnis statisch nicht bestimmbar ist"""
+    __slots__ = ("name", "args")
+
+    def __init__(self, name: str, args: list):
+        self.name = name
+        self.args = args
+
+    def __repr__(self):
+        return f"Call({self.name!r}, {self.args!r})"
+
+class Compare(Node):
+    __slots__ = ("left", "op", "right")
+
+    def __init__(self, left, op: str, right):
+        self.left = left
+        self.op = op
+        self.right = right
+
+    def __repr__(self):
+        return f"Compare({self.left!r}, {self.op!r}, {self.right!r})"
+
+class Not(Node):
+    __slots__ = ("child",)
+
+    def __init__(self, child):
+        self.child = child
+
+    def __repr__(self):
+        return f"Not({self.child!r})"
+
+class Logical(Node):
+    """and / or / xor mit beliebig vielen Operanden"""
+    __slots__ = ("op", "children")
+
+    def __init__(self, op: str, children: list):
+        self.op = op
+        self.children = children
+
+    def __repr__(self):
+        return f"Logical({self.op!r}, {self.children!r})"
+
+# --- Tokenizer ---------------------------------------------------------------
+
+_TOKEN_RE = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<raw>r(?P<hashes>\#*)"(?P<rawbody>.*?)"(?P=hashes))
+  | (?P<string>"(?:[^"\\]|\\.)*")
+  | (?P<named>\$[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<op>==|!=|<=|>=|&&|\|\||\^\^|[<>~!(){}\[\],*])
+  | (?P<word>[A-Za-z0-9_.:/\-]+)
+""", re.VERBOSE | re.DOTALL)
+
+_OPERATORS = {
+    "eq": "eq", "==": "eq",
+    "ne": "ne", "!=": "ne",
+    "lt": "lt", "<": "lt",
+    "le": "le", "<=": "le",
+    "gt": "gt", ">": "gt",
+    "ge": "ge", ">=": "ge",
+    "contains": "contains",
+    "matches": "matches", "~": "matches",
+    "in": "in",
+    "wildcard": "wildcard",
+}
+
+_TRANSFORMS = ("lower", "upper", "url_decode", "remove_bytes", "to_string", "decode_base64", "len")
+
+def _unescape(body: str) -> str:
+    return re.sub(r'\\(.)', r'\1', body)
+
+def tokenize(expression: str) -> List[Tuple[str, object]]:
+    tokens = []
+    pos = 0
+    while pos < len(expression):
+        m = _TOKEN_RE.match(expression, pos)
+        if not m:
+            raise ExpressionError(f"Unerwartetes Zeichen an Position {pos}: {expression[pos]!r}")
+        pos = m.end()
+        kind = m.lastgroup
+        if kind == "ws":
+            continue
+        if kind in ("raw", "hashes", "rawbody"):
+            tokens.append(("string", m.group("rawbody")))
+        elif kind == "string":
+            tokens.append(("string", _unescape(m.group("string")[1:-1])))
+        elif kind == "named":
+            tokens.append(("named", m.group("named")[1:]))
+        elif kind == "op":
+            tokens.append(("op", m.group("op")))
+        else:
+            tokens.append(("word", m.group("word")))
+    return tokens
+
+# --- Parser ------------------------------------------------------------------
+
+class _Parser:
+    """Rekursiver Abstieg; Präzedenz: not > and > xor > or"""
+
+    def __init__(self, expression: str):
+        self.tokens = tokenize(expression)
+        self.pos = 0
+
+    def peek(self, offset: int = 0):
+        i = self.pos + offset
+        return self.tokens[i] if i < len(self.tokens) else (None, None)
+
+    def next(self):
+        token = self.peek()
+        if token[0] is None:
+            raise ExpressionError("Unerwartetes Ende der Expression")
+        self.pos += 1
+        return token
+
+    def expect(self, value: str):
+        kind, token = self.next()
+        if token != value:
+            raise ExpressionError(f"Erwartet {value!r}, gefunden {token!r}")
+
+    def at(self, *values) -> bool:
+        kind, token = self.peek()
+        return kind in ("op", "word") and token in values
+
+    def parse(self):
+        node = self.parse_or()
+        if self.peek()[0] is not None:
+            raise ExpressionError(f"Unerwartetes Token: {self.peek()[1]!r}")
+        return node
+
+    def _logical(self, op: str, keywords: tuple, parse_operand):
+        children = [parse_operand()]
+        while self.at(*keywords):
+            self.next()
+            children.append(parse_operand())
+        return children[0] if len(children) == 1 else Logical(op, children)
+
+    def parse_or(self):
+        return self._logical("or", ("or", "||"), self.parse_xor)
+
+    def parse_xor(self):
+        return self._logical("xor", ("xor", "^^"), self.parse_and)
+
+    def parse_and(self):
+        return self._logical("and", ("and", "&&"), self.parse_not)
+
+    def parse_not(self):
+        if self.at("not", "!"):
+            self.next()
+            return Not(self.parse_not())
+        return self.parse_comparison()
+
+    def parse_comparison(self):
+        if self.at("("):
+            self.next()
+            node = self.parse_or()
+            self.expect(")")
+            return node
+
+        left = self.parse_value()
+        if isinstance(left, Compare):
+            return left
+
+        op = self.parse_operator()
+        if op is None:
+            return left
+        return Compare(left, op, self.parse_rhs())
+
+    def parse_operator(self) -> Optional[str]:
+        kind, token = self.peek()
+        if kind not in ("op", "word"):
+            return None
+        if token == "strict" and self.peek(1)[1] == "wildcard":
+            self.pos += 2
+            return "strict wildcard"
+        if token in _OPERATORS:
+            self.next()
+            return _OPERATORS[token]
+        return None
+
+    def parse_value(self):
+        kind, token = self.next()
+        if kind != "word":
+            raise ExpressionError(f"Feld erwartet, gefunden {token!r}")
+
+        node = self.parse_call(token) if self.at("(") else FieldRef(token)
+        while self.at("["):
+            self.next()
+            key_kind, key = self.next()
+            self.expect("]")
+            # http.request.headers["user-agent"][*] ist gleichbedeutend mit http.user_agent
+            if (isinstance(node, FieldRef) and node.name == "http.request.headers"
+                    and key_kind == "string" and key.lower() == "user-agent"):
+                node = FieldRef("http.user_agent", node.transforms)
+        return node
+
+    def parse_call(self, name: str):
+        self.expect("(")
+
+        if name in ("any", "all"):
+            node = self.parse_or()
+            self.expect(")")
+            return node
+
+        args = []
+        while not self.at(")"):
+            kind, token = self.peek()
+            if kind == "string":
+                self.next()
+                args.append(token)
+            elif kind == "named":
+                self.next()
+                args.append(NamedList(token))
+            else:
+                args.append(self.parse_or())
+            if self.at(","):
+                self.next()
+        self.expect(")")
+
+        if name in ("starts_with", "ends_with") and len(args) == 2 and isinstance(args[0], FieldRef):
+            return Compare(args[0], name, args[1])
+        if name in _TRANSFORMS and args and isinstance(args[0], FieldRef):
+            field = args[0]
+            return FieldRef(field.name, field.transforms + (name,))
+        return Call(name, args)
+
+    def parse_rhs(self):
+        kind, token = self.next()
+        if kind == "string":
+            return token
+        if kind == "named":
+            return NamedList(token)
+        if kind == "op" and token == "{":
+            items = []
+            while not self.at("}"):
+                item_kind, item = self.next()
+                if item_kind is None:
+                    raise ExpressionError("Liste nicht geschlossen")
+                items.append(int(item) if item_kind == "word" and item.isdigit() else item)
+            self.next()
+            return items
+        if kind == "word":
+            if token.isdigit():
+                return int(token)
+            if token in ("true", "false"):
+                return token == "true"
+            if token[0].isdigit() or ":" in token or "/" in token:
+                return token
+            if self.at("("):
+                return self.parse_call(token)
+            return FieldRef(token)
+        raise ExpressionError(f"Wert erwartet, gefunden {token!r}")
+
+# --- Auswertung --------------------------------------------------------------
+
+@lru_cache(maxsize=4096)
+def _regex(pattern: str):
+    try:
+        return re.compile(pattern)
+    except re.error:
+        return None
+
+def _wildcard(pattern: str, value: str, case_sensitive: bool) -> bool:
+    if not case_sensitive:
+        pattern, value = pattern.lower(), value.lower()
+    return fnmatch.fnmatchcase(value, pattern.replace("[", "[[]").replace("?", "[?]"))
+
+def _in_list(value, items) -> bool:
+    for item in items:
+        if item == value:
+            return True
+        if isinstance(value, int) and isinstance(item, str) and ".." in item:
+            low, _, high = item.partition("..")
+            if low.isdigit() and high.isdigit() and int(low) <= value <= int(high):
+                return True
+    return False
+
+def _resolve(value, facts: Dict):
+    if isinstance(value, FieldRef):
+        resolved = facts.get(value.name)
+        if resolved is None:
+            return None
+        for transform in value.transforms:
+            if transform == "lower":
+                resolved = str(resolved).lower()
+            elif transform == "upper":
+                resolved = str(resolved).upper()
+            elif transform == "len":
+                resolved = len(resolved)
+            elif transform == "to_string":
+                resolved = str(resolved)
+        return resolved
+    if isinstance(value, (NamedList, Call)):
+        return None
+    return value
+
+def _compare(op: str, left, right) -> Optional[bool]:
+    try:
+        if op == "eq":
+            return left == right
+        if op == "ne":
+            return left != right
+        if op == "lt":
+            return left < right
+        if op == "le":
+            return left <= right
+        if op == "gt":
+            return left > right
+        if op == "ge":
+            return left >= right
+        if op == "contains":
+            return str(right) in str(left)
+        if op == "matches":
+            regex = _regex(str(right))
+            return None if regex is None else bool(regex.search(str(left)))
+        if op == "in":
+            return _in_list(left, right) if isinstance(right, list) else None
+        if op == "wildcard":
+            return _wildcard(str(right), str(left), case_sensitive=False)
+        if op == "strict wildcard":
+            return _wildcard(str(right), str(left), case_sensitive=True)
+        if op == "starts_with":
+            return str(left).startswith(str(right))
+        if op == "ends_with":
+            return str(left).endswith(str(right))
+    except TypeError:
+        return None
+    return None
+
+def evaluate(node, facts: Dict) -> Optional[bool]:
+    """Dreiwertige Auswertung: True, False oder None (hängt von unbekannten Feldern ab)"""
+    if node is None:
+        return False
+
+    if isinstance(node, Compare):
+        left = _resolve(node.left, facts)
+        right = _resolve(node.right, facts) if not isinstance(node.right, list) else node.right
+        if left is None or right is None:
+            return None
+        return _compare(node.op, left, right)
+
+    if isinstance(node, Not):
+        result = evaluate(node.child, facts)
+        return None if result is None else not result
+
+    if isinstance(node, Logical):
+        results = [evaluate(child, facts) for child in node.children]
+        if node.op == "and":
+            if False in results:
+                return False
+            return None if None in results else True
+        if node.op == "or":
+            if True in results:
+                return True
+            return None if None in results else False
+        if None in results:
+            return None
+        return sum(results) % 2 == 1
+
+    if isinstance(node, FieldRef):
+        value = _resolve(node, facts)
+        return None if value is None else bool(value)
+
+    return None
+
+def _walk(node, negated: bool = False) -> Iterable[Tuple[Node, bool]]:
+    """Liefert alle Vergleiche und Boolean-Felder mit ihrer Polarität"""
+    if isinstance(node, Not):
+        yield from _walk(node.child, not negated)
+    elif isinstance(node, Logical):
+        for child in node.children:
+            yield from _walk(child, negated)
+    elif isinstance(node, Compare):
+        yield node, negated != (node.op == "ne")
+    elif isinstance(node, FieldRef):
+        yield node, negated
+
+# --- Analyse -----------------------------------------------------------------
+
+class ExpressionInfo:
+    """Einmal berechnete Fakten zu einer Expression"""
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        self.error: Optional[str] = None
+        try:
+            self.ast = _Parser(expression).parse() if expression.strip() else None
+        except ExpressionError as e:
+            self.ast = None
+            self.error = str(e)
+
+        self.fields = set()
+        self.paths: List[Tuple[str, object, bool]] = []
+        self.user_agents: List[Tuple[str, object, bool]] = []
+        self.targets_bots = False
+
+        for node, negated in _walk(self.ast):
+            field = node.left if isinstance(node, Compare) else node
+            if not isinstance(field, FieldRef):
+                continue
+            self.fields.add(field.name)
+
+            if isinstance(node, Compare):
+                if field.name in PATH_FIELDS:
+                    self.paths.append((node.op, node.right, negated))
+                elif field.name == "http.user_agent":
+                    self.user_agents.append((node.op, node.right, negated))
+                    if not negated and isinstance(node.right, str) and BOT_UA_PATTERN.search(node.right):
+                        self.targets_bots = True
+
+            if field.name in BOT_FIELDS and not negated:
+                self.targets_bots = True
+
+        if self.error:
+            # Fallback für Syntax, die der Parser nicht kennt: lieber melden als übersehen
+            lowered = expression.lower()
+            self.targets_bots = "bot" in lowered and "googlebot" not in lowered
+            self.targets_homepage = 'eq "/"' in expression
+            self.matches_googlebot: Optional[bool] = None
+        else:
+            self.targets_homepage = bool(self.paths) and self.matches_path("/") is not False
+            self.matches_googlebot = self._matches_googlebot()
+
+    def matches_path(self, path: str) -> Optional[bool]:
+        """Kann die Regel für diesen Pfad greifen (andere Felder unbekannt)?"""
+        facts = {field: path for field in PATH_FIELDS}
+        return evaluate(self.ast, facts)
+
+    def _matches_googlebot(self) -> Optional[bool]:
+        """Trifft die Regel Googlebot? Der Pfad bleibt unbekannt, "vielleicht" ist None
+
+        Hängt das Ergebnis nur vom Pfad ab, gilt die Regel als harmlos, wenn sie keinen der
+        CRAWL_PATHS trifft und alle ihre Pfad-Vergleiche unter NOT_CRAWLED_PREFIXES liegen.
+        """
+        result = evaluate(self.ast, GOOGLEBOT_REQUEST)
+        if result is not None:
+            return result
+
+        results = []
+        for path in CRAWL_PATHS:
+            facts = dict(GOOGLEBOT_REQUEST)
+            facts.update({field: path for field in PATH_FIELDS})
+            facts["http.request.full_uri"] = f"https://{GOOGLEBOT_REQUEST['http.host']}{path}"
+            results.append(evaluate(self.ast, facts))
+        if True in results:
+            return True
+        values = [value for _, right, _ in self.paths for value in (right if isinstance(right, list) else [right])]
+        if results and set(results) == {False} and values and all(
+                isinstance(value, str) and value.startswith(NOT_CRAWLED_PREFIXES) for value in values):
+            return False
+        return None
+
+    @property
+    def exempts_googlebot(self) -> bool:
+        """True, wenn die Regel einen verifizierten Googlebot sicher nicht trifft"""
+        return self.matches_googlebot is False
+
+# Das ist der Pfad für Massen-Audits: jede Rule wird nur gegen einen festen Googlebot-Request
+# geprüft, die Kosten wachsen also mit der Zahl verschiedener Expressions (rund 0,15 ms pro
+# Expression); ein Index über viele Requests hätte nichts, was er amortisieren könnte
+@lru_cache(maxsize=None)
+def _analyze_hashed(digest: str, expression: str) -> ExpressionInfo:
+    return ExpressionInfo(expression)
+
+def analyze_expression(expression: str) -> ExpressionInfo:
+    """Parst eine Expression einmal; Ergebnisse werden pro Expression-Hash wiederverwendet"""
+    digest = hashlib.sha1(expression.encode("utf-8")).hexdigest()
+    return _analyze_hashed(digest, expression)
+
+def rule_expression(rule: Dict) -> str:
+    """Expression einer WAF Rule oder (legacy) Firewall Rule"""
+    return rule.get("expression") or rule.get("filter", {}).get("expression", "") or ""
+
+def is_blocking(action) -> bool:
+    if isinstance(action, dict):
+        action = action.get("mode", "")
+    return str(action or "").lower() in BLOCKING_ACTIONS
+
+# Suchmaschinen-Crawler, die von blockierenden Rules ausgenommen werden
+SEARCH_ENGINE_BOTS = ("Googlebot", "Bingbot", "Slurp", "DuckDuckBot")
+
+def with_googlebot_exception(expression: str) -> str:
+    """Ergänzt eine Expression um eine Ausnahme für Suchmaschinen-Crawler"""
+    if analyze_expression(expression).exempts_googlebot:
+        return expression
+    exception = " or ".join(f'http.user_agent contains "{bot}"' for bot in SEARCH_ENGINE_BOTS)
+    return f"({expression}) and not ({exception})"
+
+# Problem-Codes, die Scripts in eigene Meldungen übersetzen
+PROBLEM_HOMEPAGE = "homepage"
+PROBLEM_BOTS = "bots"
+PROBLEM_BLOCKING = "blocking"
+
+def rule_problems(rule: Dict) -> List[str]:
+    """Prüft eine Rule auf mögliche Googlebot-Blockierungen"""
+    info = analyze_expression(rule_expression(rule))
+    if info.exempts_googlebot:
+        return []
+
+    # log, skip usw. lassen jeden Request durch, egal worauf die Regel zielt
+    if not is_blocking(rule.get("action", "")):
+        return []
+
+    problems = []
+    if info.targets_homepage:
+        problems.append(PROBLEM_HOMEPAGE)
+    if info.targets_bots:
+        problems.append(PROBLEM_BOTS)
+    problems.append(PROBLEM_BLOCKING)
+    return problems
+
+def rate_limit_targets_homepage(match: Dict) -> bool:
+    """Prüft, ob das URL-Muster einer (legacy) Rate Limiting Rule die Startseite erfasst"""
+    url = match.get("request", {}).get("url", "*") or "*"
+    url = re.sub(r"^[a-z*]+://", "", url)
+    slash = url.find("/")
+    path = url[slash:] if slash >= 0 else "/*"
+    return _wildcard(path, "/", case_sensitive=True)
+
+def rule_summary(rule: Dict) -> Dict:
+    """Die für Berichte relevanten Felder einer Rule (WAF, Firewall oder Rate Limiting)"""
+    action = rule.get("action", "")
+    summary = {
+        "rule_id": rule.get("id", ""),
+        "description": rule.get("description", ""),
+        "action": action.get("mode", "") if isinstance(action, dict) else action,
+        "enabled": rule.get("enabled", not (rule.get("disabled") or rule.get("paused"))),
+    }
+    expression = rule_expression(rule)
+    if expression:
+        summary["expression"] = expression
+    if "match" in rule:
+        summary["url"] = rule["match"].get("request", {}).get("url", "")
+    return summary
+
+# Felder, die sich ohne inhaltliche Änderung einer Rule ändern
+VOLATILE_RULE_FIELDS = ("last_updated", "modified_on", "created_on", "version")
+
+def rule_hash(rule: Dict) -> str:
+    """Inhalts-Hash einer Rule, unabhängig von Schlüsselreihenfolge und Zeitstempeln"""
+    content = {key: value for key, value in rule.items() if key not in VOLATILE_RULE_FIELDS}
+    canonical = json.dumps(content, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+def rule_key(rule: Dict) -> str:
+    return rule.get("id") or rule_hash(rule)
+
+class RuleChanges:
+    """Vergleicht die Rules eines Laufs mit dem Hash-Index des vorherigen Laufs
+
+    Nur hinzugekommene und geänderte Rules müssen analysiert werden; für unveränderte
+    werden die gespeicherten Probleme übernommen. index ist der neue Stand zum Speichern.
+    """
+
+    def __init__(self, previous: Dict[str, Dict], rules: Iterable[Dict]):
+        self.added: List[Dict] = []
+        self.changed: List[Dict] = []
+        self.unchanged = 0
+        self.known_problems = 0
+        self.index: Dict[str, Dict] = {}
+
+        for rule in rules:
+            key = rule_key(rule)
+            digest = rule_hash(rule)
+            old = previous.get(key)
+            self.index[key] = {"hash": digest, "description": rule.get("description", ""), "problems": []}
+            if old is None:
+                self.added.append(rule)
+            elif old.get("hash") != digest:
+                self.changed.append(rule)
+            else:
+                self.unchanged += 1
+                self.index[key]["problems"] = old.get("problems", [])
+                self.known_problems += len(self.index[key]["problems"])
+
+        self.removed: List[Dict] = [
+            dict(entry, id=key) for key, entry in previous.items() if key not in self.index
+        ]
+
+    @property
+    def to_analyze(self) -> List[Dict]:
+        return self.added + self.changed
+
+    def record(self, rule: Dict, problem: str):
+        """Merkt sich ein Problem einer analysierten Rule für den nächsten Lauf"""
+        self.index[rule_key(rule)]["problems"].append(problem)
+
+    def __bool__(self):
+        return bool(self.added or self.changed or self.removed)
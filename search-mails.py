@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Search Kostmails
+Volltextsuche über die Kostmails mit Umlaut-Faltung und Stammformen, z.B.
+    python search-mails.py "zufrieden zusammenarbeit" --from wdi.de
+Mail- und Volltext-Index werden vor jeder Suche inkrementell aktualisiert.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from mail_index import MAIL_DIR, MailIndex
+from mail_search import MailSearch
+
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+def main():
+    parser = argparse.ArgumentParser(description="Volltextsuche über die Kostmails")
+    parser.add_argument("query", nargs="?", default="", help="Suchbegriffe (alle müssen vorkommen)")
+    parser.add_argument("--from", dest="sender", metavar="ABSENDER",
+                        help="Nur Mails von diesem Absender (auch in weitergeleiteten Teilen), z.B. wdi.de")
+    parser.add_argument("--any", action="store_true", help="Mindestens einer der Begriffe genügt")
+    parser.add_argument("--limit", type=int, default=10, help="Maximale Anzahl Treffer (Standard: 10)")
+    parser.add_argument("--workers", type=int, default=1, help="Neue E-Mails in N Prozessen parsen (Standard: 1)")
+    parser.add_argument("--json", action="store_true", help="Treffer als JSON-Zeilen ausgeben")
+    args = parser.parse_args()
+
+    if not args.query and not args.sender:
+        parser.error("Suchbegriffe oder --from angeben")
+
+    with MailIndex(mail_dir=MAIL_DIR) as index:
+        stats = index.update(workers=args.workers)
+        search = MailSearch(index)
+        added = search.update()
+
+        start = time.perf_counter()
+        hits = search.search(args.query, sender=args.sender, any_term=args.any, limit=args.limit)
+        elapsed = time.perf_counter() - start
+
+    if args.json:
+        for hit in hits:
+            print(json.dumps(hit._asdict(), ensure_ascii=False))
+    else:
+        for hit in hits:
+            print(f"\n📧 {hit.subject or '(kein Betreff)'}")
+            print(f"   {hit.date or '?'} · {hit.sender} · {Path(hit.path).name}")
+            print(f"   {hit.snippet}")
+        print(f"\n{len(hits)} Treffer in {elapsed * 1000:.1f}ms "
+              f"({stats['indexed']} E-Mails neu gelesen, {added} neu indexiert)")
+
+    for record in stats["errors"]:
+        print(json.dumps(record, ensure_ascii=False), file=sys.stderr)
+
+    sys.exit(0 if hits else 1)
+
+if __name__ == "__main__":
+    main()
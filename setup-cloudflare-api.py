@@ -100,19 +100,14 @@ def setup_config():
     # Teste Verbindung
     print("🔍 Teste API-Verbindung...")
     try:
-        import requests
-        headers = {
-            "Authorization": f"Bearer {api_token}",
-            "Content-Type": "application/json"
-        }
+        from cloudflare_api import get_client
+        client = get_client(api_token)
         
         # Teste mit Zone ID oder Domain
         if zone_id:
-            test_url = f"https://api.cloudflare.com/client/v4/zones/{zone_id}"
+            response = client.get(f"zones/{zone_id}")
         else:
-            test_url = f"https://api.cloudflare.com/client/v4/zones?name={domain}"
-        
-        response = requests.get(test_url, headers=headers, timeout=10)
+            response = client.get("zones", params={"name": domain})
         
         if response.status_code == 200:
             print("✅ API-Verbindung erfolgreich!")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Site Probe
+Gemeinsame Helfer für Live-Checks der Website: Sitemap lesen, gepoolte Session,
+parallele Requests mit Status, Größe, TTFB und Gesamtzeit
+"""
+
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+PRODUCTION_URL = "https://www.kost-sicherheitstechnik.de/"
+GITHUB_PAGES_URL = "https://maexftw.github.io/kost/"
+SITEMAP_FILE = "sitemap.xml"
+
+# (Connect, Read) Timeout in Sekunden
+DEFAULT_TIMEOUT = (5, 20)
+DEFAULT_WORKERS = 16
+
+SITEMAP_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+
+def load_sitemap(source: str = SITEMAP_FILE, session: Optional[requests.Session] = None) -> List[str]:
+    """Liest alle <loc>-URLs aus einer lokalen Sitemap-Datei oder einer Sitemap-URL"""
+    if source.startswith(("http://", "https://")):
+        response = (session or requests).get(source, timeout=DEFAULT_TIMEOUT)
+        response.raise_for_status()
+        content = response.content
+    else:
+        content = Path(source).read_bytes()
+
+    # sitemap.xml im Repo beginnt mit einem BOM, das ElementTree nicht mag
+    root = ET.fromstring(content.lstrip(b"\xef\xbb\xbf").strip())
+    return [loc.text.strip() for loc in root.iter(f"{SITEMAP_NS}loc") if loc.text]
+
+def rebase_url(url: str, base_url: str) -> str:
+    """Ersetzt Schema und Host einer URL, z.B. Produktion -> lokaler Server oder Mirror
+
+    Ein Pfad in base_url wird vorangestellt (https://maexftw.github.io/kost/ + /pages/x.html
+    -> https://maexftw.github.io/kost/pages/x.html).
+    """
+    parts = urlsplit(url)
+    base = urlsplit(base_url if base_url.endswith("/") else base_url + "/")
+    path = base.path.rstrip("/") + (parts.path or "/")
+    return urlunsplit((base.scheme, base.netloc, path, parts.query, ""))
+
+def local_pages(root: str = ".") -> List[str]:
+    """Pfade aller HTML-Seiten der Website (/ für index.html und /pages/*.html)"""
+    base = Path(root)
+    pages = ["/"] if (base / "index.html").exists() else []
+    pages.extend(f"/pages/{page.name}" for page in sorted((base / "pages").glob("*.html")))
+    return pages
+
+def create_session(pool_size: int = DEFAULT_WORKERS) -> requests.Session:
+    """Session mit so vielen Keep-Alive-Verbindungen pro Host wie Worker"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def fetch(session: requests.Session, url: str, headers: Optional[Dict] = None,
+          timeout=DEFAULT_TIMEOUT) -> Dict:
+    """Ein GET mit Messwerten; Fehler werden als Ergebnis zurückgegeben, nicht geworfen"""
+    result = {"url": url, "status": None, "size": 0, "ttfb": None, "total": None,
+              "final_url": url, "redirects": 0, "error": None}
+    start = time.perf_counter()
+    try:
+        # stream=True: der Aufruf kehrt nach den Headern zurück, das ist die TTFB
+        with session.get(url, headers=headers, timeout=timeout, stream=True,
+                         allow_redirects=True) as response:
+            result["ttfb"] = time.perf_counter() - start
+            content = response.content
+            result["total"] = time.perf_counter() - start
+            result.update(
+                status=response.status_code,
+                size=len(content),
+                final_url=response.url,
+                redirects=len(response.history),
+                # Cloudflare kennzeichnet Challenges mit diesem Header
+                mitigated=response.headers.get("cf-mitigated"),
+                content_type=response.headers.get("Content-Type", ""),
+            )
+    except requests.exceptions.RequestException as e:
+        result["total"] = time.perf_counter() - start
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+def fetch_all(session: requests.Session, jobs: Iterable[Tuple[str, Optional[Dict], Dict]],
+              workers: int = DEFAULT_WORKERS) -> Iterator[Dict]:
+    """Führt (url, headers, extra) parallel aus und liefert Ergebnisse in Fertigstellungsreihenfolge
+
+    extra wird unverändert in das Ergebnis übernommen (z.B. Host oder User Agent).
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(fetch, session, url, headers): extra
+            for url, headers, extra in jobs
+        }
+        for future in as_completed(futures):
+            yield dict(future.result(), **futures[future])
+
+def format_result(result: Dict) -> str:
+    """Eine Zeile pro Ergebnis: Status, Größe, TTFB, Gesamtzeit, URL"""
+    if result["error"]:
+        return f"  ✗ {'ERR':>3} {'':>9} {'':>8} {result['total'] * 1000:7.0f}ms  {result['url']}  ({result['error']})"
+
+    ok = result["status"] == 200
+    status = f"{result['status']}"
+    notes = []
+    if result["redirects"]:
+        notes.append(f"{result['redirects']}× Redirect → {result['final_url']}")
+    if result.get("mitigated"):
+        notes.append(f"cf-mitigated: {result['mitigated']}")
+    return (f"  {'✓' if ok else '✗'} {status:>3} {result['size']:>8}B "
+            f"{result['ttfb'] * 1000:6.0f}ms {result['total'] * 1000:7.0f}ms  {result['url']}"
+            + (f"  ({', '.join(notes)})" if notes else ""))
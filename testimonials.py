@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testimonials
+Findet in den Referenz-Mails die Antworten der Kunden und liefert pro Absender einen
+Datensatz (Firma, Person, Zitat). Jede Mail wird einmal in Text umgewandelt und in
+Abschnitte (weitergeleitete Nachrichten) zerlegt; Anrede, Grußformel, Zitat-Anfang und
+-Ende werden über konfigurierbare Marker erkannt. Eigene Nachrichten (Kost) fallen weg.
+"""
+
+import re
+from email.utils import parseaddr
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from mail_index import MailIndex
+from mail_search import analyze
+from mail_text import html_to_text
+
+EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+# "Torsten Kost [mailto:Info@…]" und "ralf.rauch@wdi.de<mailto:ralf.rauch@wdi.de>"
+MAILTO = re.compile(r"\s*[\[<]mailto:([^\]>]+)[\]>]", re.IGNORECASE)
+
+class Markers(NamedTuple):
+    """Erkennungsmerkmale; alle Vergleiche ohne Groß-/Kleinschreibung"""
+    # Signatur-Text eigener Nachrichten
+    own: Tuple[str, ...] = ("kost-sicherheitstechnik.de", "kost sicherheitstechnik")
+    # Anreden beginnen eine neue Nachricht, auch ohne Kopfzeilen
+    salutation: Tuple[str, ...] = ("hallo", "moin", "guten morgen", "guten tag", "liebe", "lieber",
+                                   "sehr geehrte", "hi ", "hello", "dear")
+    # Grußformeln trennen Text und Signatur
+    closing: Tuple[str, ...] = ("grüße", "grüßen", "gruß", "regards", "best wishes")
+    # Wörter (Stammformen), mit denen ein Zitat beginnt
+    quote: Tuple[str, ...] = ("zusammenarbeit", "zufrieden", "professionell", "zuverlässig", "empfehlen",
+                              "vertrauensvoll", "kompetenz", "überzeugt")
+    # Zeilen, die ein Zitat beenden
+    stop: Tuple[str, ...] = ("………", "...", "sollte der text", "sag bescheid", "falls der text")
+    # Kopfzeilen weitergeleiteter Nachrichten
+    header: Tuple[str, ...] = ("von", "from")
+    header_fields: Tuple[str, ...] = ("gesendet", "sent", "datum", "date", "an", "to", "cc", "betreff", "subject")
+    # Rechtsformen in der Signatur
+    company: Tuple[str, ...] = ("gmbh", "ag", "kg", "ug", "se", "ohg", "gbr", "e.k.", "mbh", "gruppe", "group")
+    # Kürzel vor dem Namen in der Signatur
+    proxy: Tuple[str, ...] = ("i.v.", "i.a.", "ppa.", "i. v.", "i. a.")
+
+class Testimonial(NamedTuple):
+    company: Optional[str]
+    person: Optional[str]
+    quote: Optional[str]
+    email: Optional[str]
+    file: str
+
+class Segment:
+    """Eine Nachricht innerhalb einer (weitergeleiteten) Mail"""
+
+    def __init__(self, name: Optional[str] = None, address: Optional[str] = None):
+        self.name = name
+        self.address = address
+        self.lines: List[str] = []
+
+    def has_content(self) -> bool:
+        return any(self.lines)
+
+def _field(line: str, names: Tuple[str, ...]) -> Optional[str]:
+    """Wert einer Kopfzeile ("Von: …"), falls die Zeile mit einem der Namen beginnt"""
+    name, colon, value = line.partition(":")
+    if colon and name.strip(" *").lower() in names:
+        return value.strip()
+    return None
+
+def _words(line: str) -> int:
+    return len(line.split())
+
+def _starts_with(line: str, prefixes: Tuple[str, ...]) -> bool:
+    lowered = line.lower() + " "
+    return any(lowered.startswith(prefix) for prefix in prefixes)
+
+def split_segments(text: str, markers: Markers = Markers()) -> List[Segment]:
+    """Zerlegt den Text an Kopfzeilen ("Von: …" + "Gesendet: …") und Anreden"""
+    lines = text.splitlines()
+    segments = [Segment()]
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        sender = _field(line, markers.header)
+        following = [_field(next_line.strip(), markers.header_fields) for next_line in lines[i + 1:i + 3]]
+        if sender is not None and any(value is not None for value in following):
+            name, address = parseaddr(MAILTO.sub(lambda m: f" <{m.group(1)}>", sender))
+            segments.append(Segment(name or None, address.lower() or None))
+            i += 1
+            while i < len(lines) and _field(lines[i].strip(), markers.header_fields) is not None:
+                i += 1
+            continue
+        if (_starts_with(line, markers.salutation) and _words(line) <= 6
+                and segments[-1].has_content()):
+            segments.append(Segment())
+        segments[-1].lines.append(line)
+        i += 1
+    return [segment for segment in segments if segment.has_content()]
+
+def _is_closing(line: str, markers: Markers) -> bool:
+    lowered = line.lower()
+    return 0 < _words(line) <= 6 and any(word in lowered for word in markers.closing)
+
+def _is_stop(line: str, markers: Markers) -> bool:
+    lowered = line.lower()
+    return any(lowered.startswith(marker) or lowered == marker for marker in markers.stop)
+
+def find_quote(lines: List[str], markers: Markers = Markers()) -> Optional[str]:
+    """Erster Absatz mit einem Zitat-Wort bis zur nächsten Stopp-Zeile oder Grußformel
+
+    Einleitungen ("… unserer Zusammenarbeit:") und Fragen zählen nicht als Zitat-Anfang.
+    """
+    wanted = set(analyze(" ".join(markers.quote)))
+    paragraphs: List[List[str]] = []
+    for line in lines:
+        if paragraphs:
+            if _is_stop(line, markers) or _is_closing(line, markers):
+                break
+            if not line:
+                paragraphs.append([])
+            else:
+                paragraphs[-1].append(line)
+        elif line and not line.endswith((":", "?")) and wanted & set(analyze(line)):
+            paragraphs.append([line])
+    quote = "\n".join(" ".join(paragraph) for paragraph in paragraphs if paragraph)
+    return quote or None
+
+def _signature(segment: Segment, markers: Markers) -> Tuple[List[str], List[str]]:
+    """(Text, Signatur) einer Nachricht, getrennt an der ersten Grußformel"""
+    for i, line in enumerate(segment.lines):
+        if _is_closing(line, markers):
+            return segment.lines[:i], segment.lines[i:]
+    return segment.lines, []
+
+def _person(segment: Segment, signature: List[str], markers: Markers) -> Optional[str]:
+    if segment.name:
+        return segment.name
+    lines = [line for line in signature[1:] if line and line.lower() not in markers.proxy]
+    if lines and 1 < _words(lines[0]) <= 4 and not EMAIL.search(lines[0]):
+        return lines[0]
+    return None
+
+def _company(signature: List[str], markers: Markers) -> Optional[str]:
+    for line in signature[1:]:
+        words = {word.strip(",()").lower() for word in line.split()}
+        if 0 < len(words) <= 8 and words & set(markers.company) and ":" not in line:
+            return line
+    return None
+
+def extract(text: str, file: str, markers: Markers = Markers()) -> List[Testimonial]:
+    """Datensätze aller fremden Absender eines Mail-Texts, zusammengeführt pro Absender"""
+    found: Dict[str, Dict] = {}
+    for segment in split_segments(text, markers):
+        body, signature = _signature(segment, markers)
+        signature_text = "\n".join(signature).lower()
+        if (segment.address and any(marker in segment.address for marker in markers.own)) or \
+                (not segment.address and any(marker in signature_text for marker in markers.own)):
+            continue
+
+        address = segment.address or next(iter(EMAIL.findall(signature_text)), None)
+        person = _person(segment, signature, markers)
+        key = address or (person or "").lower()
+        if not key:
+            continue
+        record = found.setdefault(key, {"company": None, "person": None, "quote": None, "email": address})
+        record["person"] = record["person"] or person
+        record["company"] = record["company"] or _company(signature, markers)
+        record["quote"] = record["quote"] or find_quote(body, markers)
+
+    return [Testimonial(file=file, **record) for record in found.values()]
+
+def message_text(index: MailIndex, message_id: int) -> str:
+    """HTML-Teil als Text, sonst der Text-Teil"""
+    html = index.body(message_id, "text/html")
+    return html_to_text(html) if html else index.body(message_id, "text/plain")
+
+def extract_all(index: MailIndex, markers: Markers = Markers(),
+                message_ids: Optional[List[int]] = None) -> Iterator[Testimonial]:
+    """Testimonials aller (oder der angegebenen) Mails; pro Absender der erste vollständige Fund"""
+    records: Dict[str, Testimonial] = {}
+    if message_ids is None:
+        message_ids = [message["id"] for message in index.messages()]
+    for message_id in message_ids:
+        message = index.message(message_id)
+        for record in extract(message_text(index, message_id), Path(message["path"]).name, markers):
+            key = record.email or (record.person or "").lower()
+            known = records.get(key)
+            if known is None:
+                records[key] = record
+            else:
+                records[key] = known._replace(**{field: getattr(record, field) for field in
+                                                 ("company", "person", "quote")
+                                                 if not getattr(known, field) and getattr(record, field)})
+    for record in records.values():
+        yield record if record.company else record._replace(company=company_from_domain(record.email))
+
+def company_from_domain(address: Optional[str]) -> Optional[str]:
+    """Fallback für Signaturen ohne Rechtsform: "m.stemmer@boss-steinlen.de" → "boss-steinlen" """
+    if not address or "@" not in address:
+        return None
+    return address.split("@", 1)[1].rsplit(".", 1)[0]
@@ -0,0 +1,57 @@
+import hashlib
+import os
+
+from attachment_store import AttachmentStore
+
+LOGO = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 40
+
+def put(store, data):
+    sha256 = hashlib.sha256(data).hexdigest()
+    store.path(sha256).parent.mkdir(parents=True, exist_ok=True)
+    store.path(sha256).write_bytes(data)
+    return sha256
+
+def age(path, seconds=3600):
+    # Alte mtime setzen, damit ein erneutes Schreiben sicher sichtbar wäre
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns - seconds * 10**9))
+    return path.stat().st_mtime_ns
+
+def test_publish_writes_once_and_skips_reruns(tmp_path):
+    target = tmp_path / "images" / "logos" / "wdi.png"
+    with AttachmentStore(str(tmp_path / "store")) as store:
+        sha256 = put(store, LOGO)
+        assert store.publish(target, sha256) is True
+    assert target.read_bytes() == LOGO
+    mtime = age(target)
+
+    with AttachmentStore(str(tmp_path / "store")) as store:
+        assert store.publish(target, sha256) is False
+        assert store.stats["unchanged"] == 1
+    assert target.stat().st_mtime_ns == mtime
+
+def test_identical_existing_file_is_not_rewritten(tmp_path):
+    target = tmp_path / "wdi.png"
+    target.write_bytes(LOGO)
+    mtime = age(target)
+
+    store = AttachmentStore(str(tmp_path / "store"))
+    assert store.publish(target, put(store, LOGO)) is False
+    assert target.stat().st_mtime_ns == mtime
+    # Der Manifest-Eintrag wird trotzdem angelegt
+    assert store.names[target.as_posix()]["mtime_ns"] == mtime
+
+def test_changed_file_is_rewritten(tmp_path):
+    target = tmp_path / "wdi.png"
+    store = AttachmentStore(str(tmp_path / "store"))
+    sha256 = put(store, LOGO)
+    store.publish(target, sha256)
+
+    target.write_bytes(b"von Hand bearbeitet")
+    assert store.publish(target, sha256) is True
+    assert target.read_bytes() == LOGO
+
+    replacement = LOGO[::-1]
+    assert store.publish(target, put(store, replacement)) is True
+    assert target.read_bytes() == replacement
+    assert store.stats["published"] == 3
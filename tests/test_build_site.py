@@ -0,0 +1,142 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+spec = importlib.util.spec_from_file_location("build_site", Path(__file__).resolve().parent.parent / "build-site.py")
+build_site = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(build_site)
+
+THEME = """
+nav { display: flex; }
+.hero { min-height: 80vh; }
+.footer { color: #333; }
+.gallery img { border-radius: 8px; }
+"""
+
+PAGE = """<!DOCTYPE html>
+<html><head>
+<link rel="stylesheet" href="../css/theme.css">
+<link rel="stylesheet" href="../css/print.css" media="print">
+</head><body>
+<nav>Menü</nav>
+<section class="hero">Willkommen</section>
+<section class="gallery"><img src="a.png"></section>
+<footer class="footer">Kontakt</footer>
+</body></html>
+"""
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "css").mkdir()
+    (tmp_path / "css" / "theme.css").write_text(THEME, encoding="utf-8")
+    (tmp_path / "css" / "print.css").write_text("body { color: black; }", encoding="utf-8")
+    (tmp_path / "images").mkdir()
+    (tmp_path / "images" / "hero.jpg").write_bytes(b"\xff\xd8 hero")
+    (tmp_path / "pages").mkdir()
+    (tmp_path / "pages" / "leistung.html").write_text(PAGE, encoding="utf-8")
+    fingerprinter = build_site.Fingerprinter(tmp_path / "dist")
+    fingerprinter.collect()
+    return fingerprinter
+
+def test_blocking_stylesheet_is_replaced_by_critical_css(site):
+    split = build_site.inline_critical_css(Path("pages/leistung.html"), PAGE, site)
+
+    assert split["blocking"] == 1
+    html = split["html"]
+    assert html.count('<link rel="stylesheet" href="../css/theme.css">') == 1
+    assert '<noscript><link rel="stylesheet" href="../css/theme.css"></noscript>' in html
+    assert '<link rel="preload" href="../css/theme.css" as="style"' in html
+    critical = html[html.index("<style>") + 7:html.index("</style>")]
+    assert "nav{display:flex}" in critical and ".hero{min-height:80vh}" in critical
+    assert ".footer" not in critical and ".gallery" not in critical
+    # Print-Stylesheets blockieren das Rendern nicht und bleiben, wie sie sind
+    assert '<link rel="stylesheet" href="../css/print.css" media="print">' in html
+
+def test_stylesheet_that_is_mostly_critical_stays_linked(site):
+    split = build_site.inline_critical_css(Path("pages/leistung.html"), PAGE, site, max_share=0.1)
+    assert split["blocking"] == 0
+    assert split["html"] == PAGE
+
+def test_large_head_styles_are_deferred(site):
+    filler = "".join(f".card-{i} {{ padding: {i}px; }}\n" for i in range(200))
+    page = PAGE.replace("</head>", "<style>nav { color: red; } .hero { background: url(../images/hero.jpg); }\n"
+                                   f"{filler}</style></head>")
+    split = build_site.inline_critical_css(Path("pages/leistung.html"), page, site, min_deferred_kb=1)
+
+    virtual, data = split["deferred"]
+    assert virtual == Path("inline/pages/leistung.css")
+    css = data.decode("utf-8")
+    assert ".card-199" in css
+    # url() zeigt vom Ablageort assets/inline/pages/ auf die Kopie mit Hash
+    assert f"url(../../{site.mapping[Path('images/hero.jpg')].relative_to('assets').as_posix()})" in css
+    href = build_site.relative_url(build_site.fingerprinted_name(virtual, build_site.content_hash(data)),
+                                   Path("pages/leistung.html"))
+    assert f'<link rel="preload" href="{href}" as="style"' in split["html"]
+    assert ".card-199" not in split["html"]
+    assert "nav{color:red}" in split["html"]
+
+def test_small_head_styles_stay_inline(site):
+    page = PAGE.replace("</head>", "<style>.footer { margin: 0; }</style></head>")
+    split = build_site.inline_critical_css(Path("pages/leistung.html"), page, site)
+    assert split["deferred"] is None
+    assert "<style>.footer { margin: 0; }</style>" in split["html"]
+
+def test_assets_are_copied_under_their_content_hash(site):
+    digest = build_site.content_hash(THEME.encode("utf-8"))
+    hashed = site.mapping[Path("css/theme.css")]
+    assert hashed == Path(f"assets/css/theme.{digest}.css")
+    assert (site.output / hashed).read_text(encoding="utf-8") == THEME
+    assert site.manifest()["images/hero.jpg"] == site.mapping[Path("images/hero.jpg")].as_posix()
+
+    # Gleicher Inhalt, gleicher Name: ein zweiter Build schreibt nichts
+    again = build_site.Fingerprinter(site.output)
+    again.collect()
+    assert again.written == 0 and again.mapping == site.mapping
+
+def test_stylesheet_references_point_to_hashed_copies(site):
+    Path("css/hero.css").write_text('@import "theme.css";\n.hero { background: url("../images/hero.jpg"); }\n'
+                                    ".logo { background: url(https://example.com/logo.png); }\n", encoding="utf-8")
+    css = (site.output / site.stylesheet(Path("css/hero.css"))).read_text(encoding="utf-8")
+
+    assert f'@import "{site.mapping[Path("css/theme.css")].name}"' in css
+    assert f'url("../images/{site.mapping[Path("images/hero.jpg")].name}")' in css
+    assert "url(https://example.com/logo.png)" in css
+
+def test_page_urls_are_rewritten(site):
+    hero = site.mapping[Path("images/hero.jpg")].as_posix()
+    html = ('<img src="../images/hero.jpg?v=2#top" srcset="../images/hero.jpg 1x, ../images/fehlt.jpg 2x">\n'
+            "<div style=\"background: url('../images/hero.jpg')\"></div>\n"
+            '<a href="https://example.com/images/hero.jpg">extern</a>\n'
+            "<style>.hero { background: url(../images/hero.jpg); }</style>\n")
+    rewritten = site.rewrite_page(Path("pages/leistung.html"), html)
+
+    assert f'src="../{hero}?v=2#top"' in rewritten
+    assert f'srcset="../{hero} 1x, ../images/fehlt.jpg 2x"' in rewritten
+    assert f"url('../{hero}')" in rewritten
+    assert f"url(../{hero})" in rewritten
+    assert 'href="https://example.com/images/hero.jpg"' in rewritten
+
+def test_prune_removes_copies_with_stale_hashes(site):
+    old = site.output / site.mapping[Path("images/hero.jpg")]
+    Path("images/hero.jpg").write_bytes(b"\xff\xd8 neues hero")
+    current = build_site.Fingerprinter(site.output)
+    current.collect()
+
+    assert current.prune() == 1
+    assert not old.exists()
+    assert all((site.output / hashed).exists() for hashed in current.mapping.values())
+
+def test_headers_file_caches_hashed_assets_forever(site):
+    headers = build_site.headers_file(["index.html", "pages/leistung.html"])
+    assert f"/assets/*\n  Cache-Control: {build_site.IMMUTABLE}\n" in headers
+    assert f"\n/\n  Cache-Control: {build_site.REVALIDATE}\n" in headers
+    assert f"\n/pages/*\n  Cache-Control: {build_site.REVALIDATE}\n" in headers
+    assert "/pages/*" not in build_site.headers_file(["index.html"])
+
+def test_headers_file_keeps_existing_rules_first(site):
+    Path("_headers").write_text("/*\n  X-Frame-Options: DENY\n\n", encoding="utf-8")
+    headers = build_site.headers_file(["index.html"])
+    assert headers.startswith("/*\n  X-Frame-Options: DENY\n\n# Generiert")
+    assert headers.count("/assets/*") == 1
@@ -0,0 +1,287 @@
+import copy
+
+import pytest
+
+import cloudflare_api
+from cloudflare_api import (
+    API_BASE, CUSTOM_RULES_ENTRYPOINT, CloudflareClient, RequestScheduler, ResponseCache, RulesetTransaction,
+    ZoneMetadata, _json_response
+)
+
+def ruleset(version, *expressions):
+    return {"id": f"rs-{version}", "version": version, "phase": "http_request_firewall_custom",
+            "rules": [{"id": f"r{i}", "expression": expression, "action": "block"}
+                      for i, expression in enumerate(expressions)]}
+
+class FakeSession:
+    """Beantwortet GET und PUT auf Rulesets aus einem Dict {(zone, endpoint): ruleset}"""
+
+    def __init__(self, rulesets, failing=()):
+        self.rulesets = rulesets
+        self.failing = set(failing)
+        self.calls = []
+
+    def request(self, method, url, json=None, **kwargs):
+        path = url[len(API_BASE) + 1:]
+        self.calls.append((method, path))
+        _, zone_id, endpoint = path.split("/", 2)
+        if method == "PUT":
+            if zone_id in self.failing:
+                return _json_response(url, 500, {"success": False, "errors": [{"message": "intern"}]})
+            current = self.rulesets[zone_id, endpoint]
+            current.update(version=current["version"] + 1, rules=json["rules"])
+            return _json_response(url, 200, {"success": True, "result": current})
+        if endpoint == "rulesets":
+            listing = [{"id": key[1].split("/")[1], "phase": value["phase"]}
+                       for key, value in self.rulesets.items() if key[0] == zone_id and key[1] != endpoint]
+            return _json_response(url, 200, {"success": True, "result": listing})
+        if (zone_id, endpoint) not in self.rulesets:
+            return _json_response(url, 404, {"success": False, "errors": [{"message": "not found"}]})
+        return _json_response(url, 200, {"success": True, "result": copy.deepcopy(self.rulesets[zone_id, endpoint])})
+
+    def puts(self):
+        return [path for method, path in self.calls if method == "PUT"]
+
+def client_for(session, tmp_path):
+    client = CloudflareClient("test-token")
+    client.session = session
+    client.cache = ResponseCache(str(tmp_path / "cache"))
+    client.zones = ZoneMetadata(None)
+    return client
+
+def test_apply_writes_one_put_per_zone(tmp_path):
+    session = FakeSession({
+        ("a", CUSTOM_RULES_ENTRYPOINT): ruleset(3, 'http.request.uri.path eq "/"', 'ip.src.country eq "RU"'),
+        ("b", CUSTOM_RULES_ENTRYPOINT): ruleset(7, 'http.request.uri.path eq "/"'),
+    })
+    transaction = RulesetTransaction(client_for(session, tmp_path))
+    for zone_id in ("a", "b"):
+        update = transaction.zone(zone_id)
+        for rule in update.rules:
+            update.replace_rule(rule["id"], action="managed_challenge")
+
+    assert "managed_challenge" in transaction.diff()
+    assert transaction.apply() is True
+    assert session.puts() == [f"zones/a/{CUSTOM_RULES_ENTRYPOINT}", f"zones/b/{CUSTOM_RULES_ENTRYPOINT}"]
+    assert [rule["action"] for rule in session.rulesets["a", CUSTOM_RULES_ENTRYPOINT]["rules"]] == \
+        ["managed_challenge", "managed_challenge"]
+
+def test_dry_run_and_unchanged_zones_do_not_write(tmp_path):
+    session = FakeSession({("a", CUSTOM_RULES_ENTRYPOINT): ruleset(3, 'http.request.uri.path eq "/"')})
+    transaction = RulesetTransaction(client_for(session, tmp_path))
+    transaction.zone("a").replace_rule("r0", action="log")
+
+    assert transaction.apply(dry_run=True) is True
+    transaction.zone("a").replace_rule("r0", action="block")
+    assert transaction.apply() is True
+    assert session.puts() == []
+
+def test_version_mismatch_is_rejected(tmp_path, capsys):
+    session = FakeSession({("a", CUSTOM_RULES_ENTRYPOINT): ruleset(3, 'http.request.uri.path eq "/"')})
+    transaction = RulesetTransaction(client_for(session, tmp_path))
+    transaction.zone("a").replace_rule("r0", action="log")
+    # Jemand anderes ändert das Ruleset zwischen Laden und Schreiben
+    session.rulesets["a", CUSTOM_RULES_ENTRYPOINT]["version"] = 4
+
+    assert transaction.apply() is False
+    assert session.puts() == []
+    assert "v3 -> v4" in capsys.readouterr().out
+
+def test_failed_put_rolls_back_written_zones(tmp_path):
+    original = ruleset(3, 'http.request.uri.path eq "/"')
+    session = FakeSession({
+        ("a", CUSTOM_RULES_ENTRYPOINT): copy.deepcopy(original),
+        ("b", CUSTOM_RULES_ENTRYPOINT): ruleset(7, 'http.request.uri.path eq "/"'),
+    }, failing={"b"})
+    transaction = RulesetTransaction(client_for(session, tmp_path))
+    for zone_id in ("a", "b"):
+        transaction.zone(zone_id).replace_rule("r0", action="log")
+
+    assert transaction.apply() is False
+    # a: PUT der Änderung, dann PUT des ursprünglichen Stands; b: gescheiterter PUT
+    assert session.puts() == [f"zones/a/{CUSTOM_RULES_ENTRYPOINT}", f"zones/b/{CUSTOM_RULES_ENTRYPOINT}",
+                              f"zones/a/{CUSTOM_RULES_ENTRYPOINT}"]
+    assert session.rulesets["a", CUSTOM_RULES_ENTRYPOINT]["rules"] == original["rules"]
+
+def test_ruleset_without_entrypoint_is_written_by_id(tmp_path):
+    session = FakeSession({("a", "rulesets/abc"): ruleset(5, 'http.request.uri.path eq "/"')})
+    client = client_for(session, tmp_path)
+    transaction = RulesetTransaction(client)
+    update = transaction.zone("a")
+    assert update.endpoint == "rulesets/abc"
+    update.replace_rule("r0", action="log")
+
+    # Ein gespeicherter Plan schreibt später an denselben Endpoint
+    replay = RulesetTransaction.from_plan(client_for(session, tmp_path), transaction.to_plan())
+    assert replay.apply() is True
+    assert session.puts() == ["zones/a/rulesets/abc"]
+    assert session.rulesets["a", "rulesets/abc"]["rules"][0]["action"] == "log"
+
+class ETagSession:
+    """Ein Endpoint mit ETag; beantwortet passende If-None-Match mit 304"""
+
+    def __init__(self, body, etag):
+        self.body = body
+        self.etag = etag
+        self.sent = []
+
+    def request(self, method, url, headers=None, **kwargs):
+        self.sent.append(dict(headers or {}))
+        if (headers or {}).get("If-None-Match") == self.etag:
+            response = _json_response(url, 304, {})
+            response._content = b""
+        else:
+            response = _json_response(url, 200, self.body)
+        response.headers["ETag"] = self.etag
+        return response
+
+def test_cache_serves_fresh_entries_without_requests(tmp_path):
+    session = ETagSession({"success": True, "result": {"version": 1}}, '"v1"')
+    client = client_for(session, tmp_path)
+
+    assert client.cached_get("zones/a/rate_limits").json()["result"] == {"version": 1}
+    response = client.cached_get("zones/a/rate_limits")
+    assert response.from_cache and response.json()["result"] == {"version": 1}
+    assert len(session.sent) == 1
+
+def test_stale_entries_are_revalidated_with_etag(tmp_path):
+    session = ETagSession({"success": True, "result": {"version": 1}}, '"v1"')
+    client = client_for(session, tmp_path)
+    client.cache.ttl = 0
+    client.cached_get("zones/a/rate_limits")
+
+    # 304: Inhalt aus dem Cache, nur der Zeitstempel wird erneuert
+    assert client.cached_get("zones/a/rate_limits").json()["result"] == {"version": 1}
+    assert session.sent[-1]["If-None-Match"] == '"v1"'
+
+    session.body, session.etag = {"success": True, "result": {"version": 2}}, '"v2"'
+    assert client.cached_get("zones/a/rate_limits").json()["result"] == {"version": 2}
+    # Neuer Prozess: der Eintrag kommt von der Platte, mit dem neuen ETag
+    restarted = client_for(session, tmp_path)
+    restarted.cache.ttl = 0
+    assert restarted.cached_get("zones/a/rate_limits").json()["result"] == {"version": 2}
+    assert session.sent[-1]["If-None-Match"] == '"v2"'
+
+def test_invalidate_drops_entries_below_a_zone(tmp_path):
+    session = ETagSession({"success": True, "result": []}, '"v1"')
+    client = client_for(session, tmp_path)
+    client.cached_get("zones/a/rate_limits")
+    client.cached_get("zones/b/rate_limits")
+
+    client.cache.invalidate("zones/a")
+    client.cached_get("zones/a/rate_limits")
+    client.cached_get("zones/b/rate_limits")
+    assert [headers.get("If-None-Match") for headers in session.sent] == [None, None, None]
+
+class Clock:
+    """Ersetzt time.monotonic/time.sleep, damit Wartezeiten nur gezählt werden"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+        self.slept += seconds
+
+def scheduled(monkeypatch, **limits):
+    clock = Clock()
+    monkeypatch.setattr(cloudflare_api.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(cloudflare_api.time, "sleep", clock.sleep)
+    return RequestScheduler(**limits), clock
+
+def status(code, **headers):
+    response = _json_response(API_BASE, code, {"success": code == 200})
+    response.headers.update(headers)
+    return response
+
+def test_token_bucket_allows_a_burst_then_the_refill_rate(monkeypatch):
+    scheduler, clock = scheduled(monkeypatch, capacity=3, period=3)
+    for _ in range(3):
+        scheduler.acquire()
+    assert clock.slept == 0
+
+    scheduler.acquire()
+    scheduler.acquire()
+    assert clock.slept == pytest.approx(2.0)
+    assert scheduler.metrics["requests"] == 5
+    assert scheduler.metrics["bucket_wait"] == pytest.approx(2.0)
+
+def test_429_pauses_for_retry_after_and_retries(monkeypatch):
+    scheduler, clock = scheduled(monkeypatch)
+    responses = iter([status(429, **{"Retry-After": "4"}), status(200)])
+
+    assert scheduler.send(lambda: next(responses)).status_code == 200
+    assert scheduler.metrics["throttled"] == 1
+    # Retry-After plus bis zu 1 s Jitter; der Bucket ist danach leer
+    assert 4 <= clock.slept <= 5 + 1
+
+def test_429_without_retry_after_backs_off_exponentially_up_to_the_limit(monkeypatch):
+    scheduler, _ = scheduled(monkeypatch, max_backoff=10)
+    response = status(429)
+    assert all(0 <= scheduler.retry_delay(response, 1) <= 2 for _ in range(50))
+    assert all(scheduler.retry_delay(response, 8) <= 10 for _ in range(50))
+    assert scheduler.retry_delay(status(429, **{"Retry-After": "300"}), 0) <= 10 + 1
+
+def test_persistent_429_is_returned_after_max_retries(monkeypatch):
+    scheduler, _ = scheduled(monkeypatch, max_retries=2)
+    calls = []
+
+    def send():
+        calls.append(1)
+        return status(429, **{"Retry-After": "1"})
+
+    assert scheduler.send(send).status_code == 429
+    assert len(calls) == 3
+    assert scheduler.metrics["throttled"] == 2
+
+class PagedSession:
+    """Liefert eine Liste seitenweise, mit oder ohne result_info.total_pages"""
+
+    def __init__(self, items, total_pages=True):
+        self.items = items
+        self.total_pages = total_pages
+        self.pages = []
+
+    def request(self, method, url, params=None, **kwargs):
+        page, per_page = params["page"], params["per_page"]
+        self.pages.append(page)
+        result = self.items[(page - 1) * per_page:page * per_page]
+        payload = {"success": True, "result": result}
+        if self.total_pages:
+            payload["result_info"] = {"page": page, "total_pages": -(-len(self.items) // per_page)}
+        return _json_response(url, 200, payload)
+
+@pytest.mark.parametrize("total_pages", [True, False])
+def test_paginate_follows_pages_until_the_last(tmp_path, total_pages):
+    session = PagedSession(list(range(7)), total_pages)
+    client = client_for(session, tmp_path)
+
+    assert list(client.paginate("zones", per_page=3, cached=False)) == list(range(7))
+    assert session.pages == [1, 2, 3]
+
+def test_paginate_yields_before_loading_the_next_page(tmp_path):
+    session = PagedSession(list(range(7)))
+    entries = client_for(session, tmp_path).paginate("zones", per_page=3, cached=False)
+
+    assert next(entries) == 0
+    assert session.pages == [1]
+
+def test_working_ruleset_endpoint_is_remembered(tmp_path):
+    session = FakeSession({("a", "rulesets/abc"): ruleset(5, 'http.request.uri.path eq "/"')})
+    client = client_for(session, tmp_path)
+    client.zones = ZoneMetadata(str(tmp_path / "zones.json"))
+
+    assert client.custom_ruleset("a", cached=False).json()["result"]["version"] == 5
+    assert [path for _, path in session.calls] == \
+        [f"zones/a/{CUSTOM_RULES_ENTRYPOINT}", "zones/a/rulesets", "zones/a/rulesets/abc"]
+
+    # Auch ein neuer Prozess lädt direkt über die gemerkte Ruleset ID
+    session.calls.clear()
+    restarted = client_for(session, tmp_path)
+    restarted.zones = ZoneMetadata(str(tmp_path / "zones.json"))
+    restarted.custom_ruleset("a", cached=False)
+    assert [path for _, path in session.calls] == ["zones/a/rulesets/abc"]
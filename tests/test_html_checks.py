@@ -0,0 +1,107 @@
+from pathlib import Path
+
+import pytest
+
+from html_checks import Document, parse_selector, resolve_reference, run_check, srcset_urls
+
+PAGE = """<html lang="de"><body>
+<nav id="mainNav"><a href="#services" class="nav-link">Leistungen</a><a href="/pages/kontakt.html">Kontakt</a></nav>
+<section id="museum" class="split-apple museum">
+  <img src="images/logos/DFM.png" alt="DFM">
+  <p>Das Fußballmuseum setzt auf <b>Kost</b> Sicherheitstechnik
+  <a class="btn btn-primary" href="pages/fussballmuseum.html">Mehr</a>
+</section>
+<div class="references-grid">
+  <div class="reference-card"><img src="images/logos/wdi.png"></div>
+  <div class="reference-card featured"><img src="images/logos/rwe.webp" alt=""></div>
+</div>
+<br/>
+<footer>Kost Sicherheitstechnik</footer>
+</body></html>
+"""
+
+@pytest.fixture
+def document():
+    return Document(PAGE, Path("index.html"))
+
+def selected(document, selector, **kwargs):
+    return [element.get("src") or element.get("href") or element.tag
+            for element in document.select(selector, **kwargs)]
+
+@pytest.mark.parametrize("selector, expected", [
+    ("footer", ["footer"]),
+    ("section#museum", ["section"]),
+    ("#museum.split-apple", ["section"]),
+    ("div.reference-card.featured img", ["images/logos/rwe.webp"]),
+    ("img[src*=logos]", ["images/logos/DFM.png", "images/logos/wdi.png", "images/logos/rwe.webp"]),
+    ("a[href^='#']", ["#services"]),
+    ('img[src$=".webp"]', ["images/logos/rwe.webp"]),
+    ("a[class=btn]", []),
+    ("a[href='pages/fussballmuseum.html']", ["pages/fussballmuseum.html"]),
+    ("img[alt]", ["images/logos/DFM.png", "images/logos/rwe.webp"]),
+    ("img:not([alt])", ["images/logos/wdi.png"]),
+    ("div:not(.featured) img", ["images/logos/wdi.png", "images/logos/rwe.webp"]),
+    ("section#museum.other", []),
+])
+def test_simple_selectors(document, selector, expected):
+    assert selected(document, selector) == expected
+
+def test_descendant_chains_skip_intermediate_levels(document):
+    assert selected(document, "section#museum a[class*=btn]") == ["pages/fussballmuseum.html"]
+    assert selected(document, "nav#mainNav a[href^='#']") == ["#services"]
+    assert selected(document, "body div.references-grid div img") == \
+        ["images/logos/wdi.png", "images/logos/rwe.webp"]
+    # Die Reihenfolge der Kette zählt: img ist nie Vorfahre
+    assert selected(document, "img div") == []
+    assert selected(document, "nav section a") == []
+
+def test_alternatives_are_merged_in_document_order(document):
+    assert selected(document, "footer, nav#mainNav a, img[src*=DFM], footer") == \
+        ["#services", "/pages/kontakt.html", "images/logos/DFM.png", "footer"]
+
+def test_within_limits_matches_to_descendants(document):
+    grid = document.by_class["references-grid"][0]
+    assert selected(document, "img", within=grid) == ["images/logos/wdi.png", "images/logos/rwe.webp"]
+    assert selected(document, "div.references-grid", within=grid) == []
+
+def test_unclosed_elements_end_with_their_parent(document):
+    # <p> ohne </p> endet mit der Section; der Link liegt darin, die Referenzen nicht
+    paragraph = document.select("section#museum p")[0]
+    assert selected(document, "a", within=paragraph) == ["pages/fussballmuseum.html"]
+    assert document.select("p img") == []
+    assert selected(document, "br") == ["br"]
+
+def test_text_includes_nested_elements(document):
+    museum = document.select("section#museum")[0]
+    assert "setzt auf Kost Sicherheitstechnik" in " ".join(document.text(museum).split())
+    check = {"name": "Text", "select": "section#museum", "text": ("setzt auf", "kost")}
+    assert run_check(document, check) == (True, "1 Treffer")
+
+def test_start_tag_offsets_point_into_the_source(document):
+    for element in document.select("img, a"):
+        assert PAGE[element.offset:element.offset + len(element.start_tag)] == element.start_tag
+
+def test_selectors_are_parsed_once():
+    assert parse_selector("section#museum img") is parse_selector("section#museum img")
+    assert [[part.tag for part in chain] for chain in parse_selector("a b, c")] == [["a", "b"], ["c"]]
+    with pytest.raises(ValueError):
+        parse_selector("a > b")
+
+@pytest.mark.parametrize("url, expected", [
+    ("../images/a.png", Path("images/a.png")),
+    ("/css/theme.css", Path("css/theme.css")),
+    ("logo%20neu.png?v=2#x", Path("pages/logo neu.png")),
+    ("https://example.com/a.png", None),
+    ("//cdn.example.com/a.js", None),
+    ("#kontakt", None),
+    ("mailto:info@example.com", None),
+    ("data:image/png;base64,AAAA", None),
+    ("", None),
+])
+def test_resolve_reference(url, expected):
+    assert resolve_reference(url, Path("pages/kontakt.html")) == expected
+
+def test_srcset_urls():
+    assert srcset_urls("a-480w.webp 480w, b-960w.webp 960w") == ["a-480w.webp", "b-960w.webp"]
+    assert srcset_urls(" a.webp 1x,b.webp 2x, ") == ["a.webp", "b.webp"]
+    assert srcset_urls("") == []
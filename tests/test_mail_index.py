@@ -0,0 +1,79 @@
+import email
+import hashlib
+from email import policy
+from email.message import EmailMessage
+
+import pytest
+
+from mail_index import MailIndex, iter_attachment, scan_message
+
+LOGO = bytes(range(256)) * 300
+CSV = "Firma;Ort\nWDI;Schwerte\nMüller & Söhne;Köln\n".encode("utf-8")
+
+def write_mail(path, cte):
+    message = EmailMessage()
+    message["From"] = "Ralf Rauch <Ralf.Rauch@wdi.de>"
+    message["To"] = "info@example.de"
+    message["Subject"] = "Referenz für die Zusammenarbeit"
+    message["Date"] = "Tue, 14 May 2024 09:30:00 +0200"
+    message.set_content("Vielen Dank für die tolle Zusammenarbeit!\nGrüße aus Schwerte\n")
+    message.add_alternative("<p>Vielen Dank für die <b>tolle</b> Zusammenarbeit!</p>", subtype="html")
+    message.add_attachment(LOGO, maintype="image", subtype="png", filename="logo.png", cte=cte)
+    message.add_attachment(CSV, maintype="text", subtype="csv", filename="kunden.csv",
+                           cte="quoted-printable")
+    path.write_bytes(message.as_bytes(policy=policy.SMTP))
+    return path
+
+def stdlib_attachments(path):
+    with open(path, "rb") as f:
+        message = email.message_from_binary_file(f, policy=policy.default)
+    return {part.get_filename(): part.get_payload(decode=True) for part in message.iter_attachments()}
+
+@pytest.mark.parametrize("cte", ["base64", "quoted-printable"])
+def test_attachment_hashes_match_stdlib_parser(tmp_path, cte):
+    path = write_mail(tmp_path / "referenz.eml", cte)
+    expected = stdlib_attachments(path)
+    record = scan_message(str(path))
+
+    assert {a["filename"] for a in record["attachments"]} == {"logo.png", "kunden.csv"}
+    for attachment in record["attachments"]:
+        payload = expected[attachment["filename"]]
+        assert attachment["size"] == len(payload)
+        assert attachment["sha256"] == hashlib.sha256(payload).hexdigest()
+        assert attachment["disposition"] == "attachment"
+
+@pytest.mark.parametrize("cte", ["base64", "quoted-printable"])
+def test_offsets_reproduce_attachment_bytes(tmp_path, cte):
+    path = write_mail(tmp_path / "referenz.eml", cte)
+    expected = stdlib_attachments(path)
+    raw = path.read_bytes()
+
+    for attachment in scan_message(str(path))["attachments"]:
+        assert attachment["encoding"] in ("base64", "quoted-printable")
+        assert attachment["offset"] + attachment["length"] <= len(raw)
+        data = b"".join(iter_attachment(dict(attachment, path=str(path))))
+        assert data == expected[attachment["filename"]]
+
+def test_headers_and_text_bodies(tmp_path):
+    path = write_mail(tmp_path / "referenz.eml", "base64")
+    record = scan_message(str(path))
+
+    assert record["sha256"] == hashlib.sha256(path.read_bytes()).hexdigest()
+    assert record["sender_address"] == "ralf.rauch@wdi.de"
+    assert record["subject"] == "Referenz für die Zusammenarbeit"
+    assert record["date"] == "2024-05-14T09:30:00+02:00"
+    bodies = {body["content_type"]: body["text"] for body in record["bodies"]}
+    assert "Grüße aus Schwerte" in bodies["text/plain"]
+    assert "<b>tolle</b>" in bodies["text/html"]
+
+def test_index_reads_attachments_from_offsets(tmp_path):
+    mail_dir = tmp_path / "Kostmails"
+    mail_dir.mkdir()
+    path = write_mail(mail_dir / "referenz.eml", "base64")
+    expected = stdlib_attachments(path)
+
+    with MailIndex(str(tmp_path / "index.sqlite"), str(mail_dir)) as index:
+        assert index.update()["indexed"] == 1
+        assert index.update()["unchanged"] == 1
+        attachments = index.attachments(disposition="attachment")
+        assert {a["filename"]: index.read_attachment(a) for a in attachments} == expected
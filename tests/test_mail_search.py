@@ -0,0 +1,44 @@
+import pytest
+
+from mail_search import analyze, snippet, stem
+
+LETTER = ("Sehr geehrte Damen und Herren, wir bedanken uns für die hervorragende Zusammenarbeit beim "
+          "Relaunch unserer Website. Das Team war stets erreichbar und hat alle Wünsche umgesetzt, daher "
+          "empfehlen wir die Agentur gerne weiter an andere Unternehmen aus der Region.")
+
+@pytest.mark.parametrize("words", [
+    ("zusammenarbeit", "zusammenarbeiten"),
+    ("grüße", "grüßen", "grusse"),
+    ("haus", "häuser"),
+    ("kunde", "kunden"),
+    ("gestaltet", "gestalten"),
+    ("schön", "schöne", "schon"),
+])
+def test_inflections_share_a_stem(words):
+    assert len({stem(word) for word in words}) == 1
+
+def test_stems_are_folded_and_truncated():
+    assert stem("zufrieden") == "zufried"
+    assert stem("grüße") == "gruss"
+    assert stem("zusammenarbeit") == "zusammenarbei"
+    # "ge" fällt nur bei längeren Wörtern weg
+    assert stem("gestaltet") == "stal"
+    assert stem("geld") == "geld"
+
+def test_analyze_skips_digits_and_single_letters():
+    assert analyze("Die 2024 Häuser, a Grüße!") == ["die", "hau", "gruss"]
+
+def test_snippet_marks_hits_and_trims_both_sides():
+    excerpt = snippet(LETTER, analyze("zusammenarbeiten"), width=8)
+    assert excerpt == "… die hervorragende »Zusammenarbeit« beim Relaunch unserer Website. Das …"
+
+def test_snippet_without_hits_starts_at_the_beginning():
+    assert snippet(LETTER, analyze("Datenschutz"), width=5) == "Sehr geehrte Damen und Herren …"
+
+def test_snippet_covering_the_whole_text_has_no_ellipsis():
+    excerpt = snippet(LETTER, analyze("sehr"), width=100)
+    assert excerpt.startswith("»Sehr« geehrte")
+    assert "…" not in excerpt
+
+def test_snippet_of_empty_text():
+    assert snippet("", analyze("Zusammenarbeit")) == ""
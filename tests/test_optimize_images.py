@@ -0,0 +1,45 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+spec = importlib.util.spec_from_file_location(
+    "optimize_images", Path(__file__).resolve().parent.parent / "optimize-images.py")
+optimize_images = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(optimize_images)
+
+def test_variant_names_keep_the_source_extension():
+    png = optimize_images.variant_path(Path("images/logos/x.png"), 480, "webp")
+    jpg = optimize_images.variant_path(Path("images/logos/x.jpg"), 480, "webp")
+    assert png == Path("images/variants/logos/x.png-480w.webp")
+    assert png != jpg
+
+def test_images_with_the_same_stem_get_separate_variants(tmp_path, monkeypatch):
+    Image = pytest.importorskip("PIL.Image")
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "images" / "logos").mkdir(parents=True)
+    Image.new("RGB", (600, 300), "red").save("images/logos/x.png")
+    Image.new("RGB", (600, 300), "blue").save("images/logos/x.jpg")
+
+    entries = {}
+    for source in optimize_images.find_sources():
+        digest = optimize_images.file_hash(source)
+        entries[source.as_posix()] = optimize_images.encode(str(source), digest, (480,), ("webp",))
+        assert optimize_images.is_current(entries[source.as_posix()], source, digest, (480,), ("webp",))
+
+    png = [variant["path"] for variant in entries["images/logos/x.png"]["variants"]]
+    jpg = [variant["path"] for variant in entries["images/logos/x.jpg"]["variants"]]
+    assert png == ["images/variants/logos/x.png-480w.webp"]
+    assert jpg == ["images/variants/logos/x.jpg-480w.webp"]
+    with Image.open(png[0]) as red, Image.open(jpg[0]) as blue:
+        assert red.convert("RGB").getpixel((0, 0))[0] > 200
+        assert blue.convert("RGB").getpixel((0, 0))[2] > 200
+
+def test_variants_under_the_old_names_are_rebuilt(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    old = tmp_path / "images" / "variants" / "logos" / "x-480w.webp"
+    old.parent.mkdir(parents=True)
+    old.write_bytes(b"alt")
+    entry = {"hash": "abc", "widths": [480], "formats": ["webp"],
+             "variants": [{"path": "images/variants/logos/x-480w.webp", "width": 480, "format": "webp"}]}
+    assert not optimize_images.is_current(entry, Path("images/logos/x.png"), "abc", (480,), ("webp",))
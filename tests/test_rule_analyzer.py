@@ -0,0 +1,93 @@
+import pytest
+
+from rule_analyzer import (
+    PROBLEM_BLOCKING, PROBLEM_HOMEPAGE, ExpressionError, _analyze_hashed, _Parser, analyze_expression, evaluate,
+    rule_problems, with_googlebot_exception
+)
+
+REQUEST = {
+    "http.request.uri.path": "/api/contact",
+    "http.user_agent": "Mozilla/5.0 (compatible; Googlebot/2.1)",
+    "ip.src.country": "DE",
+}
+
+def check(expression, facts=REQUEST):
+    return evaluate(_Parser(expression).parse(), facts)
+
+@pytest.mark.parametrize("expression, expected", [
+    ('http.request.uri.path eq "/api/contact"', True),
+    ('http.request.uri.path ne "/api/contact"', False),
+    ('http.request.uri.path == "/api/contact" && not http.user_agent contains "Googlebot"', False),
+    ('ip.src.country in {"AT" "DE"}', True),
+    ('lower(http.user_agent) contains "googlebot"', True),
+    ('http.request.uri.path wildcard "/API/*"', True),
+    ('http.request.uri.path strict wildcard "/API/*"', False),
+    ('http.request.uri.path matches "^/api/"', True),
+])
+def test_known_fields_evaluate_to_bool(expression, expected):
+    assert check(expression) is expected
+
+def test_unknown_field_is_undecided():
+    assert check("cf.client.bot") is None
+    assert check('not cf.client.bot') is None
+    assert check('http.request.uri.path in $blocked_paths') is None
+
+def test_and_or_short_circuit_over_unknown_fields():
+    # Ein bekanntes False entscheidet "and", ein bekanntes True entscheidet "or"
+    assert check('http.request.uri.path eq "/" and cf.threat_score gt 10') is False
+    assert check('http.request.uri.path eq "/api/contact" or cf.threat_score gt 10') is True
+    assert check('http.request.uri.path eq "/" or cf.threat_score gt 10') is None
+    assert check('http.request.uri.path eq "/api/contact" xor cf.threat_score gt 10') is None
+
+def test_not_binds_tighter_than_and_and_and_tighter_than_or():
+    assert check('not http.request.uri.path eq "/" and ip.src.country eq "DE"') is True
+    assert check('ip.src.country eq "AT" and http.request.uri.path eq "/x" or ip.src.country eq "DE"') is True
+    assert check('ip.src.country eq "AT" and (http.request.uri.path eq "/x" or ip.src.country eq "DE")') is False
+
+@pytest.mark.parametrize("expression", ['http.request.uri.path eq', '(ip.src.country eq "DE"', 'ip.src.country eq "DE" and'])
+def test_incomplete_expressions_raise(expression):
+    with pytest.raises(ExpressionError):
+        _Parser(expression).parse()
+
+def test_parse_errors_are_recorded_not_raised():
+    info = analyze_expression('http.request.uri.path eq')
+    assert info.error
+    assert info.matches_googlebot is None
+
+def test_googlebot_exception_makes_rule_exempt():
+    expression = 'http.request.uri.path eq "/"'
+    assert not analyze_expression(expression).exempts_googlebot
+    assert analyze_expression(with_googlebot_exception(expression)).exempts_googlebot
+    assert analyze_expression('http.request.uri.path eq "/" and not cf.client.bot').exempts_googlebot
+
+def test_rule_problems_depend_on_action():
+    assert rule_problems({"expression": 'http.request.uri.path eq "/"', "action": "block"}) == \
+        [PROBLEM_HOMEPAGE, PROBLEM_BLOCKING]
+    assert rule_problems({"expression": 'http.request.uri.path eq "/"', "action": "managed_challenge"}) == \
+        [PROBLEM_HOMEPAGE, PROBLEM_BLOCKING]
+    assert rule_problems({"expression": 'http.request.uri.path eq "/"', "action": "log"}) == []
+    assert rule_problems({"expression": "cf.client.bot", "action": "skip"}) == []
+    assert rule_problems({"expression": 'http.request.uri.path eq "/api/contact"', "action": "block"}) == []
+
+def test_paths_outside_the_crawl_sample_still_count_as_blocking():
+    # Ohne Pfad ist das Ergebnis "vielleicht"; das reicht für eine Meldung
+    info = analyze_expression('http.request.uri.path eq "/pages/kontakt.html"')
+    assert info.matches_googlebot is None
+    assert rule_problems({"expression": info.expression, "action": "block"}) == [PROBLEM_BLOCKING]
+    assert rule_problems({"expression": 'http.request.uri.path matches "^/shop/"', "action": "block"}) == \
+        [PROBLEM_BLOCKING]
+
+def test_rules_limited_to_paths_disallowed_in_robots_txt_are_harmless():
+    assert analyze_expression('http.request.uri.path in {"/api/contact" "/api/newsletter"}').exempts_googlebot
+    assert analyze_expression('http.request.uri.path eq "/api/contact" or ip.src.country eq "CN"').exempts_googlebot
+    assert analyze_expression('not http.request.uri.path eq "/api/contact"').matches_googlebot is True
+
+def test_bulk_audit_parses_each_distinct_expression_once():
+    expressions = [f'http.request.uri.path eq "/seite-{i}" and not cf.client.bot' for i in range(50)]
+    rules = [{"id": str(n), "expression": expressions[n % 50], "action": "block"} for n in range(5000)]
+    before = _analyze_hashed.cache_info()
+
+    assert all(rule_problems(rule) == [] for rule in rules)
+    after = _analyze_hashed.cache_info()
+    assert after.misses - before.misses <= 50
+    assert after.hits - before.hits >= 4950
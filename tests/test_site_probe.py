@@ -0,0 +1,56 @@
+from pathlib import Path
+
+import pytest
+import requests
+
+from site_probe import GITHUB_PAGES_URL, PRODUCTION_URL, fetch, load_sitemap, rebase_url
+
+SITEMAP = """<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc> https://www.kost-sicherheitstechnik.de/ </loc></url>
+  <url><loc>https://www.kost-sicherheitstechnik.de/pages/alarmanlagen.html</loc></url>
+</urlset>
+"""
+URLS = ["https://www.kost-sicherheitstechnik.de/", "https://www.kost-sicherheitstechnik.de/pages/alarmanlagen.html"]
+
+@pytest.mark.parametrize("prefix", [b"", b"\xef\xbb\xbf", b"\xef\xbb\xbf\n  "])
+def test_load_sitemap_from_file_with_or_without_bom(tmp_path, prefix):
+    path = tmp_path / "sitemap.xml"
+    path.write_bytes(prefix + SITEMAP.encode("utf-8"))
+    assert load_sitemap(str(path)) == URLS
+
+def test_repository_sitemap_parses():
+    urls = load_sitemap(str(Path(__file__).resolve().parent.parent / "sitemap.xml"))
+    assert urls and all(url.startswith(PRODUCTION_URL) for url in urls)
+
+class SitemapSession:
+    def get(self, url, timeout=None):
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = b"\xef\xbb\xbf" + SITEMAP.encode("utf-8")
+        return response
+
+def test_load_sitemap_from_url():
+    assert load_sitemap(PRODUCTION_URL + "sitemap.xml", session=SitemapSession()) == URLS
+
+@pytest.mark.parametrize("url, base, expected", [
+    (PRODUCTION_URL, GITHUB_PAGES_URL, "https://maexftw.github.io/kost/"),
+    (PRODUCTION_URL + "pages/alarmanlagen.html", GITHUB_PAGES_URL,
+     "https://maexftw.github.io/kost/pages/alarmanlagen.html"),
+    (PRODUCTION_URL + "pages/x.html", "https://maexftw.github.io/kost", "https://maexftw.github.io/kost/pages/x.html"),
+    ("https://www.kost-sicherheitstechnik.de", "http://localhost:8000/", "http://localhost:8000/"),
+    (PRODUCTION_URL + "suche?q=tür#treffer", "http://localhost:8000", "http://localhost:8000/suche?q=tür"),
+])
+def test_rebase_url(url, base, expected):
+    assert rebase_url(url, base) == expected
+
+class FailingSession:
+    def get(self, url, **kwargs):
+        raise requests.exceptions.ConnectTimeout("zu langsam")
+
+def test_fetch_reports_errors_instead_of_raising():
+    result = fetch(FailingSession(), PRODUCTION_URL)
+    assert result["status"] is None
+    assert result["error"].startswith("ConnectTimeout")
+    assert result["total"] is not None